@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ROC/AUC analysis of synthetic score stores for many users and models: the
+original approach (sklearn roc_curve and roc_auc_score per score set, each
+set read again for each of the three comparisons, a pandas CSV per table)
+against tweetvalidator.analysis.analyze_scores, without plots.  Also checks
+that the AUCs agree.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import csv
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+
+from tweetvalidator.analysis import analyze_scores
+from tweetvalidator.score_store import write_score_store, ScoreStore
+
+USERS = 200
+MODELS = 6
+# Test tweets per user; other scores are every other user's tweets.
+TWEETS_PER_USER = 50
+
+def original_tables(out_dir, data):
+    """ generate_analysis_output as it was, less the plot. """
+    from sklearn.metrics import roc_curve, roc_auc_score
+
+    aucs = {}
+    for name, own, other in data:
+        truth = np.concatenate([np.ones(len(own)), np.zeros(len(other))])
+        score = np.concatenate([own, other])
+        fpr, tpr, thresh = roc_curve(truth, score)
+        aucs[name] = roc_auc_score(truth, score)
+        pd.DataFrame({'false_pos_rate' : fpr,
+                      'true_pos_rate'  : tpr,
+                      'threshold'      : thresh}).to_csv(
+                            os.path.join(out_dir, 'rates_' + name + '.txt'),
+                            index=False, float_format='%14.3f',
+                            quoting=csv.QUOTE_NONE)
+    return aucs
+
+def original_analysis(eval_directory, output_directory):
+    models = sorted(os.listdir(eval_directory))
+    users = ScoreStore(os.path.join(eval_directory, models[0])).users
+
+    def read(model, user = None):
+        store = ScoreStore(os.path.join(eval_directory, model), mmap_mode=None)
+        return store.user_scores(user) if user else (store.own, store.other)
+
+    aucs = original_tables(output_directory,
+                           [(model, *read(model)) for model in models])
+    for user in users:
+        user_directory = os.path.join(output_directory, user)
+        os.makedirs(user_directory, exist_ok=True)
+        original_tables(user_directory,
+                        [(model, *read(model, user)) for model in models])
+    for model in models:
+        model_directory = os.path.join(output_directory, model)
+        os.makedirs(model_directory, exist_ok=True)
+        original_tables(model_directory,
+                        [(user, *read(model, user)) for user in users])
+    return aucs
+
+def main():
+    random = np.random.RandomState(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        eval_directory = os.path.join(directory, 'eval')
+        for model_idx in range(MODELS):
+            scores = (random.rand(USERS * TWEETS_PER_USER) +
+                      0.1 * (model_idx + 1))
+            write_score_store(os.path.join(eval_directory, f'model_{model_idx}'),
+                [(f'@user_{i}',
+                  scores[i * TWEETS_PER_USER:(i + 1) * TWEETS_PER_USER],
+                  random.rand((USERS - 1) * TWEETS_PER_USER))
+                 for i in range(USERS)])
+
+        print(f'{USERS} users x {MODELS} models, '
+              f'{USERS * MODELS + MODELS} score sets\n')
+        for name, analyze in [('original', original_analysis),
+                              ('analyze_scores',
+                               lambda i, o: analyze_scores(i, o, plot=False))]:
+            output_directory = os.path.join(directory, name)
+            os.makedirs(output_directory)
+            start = time.perf_counter()
+            aucs = analyze(eval_directory, output_directory)
+            print(f'{name:>16} {time.perf_counter() - start:7.2f}s')
+            if name == 'original':
+                original_aucs = aucs
+            else:
+                assert all(np.isclose(aucs[model, None], area)
+                           for model, area in original_aucs.items())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Microbenchmark of ClusteredCosSimModel cluster statistics: the vectorized
+cluster_statistics against the original per-tweet Python loop, at 1k, 10k
+and 100k tweets.  Clustering itself is excluded; random unit vectors and
+labels stand in for a fitted SphericalKMeans.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import timeit
+import numpy as np
+from tweetvalidator.models.clustered_cos_sim_model import cluster_statistics
+
+EMBEDDING_DIM = 512
+N_CLUSTERS    = 4
+CORPUS_SIZES  = [1000, 10000, 100000]
+
+def loop_statistics(corpus, labels, cluster_means):
+    """ The per-tweet loop that characterize used before vectorization. """
+    n_clusters = len(cluster_means)
+    sim_sum       = np.zeros(n_clusters)
+    cluster_count = np.zeros(n_clusters, dtype=np.int64)
+    cluster_edges = np.ones(n_clusters)
+
+    # The list comprehension used to unpack dataframe columns.
+    corpus = np.asarray([x for x in corpus])
+
+    for cluster_idx, embedded_tweet in zip(labels, corpus):
+        sim = np.inner(embedded_tweet, cluster_means[cluster_idx])
+        if sim < cluster_edges[cluster_idx]:
+            cluster_edges[cluster_idx] = sim
+        cluster_count[cluster_idx] += 1
+        sim_sum[cluster_idx] += sim
+
+    return cluster_count, cluster_edges, sim_sum
+
+def random_unit_vectors(n, rng):
+    vectors = rng.standard_normal((n, EMBEDDING_DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1)[:, None]
+
+def main():
+    rng = np.random.RandomState(0)
+    cluster_means = random_unit_vectors(N_CLUSTERS, rng)
+
+    print(f'{"tweets":>8} {"loop (s)":>10} {"vectorized (s)":>15} {"speedup":>8}')
+    for n in CORPUS_SIZES:
+        corpus = random_unit_vectors(n, rng)
+        labels = rng.randint(N_CLUSTERS, size=n)
+
+        # Same answers, to float32 precision.
+        expected = loop_statistics(corpus, labels, cluster_means)
+        actual   = cluster_statistics(corpus, labels, cluster_means)
+        for e, a in zip(expected, actual):
+            assert np.allclose(e, a, atol=1e-3)
+
+        repeats = max(1, 10000 // n)
+        loop_time = min(timeit.repeat(
+                        lambda: loop_statistics(corpus, labels, cluster_means),
+                        number=1, repeat=repeats))
+        vec_time  = min(timeit.repeat(
+                        lambda: cluster_statistics(corpus, labels, cluster_means),
+                        number=1, repeat=repeats * 5))
+
+        print(f'{n:8} {loop_time:10.4f} {vec_time:15.5f} '
+              f'{loop_time / vec_time:7.0f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+5-fold cross-validation of the embedding model configurations in
+generate_similarity_scores.py on the processed data in 'processed_data_path',
+replicated to more users: cross_validate (data loaded and folds drawn once,
+embeddings memory-mapped into the workers) in one process and across a
+process pool, against looping over folds and configurations with a fresh
+load and split each time.  Also prints the AUC mean and standard deviation
+over folds; with replicated users these are lower than on the real data,
+since each user's copies count as other users.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import numpy as np
+from contextlib import redirect_stdout
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                             '..', 'scripts'))
+from get_config import get_config
+from tweetvalidator import cross_validate
+from tweetvalidator.evaluate_model import (load_tweets,
+                                           vectorized_user_similarity_scores,
+                                           auc_score)
+from tweetvalidator.evaluation_data import make_folds
+from tweetvalidator.models import ClusteredCosSimModel
+
+COPIES = 4
+FOLDS = 5
+
+def model_configs():
+    return [{'model'       : ClusteredCosSimModel(max_clusters=clusters),
+             'data_column' : 'embedding',
+             'file_prefix' : f'emb_{clusters}{"_scaled" * scaling}',
+             'score_args'  : {'cluster_scaling' : scaling},
+             'vectorize'   : True}
+            for clusters in [1, 2] for scaling in [False, True]]
+
+def reload_every_fold(input_directory):
+    """ Each configuration and fold loads and splits the data itself. """
+    aucs = {}
+    for model_config in model_configs():
+        for fold_idx in range(FOLDS):
+            data = load_tweets(input_directory).reset_index(drop=True)
+            train, test = make_folds(data['name'].values, FOLDS,
+                                     random_state = 1)[fold_idx]
+            results = list(vectorized_user_similarity_scores(
+                                model_config['model'], 'embedding',
+                                data.iloc[train], data.iloc[test],
+                                sorted(data['name'].unique()),
+                                model_config['score_args']))
+            aucs.setdefault(model_config['file_prefix'], []).append(auc_score(
+                    np.concatenate([own for _, own, _ in results]),
+                    np.concatenate([other for _, _, other in results])))
+    return aucs
+
+def main():
+    processed_directory = get_config()['processed_data_path']
+
+    with tempfile.TemporaryDirectory() as directory, \
+         open(os.devnull, 'w') as devnull:
+        input_directory = os.path.join(directory, 'processed')
+        os.makedirs(input_directory)
+        for file_name in os.listdir(processed_directory):
+            if file_name[0] != '@':
+                continue
+            for copy in range(COPIES):
+                shutil.copy(os.path.join(processed_directory, file_name),
+                            os.path.join(input_directory,
+                                         f'{file_name[:-5]}_{copy}.json'))
+
+        print(f'{len(os.listdir(input_directory))} users, {FOLDS} folds, '
+              f'{len(model_configs())} configurations, {os.cpu_count()} '
+              f'CPUs\n')
+        print(f'{"method":>26} {"seconds":>8}')
+
+        start = time.perf_counter()
+        with redirect_stdout(devnull):
+            reload_every_fold(input_directory)
+        print(f'{"reload every fold":>26} {time.perf_counter() - start:8.2f}')
+
+        for workers in [1, None]:
+            start = time.perf_counter()
+            with redirect_stdout(devnull):
+                results = cross_validate(model_configs(), input_directory,
+                                         n_folds = FOLDS, n_workers = workers)
+            method = (f'cross_validate, '
+                      f'{"pool of " * (workers is None)}'
+                      f'{workers or os.cpu_count()} proc')
+            print(f'{method:>26} {time.perf_counter() - start:8.2f}')
+
+        print()
+        for prefix, evaluation in results.items():
+            print(f"{prefix:>26} AUC {evaluation['auc_mean']:.3f} "
+                  f"± {evaluation['auc_std']:.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Downloading the configured 'twitter_users' from a local FakeTwitterServer
+with a simulated network latency per request: one user at a time (as
+retrieve_users_from_twitter.py used to) against TweetDownloader's
+concurrent workers, then an incremental re-run after a few new tweets.
+Reports wall time and requests made.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import sys
+import time
+import tempfile
+from contextlib import redirect_stdout
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                             '..', 'scripts'))
+from get_config import get_config
+from tweetvalidator.data_processing import (TweetDownloader, TokenBucket,
+                                            HTTPTransport, FakeTwitterServer)
+
+LATENCY = 0.05
+NEW_TWEETS = 5
+
+def main():
+    config = get_config()
+    users = config['twitter_users']
+    max_tweets = int(config['max_tweets_per_user'])
+    timelines = {user : [f'{user} tweet {i}' for i in range(max_tweets)]
+                 for user in users}
+
+    print(f'{len(users)} users, {max_tweets} tweets each, '
+          f'{LATENCY * 1000:.0f}ms per request\n')
+    print(f'{"run":>24} {"tweets":>7} {"requests":>9} {"seconds":>8}')
+    with FakeTwitterServer(timelines, latency=LATENCY) as server, \
+         open(os.devnull, 'w') as devnull:
+        for workers in [1, 8]:
+            downloader = TweetDownloader(HTTPTransport(server.url),
+                                         TokenBucket(1e6, 1e6),
+                                         workers=workers)
+            with tempfile.TemporaryDirectory() as directory:
+                runs = [('full', lambda: None),
+                        ('incremental', lambda: [server.add_tweets(user,
+                                                    ['new'] * NEW_TWEETS)
+                                                 for user in users])]
+                for name, before in runs:
+                    before()
+                    start = time.perf_counter()
+                    with redirect_stdout(devnull):
+                        report = downloader.download(users, directory,
+                                                     max_tweets)
+                    seconds = time.perf_counter() - start
+                    run = f'{name}, {workers} worker{"s" * (workers > 1)}'
+                    print(f'{run:>24} {report["tweets"]:7} '
+                          f'{report["requests"]:9} {seconds:8.2f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Embedding backends compared on the processed tweets in 'processed_data_path':
+start-up time, throughput, and the AUC of a mean (1 cluster) and 2-cluster
+embedding model over the usual characterization/test split.
+
+USE's AUC comes from the embeddings already stored with the processed tweets,
+so it's reported without TensorFlow; its start-up time and throughput are
+only measured when TensorFlow and the TF Hub module are available.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import sys
+import time
+import numpy as np
+from contextlib import redirect_stdout
+from sklearn.metrics import roc_auc_score
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                             '..', 'scripts'))
+from get_config import get_config
+from tweetvalidator.evaluate_model import (load_tweets_from_directory,
+                                           user_similarity_scores)
+from tweetvalidator.embedding_backends import make_backend
+from tweetvalidator.models import ClusteredCosSimModel
+
+CLUSTERS = [1, 2]
+
+def auc(train, test, data_column, clusters):
+    """ AUC of own-user against other-user scores, pooled over users. """
+    model = ClusteredCosSimModel(max_clusters=clusters)
+    own, other = [], []
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        for _, my_scores, not_my_scores in user_similarity_scores(
+                    model, data_column, train, test, train['name'].unique()):
+            own.append(my_scores)
+            other.append(not_my_scores)
+
+    own, other = np.concatenate(own), np.concatenate(other)
+    return roc_auc_score(np.r_[np.ones(len(own)), np.zeros(len(other))],
+                         np.r_[own, other])
+
+def time_backend(name, tweets):
+    """ (start-up seconds, tweets/s, embeddings of <tweets>). """
+    start = time.perf_counter()
+    backend = make_backend(name)
+    startup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    embeddings = backend.embed_phrases(tweets)
+    return startup, len(tweets) / (time.perf_counter() - start), embeddings
+
+def main():
+    train, test = load_tweets_from_directory(
+                        get_config()['processed_data_path'], random_state=1)
+    tweets = list(train['tweet']) + list(test['tweet'])
+    print(f'{len(tweets)} tweets, {train["name"].nunique()} users, '
+          f'{len(test)} test tweets\n')
+    print(f'{"backend":>13} {"start-up":>9} {"tweets/s":>9} '
+          + ' '.join(f'{f"AUC k={k}":>8}' for k in CLUSTERS))
+
+    try:
+        startup, rate, _ = time_backend('use', tweets)
+        timing = f'{startup:8.1f}s {rate:9,.0f}'
+    except ImportError:
+        timing = f'{"(no TensorFlow)":>19}'
+    print(f'{"use":>13} {timing} ' + ' '.join(
+          f'{auc(train, test, "embedding", k):8.3f}' for k in CLUSTERS))
+
+    startup, rate, embeddings = time_backend('hashed_ngram', tweets)
+    train = train.assign(embedding=list(embeddings[:len(train)]))
+    test  = test.assign(embedding=list(embeddings[len(train):]))
+    print(f'{"hashed_ngram":>13} {startup:8.2f}s {rate:9,.0f} ' + ' '.join(
+          f'{auc(train, test, "embedding", k):8.3f}' for k in CLUSTERS))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cost of the embedding cache on the preprocessed tweets in
+'preprocessed_data_path': a cold run (all misses, plus writing the cache),
+a warm run (all hits) and a run with 5% new tweets.  A stub that sleeps
+1 ms per tweet stands in for the Universal Sentence Encoder, so the
+saving is only indicative; USE on CPU is typically slower than that.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                             '..', 'scripts'))
+from get_config import get_config
+from tweetvalidator.embedding_cache import EmbeddingCache
+
+EMBEDDING_DIM     = 512
+SECONDS_PER_TWEET = 0.001
+
+class StubEncoder:
+    def __init__(self):
+        self.encoded = 0
+
+    def __call__(self, phrase_list):
+        self.encoded += len(phrase_list)
+        time.sleep(SECONDS_PER_TWEET * len(phrase_list))
+        return np.ones((len(phrase_list), EMBEDDING_DIM), dtype=np.float32)
+
+def load_tweets():
+    input_directory = get_config()['preprocessed_data_path']
+    tweets = []
+    for file_name in sorted(os.listdir(input_directory)):
+        if file_name[0] == '@':
+            with open(os.path.join(input_directory, file_name), 'r') as file:
+                tweets.extend(x[0] for x in json.loads(file.read()))
+    return tweets
+
+def main():
+    tweets = load_tweets()
+    n_new = len(tweets) // 20
+    runs = [('cold', tweets),
+            ('warm', tweets),
+            ('5% new', tweets[n_new:] + [f'new tweet {i}'
+                                         for i in range(n_new)])]
+
+    print(f'{len(tweets)} tweets, {len(set(tweets))} distinct')
+    print(f'{"run":>8} {"encoded":>8} {"time (s)":>9} {"uncached (s)":>13}')
+    with tempfile.TemporaryDirectory() as directory:
+        for name, run_tweets in runs:
+            encoder = StubEncoder()
+            cache = EmbeddingCache(directory, 'stub')
+
+            start = time.perf_counter()
+            cache.embed(run_tweets, encoder)
+            elapsed = time.perf_counter() - start
+
+            print(f'{name:>8} {encoder.encoded:8} {elapsed:9.2f} '
+                  f'{SECONDS_PER_TWEET * len(run_tweets):13.2f}')
+
+if __name__ == '__main__':
+    main()
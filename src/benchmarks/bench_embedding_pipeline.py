@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Embedding throughput of the preprocessed files in 'preprocessed_data_path',
+one file at a time (read, encode, write in sequence) against the threaded
+pipeline, with per-stage utilization.  A stub spends a fixed time per tweet
+outside the GIL, as a TensorFlow session run does, in place of the Universal
+Sentence Encoder.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+from contextlib import redirect_stdout
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                             '..', 'scripts'))
+from get_config import get_config
+from tweetvalidator.embedding_store import embed_file_to_json
+from tweetvalidator.embedding_pipeline import embed_files_pipelined
+
+EMBEDDING_DIM     = 512
+SECONDS_PER_TWEET = 0.0002
+BATCH_SIZE        = 256
+
+def stub_embed_phrases(phrase_list):
+    time.sleep(SECONDS_PER_TWEET * len(phrase_list))
+    return np.ones((len(phrase_list), EMBEDDING_DIM), dtype=np.float32)
+
+def main():
+    input_directory = get_config()['preprocessed_data_path']
+    input_files = sorted(os.path.join(input_directory, f)
+                         for f in os.listdir(input_directory) if f[0] == '@')
+
+    with tempfile.TemporaryDirectory() as directory, \
+         open(os.devnull, 'w') as devnull:
+
+        start = time.perf_counter()
+        with redirect_stdout(devnull):
+            for input_file in input_files:
+                embed_file_to_json(input_file, os.path.join(
+                                       directory, os.path.basename(input_file)),
+                                   stub_embed_phrases, BATCH_SIZE,
+                                   resume=False)
+        sequential = time.perf_counter() - start
+
+        pipelined_directory = os.path.join(directory, 'pipelined')
+        os.makedirs(pipelined_directory)
+        with redirect_stdout(devnull):
+            report = embed_files_pipelined(input_files, pipelined_directory,
+                                           stub_embed_phrases, BATCH_SIZE)
+
+    print(f'{report["tweets"]} tweets in {len(input_files)} files, '
+          f'batches of {BATCH_SIZE}')
+    print(f'sequential: {sequential:6.2f} s '
+          f'({report["tweets"] / sequential:,.0f} tweets/s)')
+    print(f'pipelined:  {report["seconds"]:6.2f} s '
+          f'({report["tweets_per_second"]:,.0f} tweets/s)')
+    print(f'utilization: read {report["read"]:.0%}, '
+          f'encode {report["encode"]:.0%}, write {report["write"]:.0%}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Loading and splitting the processed data in 'processed_data_path', replicated
+to more users, once per model configuration as generate_similarity_scores.py
+does: re-reading and re-shuffling the JSON files every time against the
+persisted split over the cached columnar dataset (first run, which builds
+the cache, and later runs in a fresh process, which only read it).
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                             '..', 'scripts'))
+from get_config import get_config
+from tweetvalidator import evaluation_data
+from tweetvalidator.evaluate_model import load_tweets_from_directory
+
+COPIES = 8
+
+# Model configurations in generate_similarity_scores.py.
+CONFIGURATIONS = 6
+
+def time_loads(input_directory, dataset_cache):
+    start = time.perf_counter()
+    for _ in range(CONFIGURATIONS):
+        load_tweets_from_directory(input_directory, random_state = 1,
+                                   dataset_cache = dataset_cache)
+    return time.perf_counter() - start
+
+def main():
+    processed_directory = get_config()['processed_data_path']
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_directory = os.path.join(directory, 'processed')
+        cache_directory = os.path.join(directory, 'dataset')
+        os.makedirs(input_directory)
+        for file_name in os.listdir(processed_directory):
+            if file_name[0] != '@':
+                continue
+            for copy in range(COPIES):
+                shutil.copy(os.path.join(processed_directory, file_name),
+                            os.path.join(input_directory,
+                                         f'{file_name[:-5]}_{copy}.json'))
+
+        print(f'{len(os.listdir(input_directory))} users, {CONFIGURATIONS} '
+              f'loads\n')
+        print(f'{"method":>28} {"seconds":>8}')
+        print(f'{"JSON, split every time":>28} '
+              f'{time_loads(input_directory, None):8.2f}')
+        print(f'{"cached, first run":>28} '
+              f'{time_loads(input_directory, cache_directory):8.2f}')
+        # As a later run would, in a new process.
+        evaluation_data._loaded.clear()
+        print(f'{"cached, later run":>28} '
+              f'{time_loads(input_directory, cache_directory):8.2f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Filtering throughput on the raw tweets in 'raw_data_path', replicated to a
+larger corpus: the original implementation (re.sub with each pattern string
+per tweet, one file at a time) against filter_tweets_from_directories in one
+process and across a process pool.  Run for the configured filters and for a
+variant without the trailing-whitespace terms.  The method column says
+whether tweets no filter matches were passed through after one scan of a
+combined alternation.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                             '..', 'scripts'))
+from get_config import get_config
+from tweetvalidator.data_processing import filter_tweets_from_directories
+
+COPIES = 20
+
+def original_filter(input_directory, output_directory, filters,
+                    min_tweet_characters):
+    """ filter_tweets_from_directories as it was: serial, uncompiled. """
+    n_tweets = 0
+    for file_name in os.listdir(input_directory):
+        with open(os.path.join(input_directory, file_name), 'r') as file:
+            in_data = json.loads(file.read())
+
+        output_tweets = []
+        for tweet in in_data:
+            filtered_tweet = tweet[0]
+            for reFilter in filters:
+                filtered_tweet = re.sub(reFilter, '', filtered_tweet)
+            filtered_tweet = filtered_tweet.strip()
+            if len(filtered_tweet) >= min_tweet_characters:
+                output_tweets.append([filtered_tweet, tweet[1]])
+
+        with open(os.path.join(output_directory, file_name), 'w') as file:
+            json.dump(output_tweets, file)
+        n_tweets += len(in_data)
+    return n_tweets
+
+def main():
+    config = get_config()
+    raw_directory = config['raw_data_path']
+    min_characters = int(config['min_tweet_characters'])
+    filter_sets = {'configured'  : config['regexp_tweet_filters'],
+                   'independent' : ['http\\S+', '@\\S+', '#\\S+']}
+
+    with tempfile.TemporaryDirectory() as directory, \
+         open(os.devnull, 'w') as devnull:
+        input_directory = os.path.join(directory, 'raw')
+        output_directory = os.path.join(directory, 'out')
+        os.makedirs(input_directory)
+        os.makedirs(output_directory)
+
+        for file_name in os.listdir(raw_directory):
+            if file_name[0] != '@':
+                continue
+            for copy in range(COPIES):
+                shutil.copy(os.path.join(raw_directory, file_name),
+                            os.path.join(input_directory,
+                                         f'{file_name[:-5]}_{copy}.json'))
+
+        print(f'{len(os.listdir(input_directory))} files, {os.cpu_count()} '
+              f'CPUs\n')
+        print(f'{"filters":>12} {"method":>22} {"tweets/s":>10}')
+        for name, filters in filter_sets.items():
+            start = time.perf_counter()
+            n_tweets = original_filter(input_directory, output_directory,
+                                       filters, min_characters)
+            rate = n_tweets / (time.perf_counter() - start)
+            print(f'{name:>12} {"original":>22} {rate:10,.0f}')
+
+            for workers in [1, None]:
+                with redirect_stdout(devnull):
+                    report = filter_tweets_from_directories(
+                                input_directory, output_directory, filters,
+                                min_characters, workers=workers)
+                method = (f'{"combined" if report["combined"] else "compiled"}'
+                          f', {workers or os.cpu_count()} proc')
+                print(f'{name:>12} {method:>22} '
+                      f'{report["tweets_per_second"]:10,.0f}')
+
+if __name__ == '__main__':
+    main()
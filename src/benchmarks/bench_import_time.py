@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Import time of each script's tweetvalidator imports, measured in a fresh
+interpreter with `python -X importtime` (best of a few runs) and checked
+against a budget.  Also lists which heavy dependencies each one loaded;
+TensorFlow, tweepy and scikit-learn should only load when an encoder,
+downloader or model is actually built, not on import.
+
+Exits with status 1 if any entry point is over its budget or fails to
+import.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import sys
+import subprocess
+
+SOURCE_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..')
+
+RUNS = 3
+
+# Script -> (its tweetvalidator imports, budget in ms).
+ENTRY_POINTS = {
+    'filter_raw_data.py' :
+        ('from tweetvalidator.data_processing import '
+         'filter_tweets_from_directories', 50),
+    'retrieve_users_from_twitter.py' :
+        ('from tweetvalidator.data_processing import get_tweets_by_user', 50),
+    'embed_preprocessed_data.py' :
+        ('from tweetvalidator.data_processing import '
+         'embed_tweets_from_directories\n'
+         'from tweetvalidator.embedding_backends import BACKENDS, '
+         'make_backend', 1000),
+    'convert_processed_data.py' :
+        ('from tweetvalidator.embedding_store import '
+         'convert_directory_to_store', 1000),
+    'generate_similarity_scores.py' :
+        ('from tweetvalidator.models import TFIDFModel, ClusteredCosSimModel\n'
+         'from tweetvalidator import generate_similarity_scores_parallel, '
+         'CharacterizationCache', 1500),
+    'characterize_users.py' :
+        ('from tweetvalidator.models import TFIDFModel, '
+         'ClusteredCosSimModel, ModelRegistry\n'
+         'from tweetvalidator.evaluate_model import load_tweets', 1500),
+    'analyze_similarity_scores.py' :
+        ('from tweetvalidator.analysis import analyze_scores', 1000),
+    'run_validation_service.py' :
+        ('from tweetvalidator.models import ModelRegistry\n'
+         'from tweetvalidator.embedding_backends import BACKENDS, '
+         'make_backend\n'
+         'from tweetvalidator.service import run_service', 1000),
+}
+
+HEAVY_MODULES = ['tensorflow', 'tensorflow_hub', 'tweepy', 'sklearn',
+                 'scipy', 'pandas']
+
+def import_profile(statement):
+    """ Runs <statement> under -X importtime.
+
+    Returns:
+    tuple: ({top-level module : cumulative import microseconds}, set of
+        every module imported), or None if the statement failed.
+    """
+    env = dict(os.environ, PYTHONPATH=SOURCE_PATH)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                             statement], env=env, stderr=subprocess.PIPE)
+    if result.returncode:
+        return None
+
+    top_level, modules = {}, set()
+    for line in result.stderr.decode().splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        modules.add(name.strip())
+        # Nested imports are indented under the module that imported them.
+        if not name[1:].startswith(' '):
+            top_level[name.strip()] = int(cumulative)
+    return top_level, modules
+
+def main():
+    # Modules the interpreter imports at start-up anyway.
+    startup = set(import_profile('pass')[0])
+
+    over_budget = []
+    print(f'{"entry point":>31} {"ms":>7} {"budget":>7}  heavy modules')
+    for script, (statement, budget_ms) in ENTRY_POINTS.items():
+        best, modules = None, set()
+        for _ in range(RUNS):
+            profile = import_profile(statement)
+            if profile is None:
+                break
+            top_level, modules = profile
+            ms = sum(us for name, us in top_level.items()
+                     if name not in startup) / 1000
+            best = ms if best is None else min(best, ms)
+
+        if best is None:
+            print(f'{script:>31} {"import failed":>15}')
+            over_budget.append(script)
+            continue
+
+        heavy = [name for name in HEAVY_MODULES if name in modules]
+        flag = '' if best <= budget_ms else '  OVER BUDGET'
+        print(f'{script:>31} {best:7.1f} {budget_ms:7}  '
+              f'{", ".join(heavy) or "-"}{flag}')
+        if flag:
+            over_budget.append(script)
+
+    if over_budget:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Throughput (tweets/sec) of scoring a stream of tweets interleaved across many
+users, taken in batches of several sizes: one infer call per tweet, one call
+per user in the batch (the Model default of infer_many) and the batched
+infer_many.  Small batches, where most users have one or two tweets, are the
+online validation case.
+
+Embedding models are ClusteredCosSimModels with 1-3 clusters characterized
+on random unit vectors; TFIDF models view a multi-user TFIDFEngine fitted on
+the preprocessed tweets in 'preprocessed_data_path', with synthetic user ids.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import sys
+import json
+import timeit
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                             '..', 'scripts'))
+from get_config import get_config
+from tweetvalidator.models import ClusteredCosSimModel, TFIDFModel, TFIDFEngine
+from tweetvalidator.models.base_model import Model
+
+EMBEDDING_DIM    = 512
+N_USERS          = 1000
+TWEETS_PER_USER  = 20
+N_TWEETS         = 20000
+BATCH_SIZES      = [64, 1024, 20000]
+N_TFIDF_USERS    = 200
+
+def random_unit_vectors(n, rng):
+    vectors = rng.standard_normal((n, EMBEDDING_DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1)[:, None]
+
+def per_tweet(models, user_ids, inputs):
+    return np.array([models[user].infer(inputs[row:row + 1])[0]
+                     for row, user in enumerate(user_ids)])
+
+def per_user(model_class, models, user_ids, inputs):
+    """ The Model default: one similarity_score call per user. """
+    users, inverse = np.unique(user_ids, return_inverse=True)
+    return Model._score_many.__func__(model_class,
+                                      [models[user] for user in users],
+                                      inverse, inputs)
+
+def in_batches(function, batch_size, user_ids, inputs):
+    """ Returns a callable running <function> over consecutive batches. """
+    def run():
+        for start in range(0, len(user_ids), batch_size):
+            function(user_ids[start:start + batch_size],
+                     inputs[start:start + batch_size])
+    return run
+
+def throughput(function, n, repeat=3):
+    return n / min(timeit.repeat(function, number=1, repeat=repeat))
+
+def report(name, models, user_ids, inputs):
+    model_class = type(next(iter(models.values())))
+
+    batched = model_class.infer_many(models, user_ids, inputs)
+    assert np.allclose(batched[0], per_user(model_class, models, user_ids,
+                                            inputs), atol=1e-5)
+
+    # Per-tweet calls are slow and batch-independent; time a sample.
+    n_sample = 2000
+    per_tweet_rate = throughput(lambda: per_tweet(models,
+                                                  user_ids[:n_sample],
+                                                  inputs[:n_sample]),
+                                n_sample)
+
+    for batch_size in BATCH_SIZES:
+        rates = [per_tweet_rate,
+                 throughput(in_batches(
+                    lambda u, x: per_user(model_class, models, u, x),
+                    batch_size, user_ids, inputs), len(user_ids)),
+                 throughput(in_batches(
+                    lambda u, x: model_class.infer_many(models, u, x),
+                    batch_size, user_ids, inputs), len(user_ids))]
+
+        print(f'{name:>10} {len(models):6} {batch_size:6} '
+              + ' '.join(f'{rate:12,.0f}' for rate in rates))
+
+def load_tweets():
+    input_directory = get_config()['preprocessed_data_path']
+    tweets = []
+    for file_name in sorted(os.listdir(input_directory)):
+        if file_name[0] == '@':
+            with open(os.path.join(input_directory, file_name), 'r') as file:
+                tweets.extend(x[0] for x in json.loads(file.read()))
+    return np.array(tweets, dtype=object)
+
+def main():
+    rng = np.random.RandomState(0)
+
+    print(f'{"model":>10} {"users":>6} {"batch":>6} {"per tweet/s":>12} '
+          f'{"per user/s":>12} {"batched/s":>12}')
+
+    models = {}
+    for user_idx in range(N_USERS):
+        model = ClusteredCosSimModel(max_clusters=1 + user_idx % 3)
+        model.characterize(random_unit_vectors(TWEETS_PER_USER, rng), None)
+        models[f'@user{user_idx}'] = model
+
+    user_ids = np.array(list(models))[rng.randint(N_USERS, size=N_TWEETS)]
+    report('embedding', models, user_ids,
+           random_unit_vectors(N_TWEETS, rng))
+
+    tweets = load_tweets()
+    tweet_users = np.array([f'@user{i}' for i in range(N_TFIDF_USERS)]
+                           )[rng.randint(N_TFIDF_USERS, size=len(tweets))]
+    engine = TFIDFEngine().fit(tweets, tweet_users)
+    models = {user : TFIDFModel.from_engine(engine, user)
+              for user in engine.owners}
+
+    sample = rng.randint(len(tweets), size=N_TWEETS)
+    report('tfidf', models, tweet_users[sample], tweets[sample])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Similarity score output in 'eval_output_path' as JSON against the binary
+score store: size on disk, and time to read every model's aggregate and
+per-user scores as analyze_similarity_scores.py does (pd.read_json for JSON,
+memory-mapping for the store).  Works on a converted copy, so the original
+directory is untouched.  Also times aggregating many users' scores with the
+np.concatenate-per-user loop generate_similarity_scores used to run.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from contextlib import redirect_stdout
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                             '..', 'scripts'))
+from get_config import get_config
+from tweetvalidator.score_store import (ScoreStore, convert_eval_directory,
+                                        write_score_store)
+
+# Synthetic users and scores per user for the aggregation timing.
+USERS = 500
+SCORES_PER_USER = (100, 5000)
+
+def directory_bytes(directory_path):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(directory_path)
+               for name in names)
+
+def read_json(eval_directory):
+    n_scores = 0
+    for model in os.listdir(eval_directory):
+        model_directory = os.path.join(eval_directory, model)
+        for user in [''] + [x for x in os.listdir(model_directory)
+                            if '.' not in x]:
+            in_dir = os.path.join(model_directory, user)
+            for file_name in ['own.json', 'other.json']:
+                n_scores += len(pd.read_json(os.path.join(in_dir,
+                                                          file_name))[0])
+    return n_scores
+
+def read_store(eval_directory):
+    n_scores = 0
+    for model in os.listdir(eval_directory):
+        store = ScoreStore(os.path.join(eval_directory, model))
+        # Summed, so the memory-mapped scores are actually read.
+        n_scores += len(store.own) + len(store.other)
+        total = np.sum(store.own) + np.sum(store.other)
+        for user in store.users:
+            own, other = store.user_scores(user)
+            n_scores += len(own) + len(other)
+            total += np.sum(own) + np.sum(other)
+    return n_scores
+
+def main():
+    eval_directory = get_config()['eval_output_path']
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_directory = os.path.join(directory, 'json')
+        store_directory = os.path.join(directory, 'store')
+        shutil.copytree(eval_directory, json_directory)
+        shutil.copytree(eval_directory, store_directory)
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            convert_eval_directory(store_directory, remove_json = True)
+
+        print(f'{"format":>8} {"MB":>7} {"read s":>7} {"scores":>10}')
+        for name, path, read in [('JSON', json_directory, read_json),
+                                 ('store', store_directory, read_store)]:
+            start = time.perf_counter()
+            n_scores = read(path)
+            seconds = time.perf_counter() - start
+            print(f'{name:>8} {directory_bytes(path) / 2**20:7.1f} '
+                  f'{seconds:7.2f} {n_scores:10,}')
+
+        random = np.random.RandomState(0)
+        user_scores = [(f'@{i}', random.rand(SCORES_PER_USER[0]),
+                        random.rand(SCORES_PER_USER[1]))
+                       for i in range(USERS)]
+
+        start = time.perf_counter()
+        scores_own, scores_other = [], []
+        for _, own, other in user_scores:
+            scores_own   = np.concatenate((scores_own,   own))
+            scores_other = np.concatenate((scores_other, other))
+        concat_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        write_score_store(os.path.join(directory, 'synthetic'), user_scores)
+        store_seconds = time.perf_counter() - start
+
+        print(f'\nAggregating {USERS} users: concatenate per user '
+              f'{concat_seconds:.2f}s, write_score_store (incl. writing) '
+              f'{store_seconds:.2f}s')
+
+if __name__ == '__main__':
+    main()
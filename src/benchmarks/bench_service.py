@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Load test of the validation service with and without micro-batching.
+
+A stub encoder stands in for the Universal Sentence Encoder with a similar
+cost shape: a fixed per-call overhead plus a small per-tweet cost, spent
+outside the GIL as a TensorFlow session run would be.  Many concurrent
+keep-alive clients send requests for 1000 users, and the service's /stats
+report throughput and p50/p99 latency.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import json
+import time
+import asyncio
+import tempfile
+import numpy as np
+
+from tweetvalidator.models import ClusteredCosSimModel, ModelRegistry
+from tweetvalidator.service import ValidationService
+
+EMBEDDING_DIM      = 512
+N_USERS            = 1000
+N_CLIENTS          = 64
+REQUESTS_PER_CLIENT = 50
+CALL_OVERHEAD_S    = 0.005
+PER_TWEET_S        = 0.00005
+SETTINGS           = [(1, 0), (16, 2), (64, 5)]
+
+class StubEncoder:
+    def __init__(self):
+        self.rng = np.random.RandomState(0)
+
+    def embed_phrases(self, phrase_list):
+        time.sleep(CALL_OVERHEAD_S + PER_TWEET_S * len(phrase_list))
+        vectors = self.rng.standard_normal((len(phrase_list), EMBEDDING_DIM))
+        return (vectors / np.linalg.norm(vectors, axis=1)[:, None]
+                ).astype(np.float32)
+
+async def client(port, users, n_requests):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for i in range(n_requests):
+        body = json.dumps({'user'  : users[i % len(users)],
+                           'tweet' : f'tweet number {i}'}).encode('utf-8')
+        writer.write(b'POST /validate HTTP/1.1\r\nHost: bench\r\n'
+                     + f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1')
+                     + body)
+        await writer.drain()
+
+        headers = await reader.readuntil(b'\r\n\r\n')
+        length = int([line for line in headers.split(b'\r\n')
+                      if line.lower().startswith(b'content-length')][0]
+                     .split(b':')[1])
+        await reader.readexactly(length)
+    writer.close()
+
+async def load_test(service, rng):
+    server = await service.start(port=0)
+    port = server.sockets[0].getsockname()[1]
+    users = service.registry.users()
+
+    await asyncio.gather(*[
+            client(port, list(rng.choice(users, 10)), REQUESTS_PER_CLIENT)
+            for _ in range(N_CLIENTS)])
+
+    summary = service.stats.summary()
+    await service.stop()
+    return summary
+
+def main():
+    rng = np.random.RandomState(0)
+    encoder = StubEncoder()
+
+    with tempfile.TemporaryDirectory() as directory:
+        registry = ModelRegistry(directory)
+        for user_idx in range(N_USERS):
+            model = ClusteredCosSimModel(max_clusters=2)
+            model.characterize(encoder.rng.standard_normal(
+                                        (20, EMBEDDING_DIM)), None)
+            registry.save(f'@user{user_idx}', model)
+
+        print(f'{"max batch":>9} {"max wait":>9} {"req/s":>8} {"p50 ms":>7} '
+              f'{"p99 ms":>7} {"mean batch":>10}')
+        for max_batch_size, max_wait_ms in SETTINGS:
+            service = ValidationService(encoder, registry, max_batch_size,
+                                        max_wait_ms)
+
+            loop = asyncio.new_event_loop()
+            summary = loop.run_until_complete(load_test(service, rng))
+            loop.close()
+
+            print(f'{max_batch_size:9} {max_wait_ms:9} '
+                  f'{summary["throughput"]:8,.0f} {summary["p50_ms"]:7.1f} '
+                  f'{summary["p99_ms"]:7.1f} {summary["mean_batch_size"]:10.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks tweetvalidator's SphericalKMeans.
+
+1. Fit time against corpus size and cluster count for the full-batch and
+   mini-batch modes, on synthetic clustered unit vectors.
+2. Inertia on each user in 'processed_data_path' (or 'embedding_store_path'
+   if it exists) for full-batch, mini-batch and warm-start fits, and for the
+   spherecluster package if it happens to be installed.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                             '..', 'scripts'))
+from get_config import get_config
+from tweetvalidator.evaluate_model import (load_tweets_from_directory,
+                                           stack_embeddings)
+from tweetvalidator.models.spherical_kmeans import (SphericalKMeans,
+                                                    normalize_rows)
+
+EMBEDDING_DIM = 512
+CORPUS_SIZES  = [1000, 10000, 100000]
+CLUSTER_COUNTS = [1, 2, 4, 8]
+MINIBATCH_SIZE = 2048
+
+def synthetic_corpus(n, n_true_clusters, rng):
+    """ Unit vectors scattered around <n_true_clusters> random directions. """
+    centers = normalize_rows(rng.standard_normal((n_true_clusters,
+                                                  EMBEDDING_DIM)))
+    labels = rng.randint(n_true_clusters, size=n)
+    noise = 0.05 * rng.standard_normal((n, EMBEDDING_DIM))
+    return normalize_rows(centers[labels] + noise).astype(np.float32)
+
+def time_fit(kmeans, X):
+    start = time.perf_counter()
+    kmeans.fit(X)
+    return time.perf_counter() - start
+
+def benchmark_fit_time():
+    rng = np.random.RandomState(0)
+    print('Fit time (s)')
+    print(f'{"tweets":>8} {"clusters":>8} {"full":>8} {"minibatch":>10}')
+    for n in CORPUS_SIZES:
+        X = synthetic_corpus(n, 8, rng)
+        for k in CLUSTER_COUNTS:
+            full = time_fit(SphericalKMeans(n_clusters=k, random_state=0), X)
+            mini = time_fit(SphericalKMeans(n_clusters=k, random_state=0,
+                                            batch_size=MINIBATCH_SIZE), X)
+            print(f'{n:8} {k:8} {full:8.3f} {mini:10.3f}')
+
+def benchmark_inertia(n_clusters=2):
+    try:
+        from spherecluster import SphericalKMeans as ReferenceKMeans
+    except ImportError:
+        ReferenceKMeans = None
+
+    config = get_config()
+    input_directory = config['processed_data_path']
+    if os.path.isdir(config.get('embedding_store_path', '')):
+        input_directory = config['embedding_store_path']
+
+    train_data, _ = load_tweets_from_directory(input_directory, random_state=1)
+
+    print(f'\nInertia by user ({n_clusters} clusters; lower is better)')
+    print(f'{"user":>18} {"spherecluster":>14} {"full":>8} {"minibatch":>10}'
+          f' {"warm":>8}')
+    for user in train_data['name'].unique():
+        X = stack_embeddings(
+                    train_data[train_data['name']==user]['embedding'])
+
+        reference = ReferenceKMeans(n_clusters=n_clusters,
+                                    random_state=0).fit(X).inertia_ \
+                    if ReferenceKMeans else float('nan')
+
+        full = SphericalKMeans(n_clusters=n_clusters, random_state=0).fit(X)
+        mini = SphericalKMeans(n_clusters=n_clusters, random_state=0,
+                               batch_size=MINIBATCH_SIZE // 8).fit(X)
+
+        # Warm start from a fit on 90% of the tweets, as after new arrivals.
+        old = SphericalKMeans(n_clusters=n_clusters,
+                              random_state=0).fit(X[:int(0.9 * len(X))])
+        warm = SphericalKMeans(n_clusters=n_clusters,
+                               init=old.cluster_centers_).fit(X)
+
+        print(f'{user:>18} {reference:14.2f} {full.inertia_:8.2f} '
+              f'{mini.inertia_:10.2f} {warm.inertia_:8.2f} '
+              f'({full.n_iter_} vs {warm.n_iter_} iterations warm)')
+
+if __name__ == '__main__':
+    benchmark_fit_time()
+    benchmark_inertia()
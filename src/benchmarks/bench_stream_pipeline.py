@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Raw tweets in 'raw_data_path' to similarity scores, staged as the scripts run
+it (filter files, embed files, load and score) against the streaming
+pipeline, with and without its intermediate side outputs.  Reports wall time
+and bytes written for each.  Uses the hashed n-gram backend, so the run
+doesn't need TensorFlow; each user's model is characterized on their first
+tweets beforehand and isn't timed.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import numpy as np
+from contextlib import redirect_stdout
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                             '..', 'scripts'))
+from get_config import get_config
+from tweetvalidator.data_processing import (filter_tweets_from_directories,
+                                            embed_tweets_from_directories)
+from tweetvalidator.embedding_backends import HashedNgramEncoder
+from tweetvalidator.embedding_store import iter_json_array
+from tweetvalidator.evaluate_model import load_tweets
+from tweetvalidator.models import ClusteredCosSimModel
+from tweetvalidator.pipeline import (raw_file_source, stream_pipeline,
+                                     write_scores)
+
+# Tweets per user each model is characterized on.
+CHARACTERIZE_TWEETS = 200
+
+def directory_bytes(directory_path):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(directory_path)
+               for name in names)
+
+def characterize(raw_directory, encoder):
+    models = {}
+    for file_name in sorted(os.listdir(raw_directory)):
+        if file_name[0] != '@':
+            continue
+        tweets = [tweet[0] for tweet in
+                  iter_json_array(os.path.join(raw_directory, file_name))]
+        model = ClusteredCosSimModel()
+        model.characterize(
+                encoder.embed_phrases(tweets[:CHARACTERIZE_TWEETS]), None)
+        models[file_name.split('.')[0]] = model
+    return models
+
+def staged(directory, config, encoder, models):
+    """ filter_raw_data.py, embed_preprocessed_data.py, then scoring. """
+    preprocessed = os.path.join(directory, 'preprocessed')
+    processed = os.path.join(directory, 'processed')
+    os.makedirs(preprocessed)
+    os.makedirs(processed)
+
+    filter_tweets_from_directories(config['raw_data_path'], preprocessed,
+                                   config['regexp_tweet_filters'],
+                                   int(config['min_tweet_characters']),
+                                   workers = 1)
+    embed_tweets_from_directories(preprocessed, processed, encoder = encoder)
+
+    data = load_tweets(processed)
+    scores, flags = ClusteredCosSimModel.infer_many(
+                        models, data['name'].values,
+                        np.stack(data['embedding'].values))
+    with open(os.path.join(directory, 'scores.jsonl'), 'w') as file:
+        for name, tweet, date, score, flag in zip(
+                data['name'], data['tweet'], data['date'], scores, flags):
+            file.write(json.dumps({'name' : name, 'tweet' : tweet,
+                                   'date' : date, 'score' : float(score),
+                                   'fraudulent' : bool(flag)}) + '\n')
+    return len(data)
+
+def streamed(directory, config, encoder, models, intermediate):
+    preprocessed, processed = None, None
+    if intermediate:
+        preprocessed = os.path.join(directory, 'preprocessed')
+        processed = os.path.join(directory, 'processed')
+        os.makedirs(preprocessed)
+        os.makedirs(processed)
+
+    batches = stream_pipeline(raw_file_source(config['raw_data_path']),
+                              config['regexp_tweet_filters'],
+                              int(config['min_tweet_characters']),
+                              encoder = encoder, models = models,
+                              preprocessed_directory = preprocessed,
+                              processed_directory = processed)
+    return write_scores(batches,
+                        os.path.join(directory, 'scores.jsonl'))['tweets']
+
+def main():
+    config = get_config()
+    encoder = HashedNgramEncoder()
+    models = characterize(config['raw_data_path'], encoder)
+
+    runs = {'staged'                  : lambda d: staged(d, config, encoder,
+                                                         models),
+            'streamed'                : lambda d: streamed(d, config, encoder,
+                                                           models, False),
+            'streamed + side outputs' : lambda d: streamed(d, config, encoder,
+                                                           models, True)}
+
+    print(f'{len(models)} users, {os.cpu_count()} CPUs\n')
+    print(f'{"method":>24} {"tweets":>7} {"seconds":>8} {"MB written":>11}')
+    with open(os.devnull, 'w') as devnull:
+        for name, run in runs.items():
+            with tempfile.TemporaryDirectory() as directory:
+                start = time.perf_counter()
+                with redirect_stdout(devnull):
+                    n_tweets = run(directory)
+                seconds = time.perf_counter() - start
+                megabytes = directory_bytes(directory) / 2**20
+                print(f'{name:>24} {n_tweets:7} {seconds:8.2f} '
+                      f'{megabytes:11.1f}')
+
+if __name__ == '__main__':
+    main()
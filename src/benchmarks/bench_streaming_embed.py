@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Peak Python memory (tracemalloc) of embedding a 20k-tweet user file all at once,
+as embed_tweets_from_file did, against streaming it in batches into JSON or
+the binary store.  A random-vector stub stands in for the sentence encoder
+so only the data handling is measured.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import json
+import time
+import tempfile
+import tracemalloc
+import numpy as np
+import pandas as pd
+from contextlib import redirect_stdout
+from tweetvalidator.embedding_store import (embed_file_to_json,
+                                            embed_file_to_store)
+
+N_TWEETS      = 20000
+EMBEDDING_DIM = 512
+BATCH_SIZE    = 1024
+
+def stub_embed_phrases(phrase_list):
+    return np.random.RandomState(len(phrase_list)).standard_normal(
+                        (len(phrase_list), EMBEDDING_DIM)).astype(np.float32)
+
+def embed_all_at_once(input_file_path, output_file_path):
+    """ The previous embed_tweets_from_file, with the stub encoder. """
+    with open(input_file_path, 'r') as file:
+        in_data =  json.loads(file.read())
+    data = pd.DataFrame(in_data, columns=['tweet','date'])
+    data['embeddings'] = stub_embed_phrases(data['tweet'].values).tolist()
+    with open(output_file_path, 'w') as file:
+        file.write(data.to_json(orient='values'))
+
+def measure(function, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    # Without the per-batch progress messages.
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        function(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2**20, elapsed
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        input_file_path = os.path.join(directory, '@bench.json')
+        with open(input_file_path, 'w') as file:
+            json.dump([[f'tweet number {i} about something or other',
+                        '2019-07-03 01:18:48'] for i in range(N_TWEETS)], file)
+
+        runs = [('all at once (json)', embed_all_at_once,
+                 os.path.join(directory, 'once.json')),
+                ('streamed (json)', embed_file_to_json,
+                 os.path.join(directory, 'streamed.json')),
+                ('streamed (store)', embed_file_to_store, directory)]
+
+        print(f'{N_TWEETS} tweets, batches of {BATCH_SIZE}')
+        print(f'{"mode":>20} {"peak MB":>8} {"time (s)":>9}')
+        for name, function, output in runs:
+            args = (input_file_path, output)
+            if function is not embed_all_at_once:
+                args += (stub_embed_phrases, BATCH_SIZE)
+            peak, elapsed = measure(function, *args)
+            print(f'{name:>20} {peak:8.1f} {elapsed:9.2f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compares TFIDFModel's exact-vocabulary mode with feature hashing at several
+bucket counts: overall ROC AUC on the users in 'processed_data_path' (or
+'embedding_store_path' if it exists), and the mean memory held by one user's
+characterization (sparse vector plus vocabulary).
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import sys
+import io
+import contextlib
+import numpy as np
+from sklearn.metrics import roc_auc_score
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                             '..', 'scripts'))
+from get_config import get_config
+from tweetvalidator.evaluate_model import (load_tweets_from_directory,
+                                           user_similarity_scores)
+from tweetvalidator.models import TFIDFModel
+
+N_FEATURES = [None, 2**10, 2**14, 2**18]
+
+def characterization_bytes(model):
+    """ Sparse characterization plus (if any) vocabulary strings. """
+    row = model.engine.characterization(model.owner)
+    size = row.data.nbytes + row.indices.nbytes + row.indptr.nbytes
+    if model.feature_names is not None:
+        size += sum(sys.getsizeof(term) for term in model.feature_names)
+    return size
+
+def main():
+    config = get_config()
+    input_directory = config['processed_data_path']
+    if os.path.isdir(config.get('embedding_store_path', '')):
+        input_directory = config['embedding_store_path']
+
+    train_data, test_data = load_tweets_from_directory(input_directory,
+                                                       random_state = 1)
+    users = train_data['name'].unique()
+
+    print(f'{"mode":>6} {"buckets":>8} {"AUC":>6} {"bytes/user":>11}')
+    for use_context in [False, True]:
+        for n_features in N_FEATURES:
+            model = TFIDFModel(use_context=use_context, n_features=n_features)
+
+            own, other, sizes = [], [], []
+            # Quiet the per-user progress messages.
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _, my_scores, not_my_scores in user_similarity_scores(
+                                model, 'tweet', train_data, test_data, users):
+                    own.append(my_scores)
+                    other.append(not_my_scores)
+                    sizes.append(characterization_bytes(model))
+
+            own, other = np.concatenate(own), np.concatenate(other)
+            auc = roc_auc_score(
+                    np.concatenate([np.ones(len(own)), np.zeros(len(other))]),
+                    np.concatenate([own, other]))
+
+            mode = 'TFIDF' if use_context else 'TF'
+            buckets = n_features if n_features else 'exact'
+            print(f'{mode:>6} {buckets:>8} {auc:6.3f} {np.mean(sizes):11.0f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Latency of TFIDFModel.similarity_score for 1-tweet and 1000-tweet calls, in
+TF and TFIDF modes, against the previous approach of building a fresh
+TfidfVectorizer(vocabulary=...) on every call.  Uses the preprocessed tweets
+in 'preprocessed_data_path'.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import sys
+import json
+import timeit
+import warnings
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                             '..', 'scripts'))
+from get_config import get_config
+from tweetvalidator.models import TFIDFModel
+
+BATCH_SIZES = [1, 1000]
+
+def rebuild_per_call_score(model, tweets):
+    """ The per-call vectorizer construction this replaces. """
+    vectorizer = TfidfVectorizer(stop_words='english', use_idf=False,
+                                 vocabulary = model.feature_names)
+    return vectorizer.fit_transform(tweets).dot(model.word_freq_vec)
+
+def load_tweets():
+    input_directory = get_config()['preprocessed_data_path']
+    tweets = []
+    for file_name in sorted(os.listdir(input_directory)):
+        if file_name[0] == '@':
+            with open(os.path.join(input_directory, file_name), 'r') as file:
+                tweets.append([x[0] for x in json.loads(file.read())])
+    return tweets
+
+def best_time(function, repeat):
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+def main():
+    # Rebuilding from feature_names warns about non-lowercase terms.
+    warnings.simplefilter('ignore', UserWarning)
+
+    users = load_tweets()
+    user_tweets = users[0]
+    context_tweets = [t for other in users[1:] for t in other]
+    all_tweets = np.array([t for user in users for t in user])
+
+    print(f'{"mode":>6} {"tweets":>7} {"rebuild (ms)":>13} {"compiled (ms)":>14}'
+          f' {"speedup":>8}')
+    for use_context in [False, True]:
+        model = TFIDFModel(use_context=use_context)
+        model.characterize(user_tweets, context_tweets)
+
+        for n in BATCH_SIZES:
+            tweets = all_tweets[np.arange(n) % len(all_tweets)]
+
+            assert np.allclose(rebuild_per_call_score(model, tweets),
+                               model.similarity_score(tweets))
+
+            repeat = 200 if n == 1 else 10
+            rebuild  = best_time(lambda: rebuild_per_call_score(model, tweets),
+                                 repeat)
+            compiled = best_time(lambda: model.similarity_score(tweets),
+                                 repeat)
+
+            mode = 'TFIDF' if use_context else 'TF'
+            print(f'{mode:>6} {n:7} {1000 * rebuild:13.3f} '
+                  f'{1000 * compiled:14.3f} {rebuild / compiled:7.1f}x')
+
+if __name__ == '__main__':
+    main()
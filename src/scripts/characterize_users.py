@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Characterizes every user in 'processed_data_path' (or 'embedding_store_path'
+if it exists) on all of their tweets and saves the models to the registry in
+'model_registry_path', ready to be loaded for validation without
+re-characterizing.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import argparse
+from get_config import (get_config, create_dir_if_not_there)
+config = get_config()
+create_dir_if_not_there(config['model_registry_path'])
+
+from tweetvalidator.models import (TFIDFModel, ClusteredCosSimModel,
+                                   ModelRegistry)
+from tweetvalidator.evaluate_model import load_tweets
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('--model', choices=['embedding', 'tfidf', 'tf'],
+                    default='embedding',
+                    help='Model to characterize (default: embedding).')
+parser.add_argument('--clusters', type=int, default=2,
+                    help='Clusters for the embedding model (default: 2).')
+args = parser.parse_args()
+
+input_directory = config['processed_data_path']
+if os.path.isdir(config['embedding_store_path']):
+    input_directory = config['embedding_store_path']
+
+data = load_tweets(input_directory)
+registry = ModelRegistry(config['model_registry_path'])
+
+if args.model == 'embedding':
+    model, data_column = ClusteredCosSimModel(max_clusters=args.clusters), \
+                         'embedding'
+else:
+    model, data_column = TFIDFModel(use_context=args.model=='tfidf'), 'tweet'
+
+for user in data['name'].unique():
+    print(f'Characterizing {user}.')
+    model.characterize(data[data['name'] == user][data_column],
+                       data[data['name'] != user][data_column])
+    registry.save(user, model)
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Converts the JSON user files in 'processed_data_path' into the binary
+embedding store format in 'embedding_store_path'.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+from get_config import (get_config, create_dir_if_not_there)
+from tweetvalidator.embedding_store import convert_directory_to_store
+
+config = get_config()
+create_dir_if_not_there(config['embedding_store_path'])
+
+convert_directory_to_store(config['processed_data_path'],
+                           config['embedding_store_path'])
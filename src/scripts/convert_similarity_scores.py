@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Converts the JSON similarity scores (own.json/other.json per user) in each
+model configuration directory of 'eval_output_path' into the binary score
+store format that generate_similarity_scores.py now writes.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import argparse
+from get_config import get_config
+from tweetvalidator.score_store import convert_eval_directory
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('--remove-json', action='store_true',
+                    help='Delete the JSON score files once converted.')
+args = parser.parse_args()
+
+config = get_config()
+
+convert_eval_directory(config['eval_output_path'],
+                       remove_json = args.remove_json)
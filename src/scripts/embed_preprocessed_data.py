@@ -8,12 +8,49 @@ June, 2019
 @author: Joshua Rubin
 """
 
+import argparse
 from get_config import (get_config, create_dir_if_not_there)
 from tweetvalidator.data_processing import embed_tweets_from_directories
+from tweetvalidator.embedding_backends import BACKENDS, make_backend
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('--batch-size', type=int, default=1024,
+                    help='Tweets embedded per encoder call; output is written '
+                         'as each batch finishes, and interrupted runs '
+                         'resume (default: 1024).  0 embeds each file at '
+                         'once.')
+parser.add_argument('--store', action='store_true',
+                    help="Write a binary embedding store to "
+                         "'embedding_store_path' instead of JSON files.")
+parser.add_argument('--no-cache', action='store_true',
+                    help="Encode every tweet rather than reusing embeddings "
+                         "cached in 'embedding_cache_path'.")
+parser.add_argument('--pipeline', action='store_true',
+                    help='Read, encode and write files concurrently and '
+                         'report the utilization of each stage.')
+parser.add_argument('--intra-op-threads', type=int, default=None,
+                    help='TensorFlow threads within an op (default: auto).')
+parser.add_argument('--inter-op-threads', type=int, default=None,
+                    help='TensorFlow threads across ops (default: auto).')
+parser.add_argument('--backend', choices=sorted(BACKENDS), default=None,
+                    help="Embedding backend; 'hashed_ngram' is a fast local "
+                         "encoder needing no TensorFlow or downloads "
+                         "(default: 'embedding_backend' in the config).")
+args = parser.parse_args()
 
 config = get_config()
-create_dir_if_not_there(config['processed_data_path'])
+backend = args.backend or config.get('embedding_backend', 'use')
+output_key = 'embedding_store_path' if args.store else 'processed_data_path'
+create_dir_if_not_there(config[output_key])
 
 embed_tweets_from_directories(config['preprocessed_data_path'], 
-                              config['processed_data_path'])
-                              
\ No newline at end of file
+                              config[output_key],
+                              batch_size = args.batch_size or None,
+                              store = args.store,
+                              cache_directory = (None if args.no_cache else
+                                                 config['embedding_cache_path']),
+                              pipelined = args.pipeline,
+                              intra_op_threads = args.intra_op_threads,
+                              inter_op_threads = args.inter_op_threads,
+                              encoder = (None if backend == 'use' else
+                                         make_backend(backend)))
@@ -8,15 +8,26 @@ June, 2019
 @author: Joshua Rubin
 """
 
+import argparse
 from get_config import (get_config, create_dir_if_not_there)
 from tweetvalidator.data_processing import filter_tweets_from_directories
 
-# Pull-in filter settings from global configuration.    
-config = get_config()
+# Worker processes re-import this module under the spawn and forkserver
+# start methods, so only filter when run as a script.
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processes to filter files with (default: one '
+                             'per CPU).')
+    args = parser.parse_args()
 
-create_dir_if_not_there(config['preprocessed_data_path'])
+    # Pull-in filter settings from global configuration.
+    config = get_config()
 
-filter_tweets_from_directories(config['raw_data_path'],
-                               config['preprocessed_data_path'],
-                               config['regexp_tweet_filters'],
-                                int(config['min_tweet_characters'])    )
+    create_dir_if_not_there(config['preprocessed_data_path'])
+
+    filter_tweets_from_directories(config['raw_data_path'],
+                                   config['preprocessed_data_path'],
+                                   config['regexp_tweet_filters'],
+                                   int(config['min_tweet_characters']),
+                                   workers = args.workers)
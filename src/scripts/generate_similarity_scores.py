@@ -2,52 +2,125 @@
 # -*- coding: utf-8 -*-
 """
 Generates similarity scores for a variety of models and configurations.
+With --folds, cross-validates them instead and reports AUC mean and
+standard deviation over the folds.
 
 June, 2019
 @author: Joshua Rubin
 """
 
+import os
+import argparse
 from get_config import (get_config, create_dir_if_not_there)
-config = get_config()
-create_dir_if_not_there(config['eval_output_path'])
-
 from tweetvalidator.models import TFIDFModel
 from tweetvalidator.models import ClusteredCosSimModel
-from tweetvalidator import generate_similarity_scores
-
-dir_args = {'input_directory'  : config['processed_data_path'],
-            'output_directory' : config['eval_output_path']}
-
-print('\nRunning term-frequency model.')
-generate_similarity_scores(TFIDFModel(use_context=True),
-                           'tweet', **dir_args,
-                           file_prefix = 'tfidf') 
-
-print('\nRunning full TDIDF model.')
-generate_similarity_scores(TFIDFModel(use_context=False),
-                           'tweet', **dir_args,
-                           file_prefix = 'tf') 
-
-print('\nRunning mean embedding model.')
-generate_similarity_scores(ClusteredCosSimModel(max_clusters=1, verbose=False),
-                           'embedding', **dir_args,
-                           file_prefix = 'emb_1',
-                           score_args={'cluster_scaling':False})
-
-print('\nRunning mean embedding model with cluster size scaling.')
-generate_similarity_scores(ClusteredCosSimModel(max_clusters=1, verbose=True),
-                           'embedding', **dir_args,
-                           file_prefix = 'emb_1_scaled',
-                           score_args={'cluster_scaling':True})
-
-print('\nRunning two-cluster model.')
-generate_similarity_scores(ClusteredCosSimModel(max_clusters=2, verbose=False),
-                           'embedding', **dir_args,
-                           file_prefix = 'emb_2',
-                           score_args={'cluster_scaling':False})
-
-print('\nRunning two-cluster model with-cluster size scaling.')
-generate_similarity_scores(ClusteredCosSimModel(max_clusters=2, verbose=True),
-                           'embedding', **dir_args,
-                           file_prefix = 'emb_2_scaled',
-                           score_args={'cluster_scaling':True})
+from tweetvalidator import generate_similarity_scores_parallel
+from tweetvalidator import CharacterizationCache
+from tweetvalidator import cross_validate
+
+# Worker processes re-import this module under the spawn and forkserver
+# start methods, so only run the evaluation as a script.
+if __name__ == '__main__':
+    config = get_config()
+    create_dir_if_not_there(config['eval_output_path'])
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of worker processes (default: 1).')
+    parser.add_argument('--nondeterministic', action='store_true',
+                        help="Don't pin worker BLAS threads or preserve the "
+                             "sequential output order.")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Don't reuse or store characterizations in the "
+                             "characterization cache.")
+    parser.add_argument('--stratify', action='store_true',
+                        help='Give every user the same fraction of test '
+                             'tweets.')
+    parser.add_argument('--folds', type=int, default=None,
+                        help='Cross-validate over this many folds instead of '
+                             'scoring one train/test split.')
+    parser.add_argument('--repeats', type=int, default=1,
+                        help='Repeat the cross-validation folds with this '
+                             'many different shuffles (default: 1).')
+    args = parser.parse_args()
+
+    # Prefer the binary embedding store if convert_processed_data.py has been
+    # run.
+    input_directory = config['processed_data_path']
+    if os.path.isdir(config['embedding_store_path']):
+        input_directory = config['embedding_store_path']
+
+    # The data is read, and split, once into the dataset cache; every
+    # configuration (and later run) evaluates on that same split.
+    dir_args = {'input_directory'  : input_directory,
+                'output_directory' : config['eval_output_path'],
+                'dataset_cache'    : config['dataset_cache_path'],
+                'stratify'         : args.stratify}
+
+    # Characterizations are keyed by model parameters and training data, so
+    # configurations that only differ at scoring time share them.
+    cache = (None if args.no_cache
+             else CharacterizationCache(config['characterization_cache_path']))
+
+    model_configs = [
+        # Term-frequency-inverse-document-frequency model.
+        {'model'       : TFIDFModel(use_context=True),
+         'data_column' : 'tweet',
+         'file_prefix' : 'tfidf'},
+
+        # Term-frequency model.
+        {'model'       : TFIDFModel(use_context=False),
+         'data_column' : 'tweet',
+         'file_prefix' : 'tf'},
+
+        # Mean embedding model.
+        {'model'       : ClusteredCosSimModel(max_clusters=1, verbose=False),
+         'data_column' : 'embedding',
+         'file_prefix' : 'emb_1',
+         'score_args'  : {'cluster_scaling':False},
+         'vectorize'   : True},
+
+        # Mean embedding model with cluster size scaling.
+        {'model'       : ClusteredCosSimModel(max_clusters=1, verbose=True),
+         'data_column' : 'embedding',
+         'file_prefix' : 'emb_1_scaled',
+         'score_args'  : {'cluster_scaling':True},
+         'vectorize'   : True},
+
+        # Two-cluster model.
+        {'model'       : ClusteredCosSimModel(max_clusters=2, verbose=False),
+         'data_column' : 'embedding',
+         'file_prefix' : 'emb_2',
+         'score_args'  : {'cluster_scaling':False},
+         'vectorize'   : True},
+
+        # Two-cluster model with cluster size scaling.
+        {'model'       : ClusteredCosSimModel(max_clusters=2, verbose=True),
+         'data_column' : 'embedding',
+         'file_prefix' : 'emb_2_scaled',
+         'score_args'  : {'cluster_scaling':True},
+         'vectorize'   : True} ]
+
+    if args.folds:
+        print(f'\nCross-validating {len(model_configs)} model configurations '
+              f'over {args.folds} folds x {args.repeats} with {args.workers} '
+              f'worker(s).')
+        results = cross_validate(model_configs, input_directory,
+                                 dataset_cache = config['dataset_cache_path'],
+                                 n_folds = args.folds,
+                                 n_repeats = args.repeats,
+                                 stratify = args.stratify,
+                                 n_workers = args.workers,
+                                 output_directory = config['eval_output_path'],
+                                 cache = cache)
+        for prefix, evaluation in results.items():
+            print(f"{prefix:>14}  AUC {evaluation['auc_mean']:.3f} "
+                  f"± {evaluation['auc_std']:.3f}")
+    else:
+        print(f'\nRunning {len(model_configs)} model configurations '
+              f'with {args.workers} worker(s).')
+        generate_similarity_scores_parallel(
+                            model_configs, **dir_args,
+                            n_workers = args.workers,
+                            deterministic = not args.nondeterministic,
+                            cache = cache)
@@ -3,13 +3,30 @@
 """
 Downloads tweets for users specified in 'twitter_users' field of config.json
 
+Users are downloaded concurrently through one Twitter client, within
+Twitter's rate limit.  Runs are incremental: only tweets newer than the last
+run's are fetched (all of them), and added to the front of the users'
+newest-first files in 'raw_data_path'.
+
 June, 2019
 @author: Joshua Rubin
 """
 
+import argparse
 from get_config import (get_config, create_dir_if_not_there)
-from tweetvalidator.data_processing import get_tweets_by_user
-                                            
+from tweetvalidator.data_processing import TweetDownloader, HTTPTransport
+from tweetvalidator.data_processing.download_tweets import twitter_transport
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('--workers', type=int, default=8,
+                    help='Users downloaded at once (default: 8).')
+parser.add_argument('--full', action='store_true',
+                    help="Re-download every user's recent tweets, replacing "
+                         "their files, instead of only new ones.")
+parser.add_argument('--api-url', default=None,
+                    help='Download from this Twitter-compatible API (e.g. a '
+                         'FakeTwitterServer) instead of Twitter.')
+args = parser.parse_args()
 
 config = get_config()
 
@@ -21,9 +38,15 @@ create_dir_if_not_there(output_directory)
 
 twitter_users_to_fetch = config['twitter_users'] 
 
-for user in twitter_users_to_fetch:
-    print(user)
-    get_tweets_by_user(user,
-                       max_tweets = max_tweets_per_user,
-                       output_path = output_directory)
-    
\ No newline at end of file
+if args.api_url:
+    transport = HTTPTransport(args.api_url)
+else:
+    transport = twitter_transport()
+
+if transport:
+    report = TweetDownloader(transport, workers = args.workers).download(
+                                    twitter_users_to_fetch, output_directory,
+                                    max_tweets = max_tweets_per_user,
+                                    full = args.full)
+    print(f"Retrieved {report['tweets']} tweets in {report['requests']} "
+          f"requests, {report['seconds']:.1f}s.")
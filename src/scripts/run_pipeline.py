@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streams tweets from 'raw_data_path' (or, with --download, straight from
+Twitter for 'twitter_users') through filtering, embedding and scoring against
+the models in 'model_registry_path' (see characterize_users.py), writing one
+JSON line per scored tweet.  Nothing is written in between unless asked for
+with --write-intermediate, which also fills 'preprocessed_data_path' and
+'processed_data_path' as filter_raw_data.py and embed_preprocessed_data.py
+would.  Use the backend the models' training tweets were embedded with.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import argparse
+from get_config import (get_config, create_dir_if_not_there)
+config = get_config()
+
+from tweetvalidator.models import ModelRegistry
+from tweetvalidator.embedding_backends import BACKENDS, make_backend
+from tweetvalidator.pipeline import (raw_file_source, download_source,
+                                     stream_pipeline, write_scores,
+                                     BATCH_SIZE)
+
+parser = argparse.ArgumentParser(description=__doc__,
+                            formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument('--download', action='store_true',
+                    help="Download 'twitter_users' tweets instead of reading "
+                         "'raw_data_path'.")
+parser.add_argument('--backend', choices=sorted(BACKENDS), default=None,
+                    help="Embedding backend (default: 'embedding_backend' in "
+                         "the config).")
+parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                    help=f'Tweets per batch (default: {BATCH_SIZE}).')
+parser.add_argument('--write-intermediate', action='store_true',
+                    help='Also write the filtered and embedded tweets to the '
+                         'preprocessed and processed data directories.')
+parser.add_argument('--output', default=None,
+                    help="Scores file (default: pipeline_scores.jsonl in "
+                         "'eval_output_path').")
+args = parser.parse_args()
+
+if args.download:
+    source = download_source(config['twitter_users'],
+                             int(config['max_tweets_per_user']),
+                             args.batch_size)
+else:
+    source = raw_file_source(config['raw_data_path'], args.batch_size)
+
+preprocessed_directory, processed_directory = None, None
+if args.write_intermediate:
+    preprocessed_directory = config['preprocessed_data_path']
+    processed_directory = config['processed_data_path']
+    create_dir_if_not_there(preprocessed_directory)
+    create_dir_if_not_there(processed_directory)
+
+output_path = args.output
+if output_path is None:
+    create_dir_if_not_there(config['eval_output_path'])
+    output_path = os.path.join(config['eval_output_path'],
+                               'pipeline_scores.jsonl')
+
+backend = make_backend(args.backend or config.get('embedding_backend', 'use'))
+batches = stream_pipeline(source, config['regexp_tweet_filters'],
+                          int(config['min_tweet_characters']),
+                          encoder = backend,
+                          models = ModelRegistry(config['model_registry_path']),
+                          preprocessed_directory = preprocessed_directory,
+                          processed_directory = processed_directory)
+
+report = write_scores(batches, output_path)
+print(f"Scored {report['tweets']} tweets, flagged {report['flagged']}, in "
+      f"{report['seconds']:.1f}s ({report['tweets_per_second']:,.0f} "
+      f"tweets/s), to {output_path}.")
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serves tweet validation over HTTP against the per-user embedding models in
+'model_registry_path' (see characterize_users.py), with the embedding backend
+(by default the Universal Sentence Encoder) kept resident.  Use the backend
+the models' training tweets were embedded with.
+
+    POST /validate  {"user": "@someone", "tweet": "..."}
+    GET  /stats
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import argparse
+from get_config import get_config
+config = get_config()
+
+from tweetvalidator.models import ModelRegistry
+from tweetvalidator.embedding_backends import BACKENDS, make_backend
+from tweetvalidator.service import run_service
+
+parser = argparse.ArgumentParser(description=__doc__,
+                            formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument('--host', default='127.0.0.1',
+                    help='Interface to listen on (default: 127.0.0.1).')
+parser.add_argument('--port', type=int, default=8080,
+                    help='Port to listen on (default: 8080).')
+parser.add_argument('--max-batch-size', type=int, default=64,
+                    help='Most requests per micro-batch (default: 64).')
+parser.add_argument('--max-wait-ms', type=float, default=5,
+                    help='Longest a request waits for its micro-batch to '
+                         'fill, in milliseconds (default: 5).')
+parser.add_argument('--backend', choices=sorted(BACKENDS), default=None,
+                    help="Embedding backend (default: 'embedding_backend' in "
+                         "the config).")
+args = parser.parse_args()
+
+backend = make_backend(args.backend or config.get('embedding_backend', 'use'))
+run_service(backend, ModelRegistry(config['model_registry_path']),
+            host = args.host, port = args.port,
+            max_batch_size = args.max_batch_size,
+            max_wait_ms = args.max_wait_ms)
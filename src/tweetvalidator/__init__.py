@@ -1,4 +1,13 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+from .lazy_imports import export_lazily
 
-from .evaluate_model import generate_similarity_scores
+# Public name -> defining module, imported on first use (see lazy_imports).
+_EXPORTS = {'generate_similarity_scores'          : '.evaluate_model',
+            'cross_validate'                      : '.evaluate_model',
+            'generate_similarity_scores_parallel' : '.parallel_evaluation',
+            'CharacterizationCache'               : '.characterization_cache',
+            'analyze_scores'                      : '.analysis'}
+
+__all__ = list(_EXPORTS)
+__getattr__ = export_lazily(__name__, _EXPORTS)
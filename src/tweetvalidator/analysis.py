@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ROC/AUC analysis of the similarity scores in an evaluation output directory
+(see score_store), as tables of true and false positive rates by classifier
+threshold and, optionally, ROC plots.
+
+Every score set, each model's aggregate and each (model, user) pair, is
+loaded once and its ROC curve and AUC computed from a single sort.  The
+curves are then grouped three ways, with one output directory each:
+
+    <output>/                 models compared on their aggregate scores
+    <output>/<user>/          models compared on one user's scores
+    <output>/<model>/         users compared within one model
+
+each holding rates_<name>.txt per curve and, if plotted,
+ROC_AUC_Comparison.png.  <output>/auc.csv lists every AUC.  Plots are drawn
+in worker processes with matplotlib's headless Agg backend.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from .score_store import ScoreStore, is_score_store
+
+RATES_HEADER = 'false_pos_rate,true_pos_rate,threshold'
+RATES_FORMAT = '%14.3f'
+
+def roc_curve(own_scores, other_scores):
+    """ ROC curve of telling <own_scores> (positives) from <other_scores>,
+    from one sort of the scores.  Matches sklearn.metrics.roc_curve with its
+    default drop_intermediate=True.
+
+    Returns:
+    tuple: (false positive rates, true positive rates, thresholds), with
+        thresholds decreasing from inf.
+    """
+    scores = np.concatenate([np.asarray(own_scores),
+                             np.asarray(other_scores)])
+    truth = np.zeros(len(scores))
+    truth[:len(own_scores)] = 1
+
+    # The order within tied scores doesn't matter, since ties share a
+    # threshold, so the sort needn't be stable.
+    order = np.argsort(scores)[::-1]
+    scores, truth = scores[order], truth[order]
+
+    # The last row of each run of tied scores.
+    distinct = np.flatnonzero(np.diff(scores))
+    threshold_rows = np.r_[distinct, len(scores) - 1]
+
+    tps = np.cumsum(truth)[threshold_rows]
+    fps = 1 + threshold_rows - tps
+    thresholds = scores[threshold_rows]
+
+    # Drop points collinear with their neighbours, which don't change the
+    # curve.
+    if len(fps) > 2:
+        optimal = np.flatnonzero(np.r_[True,
+                                       np.logical_or(np.diff(fps, 2),
+                                                     np.diff(tps, 2)),
+                                       True])
+        fps, tps, thresholds = fps[optimal], tps[optimal], thresholds[optimal]
+
+    fps = np.r_[0, fps]
+    tps = np.r_[0, tps]
+    thresholds = np.r_[np.inf, thresholds]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fpr = fps / fps[-1]
+        tpr = tps / tps[-1]
+    return fpr, tpr, thresholds
+
+def auc(fpr, tpr):
+    """ Area under a ROC curve, by the trapezoidal rule. """
+    return float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1])) / 2)
+
+def _list_directories(directory_path):
+    return sorted(x for x in os.listdir(directory_path) if '.' not in x)
+
+def _read_json_scores(directory_path):
+    import json
+    scores = []
+    for file_name in ['own.json', 'other.json']:
+        with open(os.path.join(directory_path, file_name), 'r') as file:
+            scores.append(np.asarray(json.loads(file.read()),
+                                     dtype=np.float64).ravel())
+    return tuple(scores)
+
+def load_score_sets(eval_directory):
+    """ Every score set in <eval_directory>, read once.  Model directories
+    may be score stores (memory-mapped) or the earlier JSON layout.
+
+    Returns:
+    dict: model -> {None : (own, other) aggregate scores,
+                    user : (own, other) scores for that user}
+    """
+    score_sets = {}
+    for model in _list_directories(eval_directory):
+        model_directory = os.path.join(eval_directory, model)
+        if is_score_store(model_directory):
+            store = ScoreStore(model_directory)
+            sets = {None : (store.own, store.other)}
+            sets.update((user, store.user_scores(user))
+                        for user in store.users)
+        elif os.path.exists(os.path.join(model_directory, 'own.json')):
+            sets = {None : _read_json_scores(model_directory)}
+            sets.update((user, _read_json_scores(os.path.join(
+                                                    model_directory, user)))
+                        for user in _list_directories(model_directory))
+        else:
+            continue
+        score_sets[model] = sets
+    return score_sets
+
+def _write_rates(path, fpr, tpr, thresholds):
+    """ Writes a rates table with one formatting operation and one write. """
+    rows = np.column_stack([fpr, tpr, thresholds]).ravel().tolist()
+    line = ','.join([RATES_FORMAT] * 3) + '\n'
+    with open(path, 'w') as file:
+        file.write(RATES_HEADER + '\n' + (line * len(fpr)) % tuple(rows))
+
+def plot_roc(path, curves, legend_string, title_label = ''):
+    """ Draws <curves>, a list of (name, fpr, tpr, auc), as one ROC plot
+    saved to <path>, with matplotlib's Agg backend.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=[8,8])
+    for name, fpr, tpr, area in curves:
+        plt.plot(fpr, tpr, label=f'{area:.2}:{name}')
+
+    plt.plot([0,1],[0,1],'k--')
+    plt.xlabel('False Positive Rate', fontsize = 14)
+    plt.ylabel('True Positive Rate', fontsize = 14)
+    legend = plt.legend(fontsize = 12, title=f'AUC:{legend_string}')
+    title = 'ROC' if not title_label else 'ROC - ' + title_label
+    plt.title(title, fontsize = 14)
+    plt.setp(legend.get_title(),fontsize='14')
+    plt.savefig(path)
+    plt.close()
+
+def analyze_scores(eval_directory, output_directory, plot = True,
+                   workers = None):
+    """ Writes ROC tables (and plots) for every model and user in
+    <eval_directory> to <output_directory>; see the module docstring for the
+    layout.
+
+    Args:
+    eval_directory (str): Evaluation output, e.g. 'eval_output_path'.
+    output_directory (str): Analysis output, e.g. 'analysis_output_path'.
+    plot (bool): Also draw the ROC plots.  Defaults to True.
+    workers (int): Processes to draw plots with.  None uses all CPUs.
+
+    Returns:
+    dict: (model, user) -> AUC, with user None for a model's aggregate.
+    """
+    score_sets = load_score_sets(eval_directory)
+
+    curves = {}
+    for model, sets in score_sets.items():
+        for user, (own, other) in sets.items():
+            fpr, tpr, thresholds = roc_curve(own, other)
+            curves[model, user] = (fpr, tpr, thresholds, auc(fpr, tpr))
+
+    users = sorted({user for model, user in curves if user is not None})
+    models = sorted(score_sets)
+
+    # (output directory, [(curve name, (model, user))], legend, title)
+    groups = [(output_directory, [(model, (model, None))
+                                  for model in models], 'Model', '')]
+    groups += [(os.path.join(output_directory, user),
+                [(model, (model, user)) for model in models
+                 if (model, user) in curves], 'Model', user)
+               for user in users]
+    groups += [(os.path.join(output_directory, model),
+                [(user, (model, user)) for user in users
+                 if (model, user) in curves], 'User', model)
+               for model in models]
+
+    plots = []
+    for group_directory, members, legend_string, title_label in groups:
+        if not os.path.isdir(group_directory):
+            os.makedirs(group_directory)
+        for name, key in members:
+            fpr, tpr, thresholds, _ = curves[key]
+            _write_rates(os.path.join(group_directory, f'rates_{name}.txt'),
+                         fpr, tpr, thresholds)
+        plots.append((os.path.join(group_directory, 'ROC_AUC_Comparison.png'),
+                      [(name,) + curves[key][:2] + curves[key][3:]
+                       for name, key in members],
+                      legend_string, title_label))
+
+    with open(os.path.join(output_directory, 'auc.csv'), 'w') as file:
+        file.write('model,user,auc\n')
+        file.writelines(f'{model},{user or "all"},{curve[3]:.4f}\n'
+                        for (model, user), curve in sorted(
+                            curves.items(), key=lambda item:
+                            (item[0][0], item[0][1] or '')))
+
+    if plot:
+        if workers == 1:
+            for args in plots:
+                plot_roc(*args)
+        else:
+            with ProcessPoolExecutor(max_workers = workers) as executor:
+                list(executor.map(plot_roc, *zip(*plots)))
+
+    return {key : curve[3] for key, curve in curves.items()}
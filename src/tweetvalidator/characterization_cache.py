@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Provides CharacterizationCache, an on-disk cache of model characterizations
+keyed by (model class, constructor parameters, hash of the training data).
+
+Evaluations characterize the same users on the same split over and over:
+across reruns, and across configurations that only differ at scoring time
+(e.g. emb_1 and emb_1_scaled).  With a cache, each distinct
+characterization is computed once and loaded (memory-mapped) afterwards.
+Entries are saved models (see Model.save); the least recently used ones are
+evicted once the cache grows past its size limit.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+from .models.base_model import MODEL_FILE
+from .models.registry import load_model
+
+# Constructor parameters that don't affect the characterization.
+UNKEYED_PARAMS = {'verbose'}
+
+def hash_corpus(corpus, digest):
+    """ Feeds a corpus of tweets or embeddings into hashlib <digest>. """
+    if corpus is None:
+        digest.update(b'None')
+        return
+
+    rows = getattr(corpus, 'values', corpus)
+    if len(rows) and isinstance(rows[0], str):
+        for tweet in rows:
+            digest.update(tweet.encode('utf-8'))
+            digest.update(b'\0')
+        return
+
+    # Embeddings; a 2D array or a sequence of rows.
+    if isinstance(rows, np.ndarray) and rows.ndim == 2:
+        matrix = np.ascontiguousarray(rows)
+    elif len(rows):
+        matrix = np.vstack(rows)
+    else:
+        matrix = np.zeros((0, 0))
+
+    digest.update(f'{matrix.dtype}{matrix.shape}'.encode('utf-8'))
+    digest.update(matrix.tobytes())
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+class CharacterizationCache:
+    """ Disk cache of characterized models with LRU size-based eviction.
+
+        Args:
+        directory (str): Cache directory; created if missing.
+        max_bytes (int): Evict least recently used entries beyond this total
+            size.  Defaults to 1 GB.
+    """
+    def __init__(self, directory, max_bytes=2**30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def key(self, model, corpus, context_corpus):
+        """ Hex digest identifying a characterization. """
+        params = {k : v for k, v in model.get_init_params().items()
+                  if k not in UNKEYED_PARAMS}
+
+        digest = hashlib.sha1()
+        digest.update(type(model).__name__.encode('utf-8'))
+        digest.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+        hash_corpus(corpus, digest)
+        if model.uses_context_corpus():
+            # Separates the corpora, so moving tweets between them changes
+            # the key.
+            digest.update(b'\0context\0')
+            hash_corpus(context_corpus, digest)
+
+        return digest.hexdigest()
+
+    def characterize(self, model, corpus, context_corpus):
+        """ Drop-in for model.characterize(corpus, context_corpus) that
+        reuses a cached characterization when there is one.  Models that
+        warm start depend on their previous state, so they bypass the cache.
+        """
+        if getattr(model, 'warm_start', False):
+            model.characterize(corpus, context_corpus)
+            return
+
+        entry = os.path.join(self.directory,
+                             self.key(model, corpus, context_corpus))
+
+        if os.path.exists(os.path.join(entry, MODEL_FILE)):
+            # Mark as recently used.
+            os.utime(os.path.join(entry, MODEL_FILE))
+            cached = load_model(entry)
+
+            # Adopt the cached characterization, but keep this model's
+            # inference-time settings, unkeyed parameters and (already built)
+            # encoder.
+            keep = {k : v for k, v in model.__dict__.items()
+                    if k in UNKEYED_PARAMS or k in ('params', 'encoder')}
+            model.__dict__.update(cached.__dict__)
+            model.__dict__.update(keep)
+            return
+
+        model.characterize(corpus, context_corpus)
+
+        # Write under a temporary name and rename, so concurrent evaluations
+        # never see a partial entry.
+        staging = tempfile.mkdtemp(dir=self.directory, prefix='.staging-')
+        try:
+            model.save(staging)
+            os.rename(staging, entry)
+        except OSError:
+            # Another process got there first.
+            shutil.rmtree(staging, ignore_errors=True)
+
+        self.evict()
+
+    def evict(self):
+        """ Removes least recently used entries until within max_bytes. """
+        entries = []
+        for name in os.listdir(self.directory):
+            model_file = os.path.join(self.directory, name, MODEL_FILE)
+            if name.startswith('.') or not os.path.exists(model_file):
+                continue
+            entries.append((os.path.getmtime(model_file),
+                            directory_size(os.path.join(self.directory, name)),
+                            name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(os.path.join(self.directory, name),
+                          ignore_errors=True)
+            total -= size
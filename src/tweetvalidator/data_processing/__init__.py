@@ -1,8 +1,22 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-from .filter_tweets import filter_tweets_from_directories
-from .filter_tweets import filter_tweets_from_files
-from .download_tweets import get_tweets_by_user
-from .embed_tweets import SentenceEncoder
-from .embed_tweets import embed_tweets_from_file
-from .embed_tweets import embed_tweets_from_directories
+from ..lazy_imports import export_lazily
+
+# Public name -> defining module, imported on first use (see lazy_imports),
+# so e.g. filtering never imports TensorFlow or tweepy.
+_EXPORTS = {'filter_tweets_from_directories' : '.filter_tweets',
+            'filter_tweets_from_files'       : '.filter_tweets',
+            'RegexFilter'                    : '.filter_tweets',
+            'get_tweets_by_user'             : '.download_tweets',
+            'TweetDownloader'                : '.download_tweets',
+            'TokenBucket'                    : '.download_tweets',
+            'TweepyTransport'                : '.download_tweets',
+            'HTTPTransport'                  : '.download_tweets',
+            'FakeTwitterServer'              : '.fake_twitter',
+            'SentenceEncoder'                : '.embed_tweets',
+            'embed_tweets_from_file'         : '.embed_tweets',
+            'embed_tweets_to_store'          : '.embed_tweets',
+            'embed_tweets_from_directories'  : '.embed_tweets'}
+
+__all__ = list(_EXPORTS)
+__getattr__ = export_lazily(__name__, _EXPORTS)
@@ -5,13 +5,28 @@ Gathers the tweet history of any twitter user and writes to a file.
 Requires valid Twitter API credentials.
 See: http://develope.twitter.com
 
+TweetDownloader fetches many users concurrently through one shared
+transport, under a global TokenBucket rate limit, and incrementally: the
+newest tweet id seen per user is kept in a state file next to the raw files,
+so later runs only ask for tweets since then (all of them, paging back until
+that id) and add them to the front of the users' newest-first files.
+Transports
+are pluggable; TweepyTransport wraps an authenticated tweepy API, and
+HTTPTransport speaks the v1.1 REST API directly, e.g. to a FakeTwitterServer
+(see fake_twitter) in tests and benchmarks.
+
 June, 2019
 @author: Joshua Rubin
 """
 
 import os
 import json
-import tweepy
+import time
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 
 # Inspired by https://medium.com/@wilamelima/mining-twitter-for-sentiment
 # -analysis-using-python-a74679b85546
@@ -35,11 +50,31 @@ def connect_to_twitter_OAuth():
     ACCESS_TOKEN  = os.environ['TWITTER_ACCESS_TOKEN']
     ACCESS_SECRET = os.environ['TWITTER_ACCESS_SECRET']
     
+    # Imported here so the package doesn't need tweepy until it downloads.
+    import tweepy
     auth = tweepy.OAuthHandler(CONSUMER_KEY, CONSUMER_SECRET)
     auth.set_access_token(ACCESS_TOKEN, ACCESS_SECRET)
     api = tweepy.API(auth)
     return api
 
+def fetch_tweets(user, max_tweets = 10):
+    """ Retrieves up to <max_tweets> tweets from Twitter user, <user>.
+
+        Returns:
+        list: [tweet text, date] pairs, or None if credentials are missing.
+    """
+    # Create API object
+    api = connect_to_twitter_OAuth()
+
+    if not api:
+        return None
+
+    import tweepy
+
+    # Make a list of tuples.
+    return [(x.text, str(x.created_at)) for x in
+            tweepy.Cursor(api.user_timeline, id = user).items(max_tweets)]
+
 def get_tweets_by_user(user, output_path = None, max_tweets = 10):
     """ Retrives up to  <maxTweets> tweets from Twitter user, <user>.
     
@@ -52,14 +87,9 @@ def get_tweets_by_user(user, output_path = None, max_tweets = 10):
         max_tweets (int): The largest number for tweets to retrieve.       
     """
          
-    # Create API object
-    api = connect_to_twitter_OAuth()
-    
-    if api:
+    tweets = fetch_tweets(user, max_tweets)
     
-        # Make a list of tuples.    
-        tweets = [(x.text, str(x.created_at)) for x in
-                  tweepy.Cursor(api.user_timeline, id = user).items(max_tweets)]
+    if tweets is not None:
     
         if output_path:
             output_path = os.path.join(output_path, user + '.json')
@@ -72,3 +102,333 @@ def get_tweets_by_user(user, output_path = None, max_tweets = 10):
         # Notify the human
         print('Retrieved',len(tweets), 'tweets for',
               user + '. Wrote to', output_path + '.')
+
+# Twitter's user_timeline limit: requests per 15 minute window.
+REQUESTS_PER_WINDOW = 900
+WINDOW_SECONDS = 15 * 60
+
+# Most tweets user_timeline returns per request.
+PAGE_SIZE = 200
+
+# Newest tweet id downloaded per user, kept in the raw data directory.  The
+# leading '.' keeps it out of the '@' user files the other steps read.
+DOWNLOAD_STATE_FILE = '.download_state.json'
+
+class RateLimitError(Exception):
+    """ Raised by a transport when Twitter refuses a request for exceeding
+    the rate limit.  <retry_after> is the seconds until it resets.
+    """
+    def __init__(self, retry_after):
+        super().__init__(f'Rate limited for {retry_after:.0f}s.')
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """ Thread-safe token bucket: <rate> tokens a second accumulate up to
+    <capacity>, and acquire blocks until enough are available.
+
+        Args:
+        rate (float): Tokens added per second.
+        capacity (float): Most tokens held, i.e. the largest burst.  Defaults
+            to one second's worth.
+        clock (callable): Returns the time in seconds.
+        sleep (callable): Sleeps for a number of seconds.
+    """
+    def __init__(self, rate, capacity=None, clock=time.monotonic,
+                 sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.capacity
+        self.updated = clock()
+        self.paused_until = self.updated
+        self.lock = threading.Lock()
+
+    def _wait_for(self, tokens):
+        """ Takes <tokens> if available, else returns seconds to wait. """
+        with self.lock:
+            now = self.clock()
+            if now < self.paused_until:
+                return self.paused_until - now
+
+            self.tokens = min(self.capacity,
+                              self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """ Blocks until <tokens> are available, then takes them.
+
+        Returns:
+        float: seconds spent waiting.
+        """
+        waited = 0.
+        while True:
+            wait = self._wait_for(tokens)
+            if not wait:
+                return waited
+            self.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds):
+        """ Gives out no tokens for <seconds>, and empties the bucket. """
+        with self.lock:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+            self.tokens = 0
+            self.updated = self.paused_until
+
+def twitter_rate_limiter():
+    """ A TokenBucket for Twitter's user_timeline limit, allowing a full
+    window's requests in a burst.
+    """
+    return TokenBucket(REQUESTS_PER_WINDOW / WINDOW_SECONDS,
+                       REQUESTS_PER_WINDOW)
+
+def _screen_name(user):
+    return user[1:] if user.startswith('@') else user
+
+class TweepyTransport:
+    """ user_timeline requests through a shared, authenticated tweepy API
+    (see connect_to_twitter_OAuth).
+    """
+    def __init__(self, api):
+        self.api = api
+
+    def user_timeline(self, user, count, since_id=None, max_id=None):
+        """ One page of <user>'s tweets, newest first, as dicts with 'id',
+        'text' and 'created_at'.  Ids bound the page as in the Twitter API.
+        """
+        import tweepy
+        # Renamed TooManyRequests in tweepy 4.
+        rate_limit_error = (getattr(tweepy, 'TooManyRequests', None) or
+                            getattr(tweepy, 'RateLimitError', ()))
+        try:
+            statuses = self.api.user_timeline(screen_name=_screen_name(user),
+                                              count=count, since_id=since_id,
+                                              max_id=max_id)
+        except rate_limit_error as error:
+            raise RateLimitError(WINDOW_SECONDS) from error
+
+        return [{'id'         : status.id,
+                 'text'       : status.text,
+                 'created_at' : str(status.created_at)} for status in statuses]
+
+class HTTPTransport:
+    """ user_timeline requests straight to a Twitter v1.1-style REST API.
+
+        Args:
+        base_url (str): e.g. https://api.twitter.com or a FakeTwitterServer's
+            url.
+        bearer_token (str): App-only auth token, if the API needs one.
+        timeout (float): Seconds before a request fails.
+    """
+    def __init__(self, base_url, bearer_token=None, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.bearer_token = bearer_token
+        self.timeout = timeout
+
+    def user_timeline(self, user, count, since_id=None, max_id=None):
+        """ As TweepyTransport.user_timeline. """
+        params = {'screen_name' : _screen_name(user), 'count' : count}
+        if since_id is not None:
+            params['since_id'] = since_id
+        if max_id is not None:
+            params['max_id'] = max_id
+
+        request = urllib.request.Request(
+                        f'{self.base_url}/1.1/statuses/user_timeline.json?'
+                        + urllib.parse.urlencode(params))
+        if self.bearer_token:
+            request.add_header('Authorization', 'Bearer ' + self.bearer_token)
+
+        try:
+            with urllib.request.urlopen(request,
+                                        timeout=self.timeout) as response:
+                statuses = json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as error:
+            if error.code != 429:
+                raise
+            reset = error.headers.get('x-rate-limit-reset')
+            raise RateLimitError(max(float(reset) - time.time(), 0) if reset
+                                 else WINDOW_SECONDS) from error
+
+        return [{'id'         : status['id'],
+                 'text'       : status['text'],
+                 'created_at' : status['created_at']} for status in statuses]
+
+def twitter_transport():
+    """ A TweepyTransport with credentials from the environment, or None if
+    they're missing.
+    """
+    api = connect_to_twitter_OAuth()
+    return TweepyTransport(api) if api else None
+
+def _partial_path(file_path):
+    """ Where <file_path> is written before it's renamed into place; the
+    leading '.' keeps it out of the '@' user files the other steps read.
+    """
+    directory_path, file_name = os.path.split(file_path)
+    return os.path.join(directory_path, '.' + file_name + '.partial')
+
+def prepend_tweets(file_path, tweets):
+    """ Adds [tweet, date] rows, newest first, ahead of those in the JSON
+    array in <file_path> (creating it if needed), so the file stays newest
+    first as a full download writes it.  The file is replaced atomically.
+    """
+    rows = []
+    if os.path.exists(file_path):
+        with open(file_path, 'r') as file:
+            rows = json.loads(file.read())
+
+    partial_path = _partial_path(file_path)
+    with open(partial_path, 'w') as file:
+        file.write(json.dumps(list(tweets) + rows))
+    os.replace(partial_path, file_path)
+
+class TweetDownloader:
+    """ Downloads many users' tweets concurrently through one transport,
+    incrementally and within a rate limit.
+
+        Args:
+        transport: TweepyTransport, HTTPTransport or anything with their
+            user_timeline method.  Shared by every worker.
+        rate_limiter (TokenBucket): Taken from once per request, across all
+            workers.  Defaults to twitter_rate_limiter().
+        workers (int): Users downloaded at once.
+        page_size (int): Tweets requested per call.
+        max_retries (int): Times a rate-limited request is retried, after
+            waiting for the limit to reset.
+    """
+    def __init__(self, transport, rate_limiter=None, workers=8,
+                 page_size=PAGE_SIZE, max_retries=3):
+        self.transport = transport
+        self.rate_limiter = (rate_limiter if rate_limiter is not None
+                             else twitter_rate_limiter())
+        self.workers = workers
+        self.page_size = page_size
+        self.max_retries = max_retries
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _request(self, user, count, since_id, max_id):
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            with self._lock:
+                self.requests += 1
+            try:
+                return self.transport.user_timeline(user, count,
+                                                    since_id=since_id,
+                                                    max_id=max_id)
+            except RateLimitError as error:
+                if attempt == self.max_retries:
+                    raise
+                # Hold back every worker, not just this one.
+                self.rate_limiter.pause(error.retry_after)
+
+    def fetch(self, user, max_tweets=None, since_id=None):
+        """ Up to <max_tweets> (None for no limit) of <user>'s tweets newer
+        than <since_id>, newest first, paging back through the timeline with
+        max_id until the timeline (or <since_id>) is reached.
+
+        Returns:
+        list: dicts with 'id', 'text' and 'created_at'.
+        """
+        tweets, max_id = [], None
+        while max_tweets is None or len(tweets) < max_tweets:
+            count = (self.page_size if max_tweets is None
+                     else min(self.page_size, max_tweets - len(tweets)))
+            page = self._request(user, count, since_id, max_id)
+            if not page:
+                break
+            tweets.extend(page)
+            max_id = min(tweet['id'] for tweet in page) - 1
+
+        return tweets if max_tweets is None else tweets[:max_tweets]
+
+    def update_user(self, user, directory_path, max_tweets, since_id=None):
+        """ Fetches <user>'s tweets into <directory_path>/<user>.json,
+        newest first.  Given <since_id>, every tweet since then is fetched,
+        however many, so none are skipped, and they're added to the front of
+        the file; otherwise the newest <max_tweets> replace it.
+
+        Returns:
+        tuple: (tweets fetched, newest tweet id or <since_id> if none).
+        """
+        tweets = self.fetch(user, None if since_id is not None else max_tweets,
+                            since_id)
+        rows = [[tweet['text'], tweet['created_at']] for tweet in tweets]
+        file_path = os.path.join(directory_path, user + '.json')
+
+        if since_id is None:
+            partial_path = _partial_path(file_path)
+            with open(partial_path, 'w') as file:
+                json.dump(rows, file)
+            os.replace(partial_path, file_path)
+        elif rows:
+            prepend_tweets(file_path, rows)
+
+        newest = max((tweet['id'] for tweet in tweets), default=since_id)
+        return len(rows), newest
+
+    def download(self, users, directory_path, max_tweets=1000, full=False):
+        """ Brings each user's raw file in <directory_path> up to date.
+
+        Args:
+        users (list of str): Twitter handles, e.g. @MrPeanut.
+        directory_path (str): Raw data directory.
+        max_tweets (int): Most tweets fetched per user on their first (or a
+            full) download.  Later runs fetch every tweet since the last.
+        full (bool): Ignore the saved state and re-download every user's
+            recent tweets, replacing their files.
+
+        Returns:
+        dict: 'users', 'tweets', 'requests', 'failed' (user -> error),
+            'seconds' and 'tweets_per_second'.
+        """
+        state_path = os.path.join(directory_path, DOWNLOAD_STATE_FILE)
+        state = {}
+        if os.path.exists(state_path) and not full:
+            with open(state_path, 'r') as file:
+                state = json.load(file)
+
+        def update(user):
+            since_id = state.get(user)
+            # Without a saved id the file can't be extended, so replace it.
+            if not os.path.exists(os.path.join(directory_path,
+                                               user + '.json')):
+                since_id = None
+            return self.update_user(user, directory_path, max_tweets,
+                                    since_id)
+
+        requests_before = self.requests
+        start = time.perf_counter()
+        n_tweets, failed = 0, {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [(user, executor.submit(update, user)) for user in users]
+            for user, future in futures:
+                try:
+                    n_new, newest = future.result()
+                except Exception as error:
+                    failed[user] = str(error)
+                    print(f'Failed to download {user}: {error}')
+                    continue
+                n_tweets += n_new
+                if newest is not None:
+                    state[user] = newest
+                print(f'Retrieved {n_new} new tweets for {user}.')
+
+        partial_path = state_path + '.partial'
+        with open(partial_path, 'w') as file:
+            json.dump(state, file)
+        os.replace(partial_path, state_path)
+
+        seconds = time.perf_counter() - start
+        return {'users'             : len(users),
+                'tweets'            : n_tweets,
+                'requests'          : self.requests - requests_before,
+                'failed'            : failed,
+                'seconds'           : seconds,
+                'tweets_per_second' : n_tweets / seconds if seconds else 0.}
@@ -14,24 +14,52 @@ June, 2019
 import os
 import json
 import pandas as pd
-import tensorflow as tf
-import tensorflow_hub as hub
+from ..embedding_store import (embed_file_to_json, embed_file_to_store,
+                               EMBED_BATCH_SIZE)
+from ..embedding_cache import EmbeddingCache
+from ..embedding_pipeline import embed_files_pipelined
+from ..embedding_backends import EmbeddingBackend
 
 # Retrieve Universal Eentence Sncoder.
 MODULE_URL  = "https://tfhub.dev/google/universal-sentence-encoder/2"
 
-class SentenceEncoder:
-    """ Encapsulates the Universal Sentence Encoder
+class SentenceEncoder(EmbeddingBackend):
+    """ Encapsulates the Universal Sentence Encoder; the 'use' embedding
+    backend.
     
     Constructor loads the model and exposes the node 'output' which is set
     up in such a way so that the slow initialization only happens once.
     Subsequent inference happends very quickly in subsequent calls to
     embed_phrases.
+
+    Args:
+        url (str): TF Hub module to load.
+        cache_directory (str): If given, embeddings are looked up in and
+            added to a persistent EmbeddingCache there, so only tweets that
+            haven't been embedded before are encoded.
+        max_cache_entries (int): Size cap of the cache.
+        intra_op_threads (int): Threads TensorFlow uses within an op (e.g.
+            a matrix multiply).  None (default) lets TensorFlow choose.
+        inter_op_threads (int): Threads for running independent ops
+            concurrently.  None (default) lets TensorFlow choose.
     """
-    def __init__(self, url = MODULE_URL):
+    def __init__(self, url = MODULE_URL, cache_directory = None,
+                 max_cache_entries = 1000000, intra_op_threads = None,
+                 inter_op_threads = None):
+        self.url = url
+        self.cache = (EmbeddingCache(cache_directory, url, max_cache_entries)
+                      if cache_directory else None)
+
+        # TensorFlow takes seconds to import; only pay for it when an encoder
+        # is actually built.
+        import tensorflow as tf
+        import tensorflow_hub as hub
+
         print('Initializing embedding model.  May take a few seconds.')
         print("(And longer if I haven't downloaded it yet.)")
-        self.session = tf.Session()
+        self.session = tf.Session(config = tf.ConfigProto(
+                        intra_op_parallelism_threads = intra_op_threads or 0,
+                        inter_op_parallelism_threads = inter_op_threads or 0))
         self.embed = hub.Module(url)
         self.session.run([tf.global_variables_initializer(),
                           tf.tables_initializer()])
@@ -39,6 +67,9 @@ class SentenceEncoder:
                                                   shape=[None])
         self.output = self.embed(self.messagesPlaceholder)
     
+    def get_config(self):
+        return {'backend' : 'use', 'url' : self.url}
+
     def embed_phrases(self, phrase_list):
         """ Takes a array or list of phrases and returns an array of
             embeddings.
@@ -46,14 +77,39 @@ class SentenceEncoder:
             Args:
                 phrase_list (1D numpy array):  Array of phrases to encode. 
         """ 
+        if self.cache is not None:
+            return self.cache.embed(list(phrase_list), self._run)
+        return self._run(phrase_list)
+
+    def _run(self, phrase_list):
         return self.session.run(self.output,
                                 feed_dict={self.messagesPlaceholder:
                                            phrase_list})
     
     def __del__(self):
-        self.session.close()
+        # Construction may have failed before the session was made.
+        session = getattr(self, 'session', None)
+        if session is not None:
+            session.close()
+
+class _CachedEncoder(EmbeddingBackend):
+    """ Wraps an embedding backend with a persistent EmbeddingCache, keyed
+    by the backend's config, as SentenceEncoder caches its own embeddings.
+    """
+    def __init__(self, encoder, cache_directory):
+        self.encoder = encoder
+        self.cache = EmbeddingCache(cache_directory,
+                                    json.dumps(encoder.get_config(),
+                                               sort_keys=True))
+
+    def get_config(self):
+        return self.encoder.get_config()
+
+    def embed_phrases(self, phrase_list):
+        return self.cache.embed(list(phrase_list), self.encoder.embed_phrases)
 
-def embed_tweets_from_file(input_file_path, output_file_path, encoder = None):
+def embed_tweets_from_file(input_file_path, output_file_path, encoder = None,
+                           batch_size = None, resume = True):
     """ Read tweets from json file in <input_file_path>, embed, and output
     to <output_file_path>.
         
@@ -61,11 +117,23 @@ def embed_tweets_from_file(input_file_path, output_file_path, encoder = None):
         input_directory_path (str): path of input user file.
         output_directory_path (str): path to where to put user data with
             embeddings added.
+        encoder (EmbeddingBackend): Embedding backend to use; defaults to a
+            new SentenceEncoder.
+        batch_size (int): If given, stream the file through the encoder this
+            many tweets at a time, appending to the output as each batch
+            finishes (see embedding_store.embed_file_to_json).  Otherwise
+            the whole file is embedded at once.
+        resume (bool): When streaming, continue an interrupted run.
     
     """    
     # If the encoder isn't passed in.  Otherwise reuse the one given.
     if not encoder:
         encoder = SentenceEncoder()
+
+    if batch_size:
+        embed_file_to_json(input_file_path, output_file_path,
+                           encoder.embed_phrases, batch_size, resume)
+        return
     
     with open(input_file_path, 'r') as file:
         in_data =  json.loads(file.read())
@@ -85,25 +153,102 @@ def embed_tweets_from_file(input_file_path, output_file_path, encoder = None):
     with open(output_file_path, 'w') as file:
         file.write(data.to_json(orient='values')) 
         
-def embed_tweets_from_directories(input_directory_path, output_directory_path): 
-    """ Convenience function to apply Universal Sentance Encoder to all the
-    json files in an input directory.  Only files starting with '@' are
-    processed.
+def embed_tweets_to_store(input_file_path, store_directory_path,
+                          encoder = None, batch_size = EMBED_BATCH_SIZE,
+                          resume = True):
+    """ Streams tweets from json file in <input_file_path> through the encoder
+    <batch_size> at a time into the binary embedding store in
+    <store_directory_path> (see embedding_store.embed_file_to_store).
+    Memory use is bounded by the batch size, and an interrupted run resumes
+    from its last completed batch.
+    """
+    if not encoder:
+        encoder = SentenceEncoder()
+
+    embed_file_to_store(input_file_path, store_directory_path,
+                        encoder.embed_phrases, batch_size, resume)
+
+def embed_tweets_from_directories(input_directory_path, output_directory_path,
+                                  batch_size = None, store = False,
+                                  cache_directory = None, pipelined = False,
+                                  intra_op_threads = None,
+                                  inter_op_threads = None, encoder = None):
+    """ Convenience function to apply Universal Sentance Encoder (or another
+    embedding backend) to all the json files in an input directory.  Only
+    files starting with '@' are processed.
     
     Args:
         input_directory_path (str): path to look for preprocessed user files
         output_directory_path (str): path to deposit user data with embeddings
             added.
+        batch_size (int): Stream each file through the encoder in batches of
+            this many tweets (see embed_tweets_from_file).
+        store (bool): Write a binary embedding store into
+            output_directory_path instead of JSON files.  Always streams.
+        cache_directory (str): Persistent embedding cache to reuse
+            embeddings of tweets seen in earlier runs (see SentenceEncoder).
+        pipelined (bool): Read, encode and write files concurrently (see
+            embedding_pipeline.embed_files_pipelined) and report each
+            stage's utilization.  Files are streamed in batches of
+            <batch_size>, but an interrupted file starts over.
+        intra_op_threads, inter_op_threads (int): TensorFlow thread pool
+            sizes (see SentenceEncoder).  Only for the SentenceEncoder built
+            here; it's an error to give them with <encoder>.
+        encoder (EmbeddingBackend): Embedding backend to use instead of a
+            SentenceEncoder built from the arguments above, e.g. a
+            HashedNgramEncoder (see embedding_backends).  With
+            <cache_directory>, its embeddings are cached there too.
     """      
     
     # Initialize embedding model; reuse for each file.
-    sentence_encoder = SentenceEncoder()
+    if encoder is None:
+        sentence_encoder = SentenceEncoder(
+                                cache_directory = cache_directory,
+                                intra_op_threads = intra_op_threads,
+                                inter_op_threads = inter_op_threads)
+    else:
+        if intra_op_threads or inter_op_threads:
+            raise ValueError('TensorFlow thread pool sizes only apply to the '
+                             'SentenceEncoder built when no encoder is '
+                             'given.')
+        sentence_encoder = encoder
+        if cache_directory:
+            if getattr(encoder, 'cache', None) is not None:
+                raise ValueError('The encoder given already has an embedding '
+                                 'cache; pass no cache_directory.')
+            sentence_encoder = _CachedEncoder(encoder, cache_directory)
     
     # Grab the files from the input directory
     tweet_files = [f for f in os.listdir(input_directory_path) if f[0]=='@']
-        
-    for file_name in tweet_files:        
-        input_file_path  = os.path.join(input_directory_path, file_name)
-        output_file_path = os.path.join(output_directory_path, file_name)
-        embed_tweets_from_file(input_file_path,
-                               output_file_path, encoder = sentence_encoder)
+
+    if pipelined:
+        report = embed_files_pipelined(
+                    [os.path.join(input_directory_path, file_name)
+                     for file_name in tweet_files],
+                    output_directory_path, sentence_encoder.embed_phrases,
+                    batch_size = batch_size or EMBED_BATCH_SIZE, store = store)
+        print(f"Embedded {report['tweets']} tweets in "
+              f"{report['seconds']:.1f}s "
+              f"({report['tweets_per_second']:.0f} tweets/s).  Utilization: "
+              f"read {report['read']:.0%}, encode {report['encode']:.0%}, "
+              f"write {report['write']:.0%}.")
+
+    else:
+        for file_name in tweet_files:        
+            input_file_path  = os.path.join(input_directory_path, file_name)
+            output_file_path = os.path.join(output_directory_path, file_name)
+            if store:
+                embed_tweets_to_store(input_file_path, output_directory_path,
+                                      encoder = sentence_encoder,
+                                      batch_size = (batch_size
+                                                    or EMBED_BATCH_SIZE))
+                continue
+
+            embed_tweets_from_file(input_file_path, output_file_path,
+                                   encoder = sentence_encoder,
+                                   batch_size = batch_size)
+
+    cache = getattr(sentence_encoder, 'cache', None)
+    if cache is not None:
+        print(f'Embedding cache: {cache.hits} hits, {cache.misses} misses, '
+              f'{len(cache)} entries.')
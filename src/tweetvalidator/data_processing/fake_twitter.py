@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+A local stand-in for Twitter's v1.1 user_timeline endpoint, for testing and
+benchmarking the downloader (see download_tweets.HTTPTransport) without
+credentials or network access.
+
+    server = FakeTwitterServer({'@MrPeanut' : ['Nuts!', ...]})
+    server.start()
+    transport = HTTPTransport(server.url)
+    ...
+    server.stop()
+
+Timelines honour count, since_id and max_id as Twitter does.  Optionally
+each request is delayed by <latency>, to stand in for the network, and
+requests beyond <rate_limit> per <window> get a 429 with x-rate-limit-reset.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import json
+import time
+import threading
+import urllib.parse
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+class FakeTwitterServer:
+    """ Serves user timelines over HTTP from a background thread.
+
+        Args:
+        timelines (dict): Handle (e.g. @MrPeanut) -> list of tweet texts,
+            oldest first.
+        latency (float): Seconds each request takes.
+        rate_limit (int or None): Requests allowed per <window>, across all
+            users.  None for no limit.
+        window (float): Rate limit window in seconds.
+        host (str): Interface to listen on.
+        port (int): Port to listen on; 0 picks a free one.
+    """
+    def __init__(self, timelines=None, latency=0., rate_limit=None,
+                 window=15 * 60, host='127.0.0.1', port=0):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.window = window
+        self.requests = 0
+        self._timelines = {}
+        self._next_id = 1
+        self._window_start = time.time()
+        self._window_requests = 0
+        self._lock = threading.Lock()
+
+        for user, tweets in (timelines or {}).items():
+            self.add_tweets(user, tweets)
+
+        self._server = _ThreadingHTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def add_tweets(self, user, tweets):
+        """ Posts <tweets> (texts, oldest first) to <user>'s timeline. """
+        with self._lock:
+            timeline = self._timelines.setdefault(user.lstrip('@'), [])
+            for text in tweets:
+                timeline.append({'id'         : self._next_id,
+                                 'id_str'     : str(self._next_id),
+                                 'text'       : text,
+                                 'created_at' : time.strftime(
+                                     '%a %b %d %H:%M:%S +0000 %Y',
+                                     time.gmtime(1.5e9 + self._next_id))})
+                self._next_id += 1
+
+    def user_timeline(self, screen_name, count=20, since_id=None,
+                      max_id=None):
+        """ The statuses user_timeline would return, newest first, or None
+        for an unknown user.
+        """
+        with self._lock:
+            if screen_name not in self._timelines:
+                return None
+            timeline = self._timelines[screen_name]
+
+            page = []
+            for status in reversed(timeline):
+                if max_id is not None and status['id'] > max_id:
+                    continue
+                if since_id is not None and status['id'] <= since_id:
+                    break
+                page.append(status)
+                if len(page) == count:
+                    break
+            return page
+
+    def _rate_limited(self):
+        """ Counts a request; returns the reset time if it's over the limit.
+        """
+        with self._lock:
+            self.requests += 1
+            if self.rate_limit is None:
+                return None
+
+            now = time.time()
+            if now - self._window_start >= self.window:
+                self._window_start, self._window_requests = now, 0
+            self._window_requests += 1
+            if self._window_requests > self.rate_limit:
+                return self._window_start + self.window
+            return None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urllib.parse.urlparse(self.path)
+                if url.path != '/1.1/statuses/user_timeline.json':
+                    return self._respond(404, {'errors' : 'Not found.'})
+
+                if server.latency:
+                    time.sleep(server.latency)
+
+                reset = server._rate_limited()
+                if reset is not None:
+                    return self._respond(429,
+                                         {'errors' : 'Rate limit exceeded.'},
+                                         {'x-rate-limit-reset' :
+                                          str(int(reset) + 1)})
+
+                query = dict(urllib.parse.parse_qsl(url.query))
+                page = server.user_timeline(
+                            query.get('screen_name', ''),
+                            int(query.get('count', 20)),
+                            int(query['since_id']) if 'since_id' in query
+                            else None,
+                            int(query['max_id']) if 'max_id' in query
+                            else None)
+                if page is None:
+                    return self._respond(404, {'errors' : 'No such user.'})
+                self._respond(200, page)
+
+            def _respond(self, status, body, headers={}):
+                body = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
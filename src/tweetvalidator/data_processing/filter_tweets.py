@@ -3,6 +3,11 @@
 """
 Reads raw twitter output and filters based on a list of regular expressions.
 
+The expressions are compiled once and applied in sequence, since the order
+of removal matters.  A single alternation of all of them finds the tweets
+none of them match, which are passed through after one scan.  Files are
+processed across a pool of worker processes.
+
 June, 2019
 @author: Joshua Rubin
 """
@@ -10,9 +15,62 @@ June, 2019
 import os
 import re
 import json
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 CONFIG_PATH = "../../config.json" 
 
+class RegexFilter:
+    """ Removes the matches of a list of regular expressions from text, with
+    the same result as calling re.sub with each of them in turn.
+
+        Args:
+        filters (list): Regular expressions whose matches will be removed, in
+            order.
+    """
+    def __init__(self, filters):
+        self.filters = list(filters)
+        self.patterns = [re.compile(reFilter) for reFilter in self.filters]
+        self.combined = None
+
+    def combine(self):
+        """ Compiles a single alternation of all the filters, used to pass
+        tweets that none of them match through with one scan.  Tweets it
+        does match still go through sequential removal: removing the
+        alternation's matches directly can differ when the filters interact,
+        e.g. a hashtag directly followed by a URL, so the output is always
+        exactly that of sequential removal.
+
+        Returns:
+        bool: Whether the combined alternation is in use.
+        """
+        self.combined = None
+        # Capturing groups are renumbered in an alternation, which would
+        # break backreferences.
+        if (len(self.patterns) < 2
+                or any(pattern.groups for pattern in self.patterns[1:])):
+            return False
+
+        try:
+            self.combined = re.compile('|'.join(f'(?:{reFilter})'
+                                                for reFilter in self.filters))
+        except re.error:
+            return False
+        return True
+
+    def sequential(self, text):
+        """ Removes text matching each of the filters sequentially. """
+        for pattern in self.patterns:
+            text = pattern.sub('', text)
+        return text
+
+    def __call__(self, text):
+        # The alternation matches wherever any filter would, so text it
+        # doesn't match is left unchanged by all of them.
+        if self.combined is not None and self.combined.search(text) is None:
+            return text
+        return self.sequential(text)
+
 def filter_tweets_from_files(input_file_path, output_file_path,
                              filters, min_tweet_characters):
     """ Reads tweets from a json file of [[tweet, date],...], removes
@@ -22,10 +80,17 @@ def filter_tweets_from_files(input_file_path, output_file_path,
     Args:
         input_file_path (str):  where to look for user file
         output_file_path (str): where to deposit filtered file
-        filters (list): List of reg. expressions whose matches will be removed.
+        filters (list or RegexFilter): List of reg. expressions whose matches
+            will be removed.
         min_tweet_characters (int): Tweets with fewer characters will be
             deleted.
+
+    Returns:
+    int: number of tweets read.
     """
+    if not isinstance(filters, RegexFilter):
+        filters = RegexFilter(filters)
+
     output_tweets = []
     print('Processing ' + input_file_path + '.', end=' ')    
    
@@ -33,14 +98,8 @@ def filter_tweets_from_files(input_file_path, output_file_path,
         in_data =  json.loads(file.read())
     
     for tweet in in_data:
-        filtered_tweet = tweet[0]
-    
-        # Remove text matching each of the filters sequentially.
-        for reFilter in filters:
-            filtered_tweet = re.sub(reFilter,'', filtered_tweet)
-    
-        # Trim whitespace
-        filtered_tweet = filtered_tweet.strip()
+        # Remove text matching the filters, then trim whitespace.
+        filtered_tweet = filters(tweet[0]).strip()
         
         # Pitch if below min character threshold
         if len(filtered_tweet) >= min_tweet_characters:
@@ -48,11 +107,14 @@ def filter_tweets_from_files(input_file_path, output_file_path,
     
     print(str(len(output_tweets)), 'tweets processed.')
     
+    # One write of the encoded text; json.dump writes many small chunks.
     with open(output_file_path, 'w') as file:
-        json.dump(output_tweets, file) 
+        file.write(json.dumps(output_tweets))
+
+    return len(in_data)
 
 def filter_tweets_from_directories(input_directory_path, output_directory_path,
-                 filters, min_tweet_characters):
+                 filters, min_tweet_characters, workers = 1, combine = True):
     """Reads raw twitter output and filters based on a list of reg expressions.
     Files are json formatted lists of [tweet, date].
     
@@ -64,12 +126,49 @@ def filter_tweets_from_directories(input_directory_path, output_directory_path,
         filters (list): List of reg. expressions whose matches will be removed.
         min_tweet_characters (int): Tweets with fewer characters will be
             deleted.
+        workers (int): Processes to filter files with; None for one per CPU.
+            Defaults to 1, i.e. in this process.
+        combine (bool): Pass tweets no filter matches through after one scan
+            with a combined alternation of the filters (see
+            RegexFilter.combine).  Defaults to True.
+
+    Returns:
+    dict: 'files', 'tweets', 'seconds', 'tweets_per_second', and whether the
+        filters were 'combined'.
     """
     # Look for files beginning with @, i.e. twitter handles
     tweet_files = [f for f in os.listdir(input_directory_path) if f[0]=='@']
-        
-    for file_name in tweet_files:
-        input_file_path  = os.path.join(input_directory_path, file_name)
-        output_file_path = os.path.join(output_directory_path, file_name)
-        filter_tweets_from_files(input_file_path, output_file_path,
-                                 filters, min_tweet_characters)        
+    input_paths  = [os.path.join(input_directory_path, file_name)
+                    for file_name in tweet_files]
+    output_paths = [os.path.join(output_directory_path, file_name)
+                    for file_name in tweet_files]
+
+    workers = workers or os.cpu_count()
+
+    start = time.perf_counter()
+    regex_filter = RegexFilter(filters)
+    if combine:
+        regex_filter.combine()
+
+    if workers == 1:
+        n_tweets = sum(map(filter_tweets_from_files, input_paths, output_paths,
+                           [regex_filter] * len(tweet_files),
+                           [min_tweet_characters] * len(tweet_files)))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            n_tweets = sum(executor.map(filter_tweets_from_files,
+                                        input_paths, output_paths,
+                                        [regex_filter] * len(tweet_files),
+                                        [min_tweet_characters]
+                                        * len(tweet_files)))
+    seconds = time.perf_counter() - start
+
+    report = {'files'             : len(tweet_files),
+              'tweets'            : n_tweets,
+              'seconds'           : seconds,
+              'tweets_per_second' : n_tweets / seconds if seconds else 0.,
+              'combined'          : regex_filter.combined is not None}
+    print(f"Filtered {n_tweets} tweets from {len(tweet_files)} files in "
+          f"{seconds:.2f}s ({report['tweets_per_second']:,.0f} tweets/s, "
+          f"{'combined' if report['combined'] else 'sequential'} filters).")
+    return report
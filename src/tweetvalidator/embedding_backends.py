@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pluggable embedding backends: anything that maps a list of tweets to a 2D
+array of embeddings, for the embedding scripts, models and service.
+
+- 'use': the Universal Sentence Encoder (data_processing.SentenceEncoder).
+  Best quality, but needs TensorFlow and downloads its module on first use.
+- 'hashed_ngram': HashedNgramEncoder, character n-gram counts hashed and
+  randomly projected down to a dense, unit-length vector.  Needs only numpy,
+  scipy and sklearn, nothing to download and starts in milliseconds, so it
+  suits CI and offline/edge deployments, at some cost in accuracy.
+
+A backend is described by its config, a JSON-serializable dict naming the
+backend and the parameters that determine its embeddings, so models can save
+which backend they were characterized with and rebuild it on load.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import json
+import numpy as np
+
+class EmbeddingBackend:
+    """ Base class for embedding backends.  Subclasses implement
+    embed_phrases and get_config.
+    """
+    def embed_phrases(self, phrase_list):
+        """ Takes a array or list of phrases and returns a 2D array of
+        embeddings, one row per phrase.
+        """
+        raise NotImplementedError
+
+    def get_config(self):
+        """ Returns a dict with the backend name under 'backend' and the
+        constructor arguments that determine the embeddings; make_backend
+        rebuilds an equivalent backend from it.
+        """
+        raise NotImplementedError
+
+class HashedNgramEncoder(EmbeddingBackend):
+    """ Embeds text with a sparse random projection of hashed character
+    n-gram counts.
+
+    Each tweet's character n-grams (within word boundaries, lowercased) are
+    counted in a <n_features>-wide hashed space, log-scaled and normalized.
+    A fixed, seeded sparse random matrix (<nonzeros_per_feature> random +/-1
+    entries per n-gram) projects the counts down to <dim> dimensions, which
+    approximately preserves their cosine similarities; the result is
+    normalized to unit length, as the models expect.
+
+        Args:
+        dim (int): Embedding width.
+        n_features (int): Size of the hashed n-gram space.
+        ngram_range (tuple): Smallest and largest n-gram lengths.
+        nonzeros_per_feature (int): Projection entries per hashed n-gram.
+        random_state (int): Seed of the projection.
+    """
+    def __init__(self, dim=512, n_features=2**18, ngram_range=(3, 5),
+                 nonzeros_per_feature=4, random_state=0):
+        self.dim = dim
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.nonzeros_per_feature = nonzeros_per_feature
+        self.random_state = random_state
+
+        # Imported here so importing the backends stays cheap.
+        import scipy.sparse as sp
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.vectorizer = HashingVectorizer(analyzer='char_wb',
+                                            ngram_range=self.ngram_range,
+                                            n_features=n_features,
+                                            alternate_sign=False, norm=None,
+                                            dtype=np.float32)
+
+        rng  = np.random.RandomState(random_state)
+        size = n_features * nonzeros_per_feature
+        rows = np.repeat(np.arange(n_features), nonzeros_per_feature)
+        cols = rng.randint(dim, size=size)
+        vals = (rng.choice([-1., 1.], size=size)
+                / np.sqrt(nonzeros_per_feature)).astype(np.float32)
+        self.projection = sp.csr_matrix((vals, (rows, cols)),
+                                        shape=(n_features, dim))
+
+    def get_config(self):
+        return {'backend'              : 'hashed_ngram',
+                'dim'                  : self.dim,
+                'n_features'           : self.n_features,
+                'ngram_range'          : list(self.ngram_range),
+                'nonzeros_per_feature' : self.nonzeros_per_feature,
+                'random_state'         : self.random_state}
+
+    def embed_phrases(self, phrase_list):
+        """ Takes a array or list of phrases and returns a 2D float32 array
+        of unit-length embeddings.
+        """
+        phrase_list = list(phrase_list)
+        if not phrase_list:
+            return np.zeros((0, self.dim), dtype=np.float32)
+
+        counts = self.vectorizer.transform(phrase_list)
+        counts.data = np.log1p(counts.data)
+
+        embeddings = np.asarray(counts.dot(self.projection).todense(),
+                                dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, np.finfo(np.float32).tiny)
+
+def _sentence_encoder(**kwargs):
+    # TensorFlow is only imported when USE is actually wanted.
+    from .data_processing.embed_tweets import SentenceEncoder
+    return SentenceEncoder(**kwargs)
+
+# Backend name -> constructor.
+BACKENDS = {'use'          : _sentence_encoder,
+            'hashed_ngram' : HashedNgramEncoder}
+
+# Backends built by make_backend, by config; they're stateless once built, so
+# models sharing a config share one (e.g. one resident USE session).
+_shared_backends = {}
+
+def make_backend(config):
+    """ Builds (or reuses) the backend a config describes.
+
+    Args:
+    config (str or dict): A backend name, or a dict with the name under
+        'backend' and any constructor arguments, as from get_config.
+
+    Returns:
+    EmbeddingBackend: the backend.
+    """
+    if isinstance(config, str):
+        config = {'backend' : config}
+
+    config = dict(config)
+    name = config.pop('backend')
+    if name not in BACKENDS:
+        raise ValueError(f'Unknown embedding backend {name}; expected one of '
+                         f'{sorted(BACKENDS)}.')
+
+    key = json.dumps([name, config], sort_keys=True)
+    if key not in _shared_backends:
+        _shared_backends[key] = BACKENDS[name](**config)
+    return _shared_backends[key]
+
+def backend_config(backend):
+    """ Config of a backend, or of the backend a config/name describes. """
+    if isinstance(backend, EmbeddingBackend):
+        return backend.get_config()
+    if isinstance(backend, str):
+        return {'backend' : backend}
+    return dict(backend)
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Provides EmbeddingCache, a persistent, content-addressed cache of tweet
+embeddings, so that re-running the embedding step only encodes tweets it
+hasn't seen before.
+
+Entries are keyed by a 16-byte hash of the normalized tweet text, in a
+separate subdirectory per embedding model (URL), which holds:
+
+    meta.json     model URL and embedding width
+    keys.bin      concatenated 16-byte text hashes, one per entry
+    vectors.f32   float32 embeddings, one row per entry, in the same order
+
+Both data files are append-only, so adding entries never rewrites the
+cache; the hash index is rebuilt in memory on open.  Once there are more
+than max_entries entries, the cache is compacted to the entries used most
+recently.  Compaction writes entries in order of last use, and later rows
+count as more recent on ties, so recency survives reopening (which resets
+the in-memory use counts).  One process should write to a cache directory at
+a time.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import re
+import json
+import hashlib
+import unicodedata
+import numpy as np
+
+KEY_BYTES    = 16
+VECTOR_DTYPE = np.float32
+
+KEYS_FILE    = 'keys.bin'
+VECTORS_FILE = 'vectors.f32'
+META_FILE    = 'meta.json'
+
+# Misses encoded per call to the encoder.
+ENCODE_BATCH_SIZE = 1024
+
+# Compaction keeps this fraction of max_entries, so it isn't triggered again
+# by the next few additions.
+COMPACT_FRACTION = 0.9
+
+WHITESPACE = re.compile(r'\s+')
+
+def normalize_text(text):
+    """ Canonical form of a tweet for cache keys: Unicode NFC with runs of
+    whitespace collapsed and the ends stripped, so trivially different
+    copies of a tweet share an entry.
+    """
+    return WHITESPACE.sub(' ', unicodedata.normalize('NFC', text)).strip()
+
+def text_key(text):
+    """ 16-byte hash of the normalized <text>. """
+    return hashlib.blake2b(normalize_text(text).encode('utf-8'),
+                           digest_size=KEY_BYTES).digest()
+
+def model_directory_name(model_url):
+    """ Subdirectory name for a model's entries. """
+    return hashlib.blake2b(model_url.encode('utf-8'),
+                           digest_size=8).hexdigest()
+
+class EmbeddingCache:
+    """ Persistent embedding cache for one embedding model.
+
+        Args:
+        directory (str): Cache directory; shared by all models, each in its
+            own subdirectory.  Created if missing.
+        model_url (str): Identifies the embedding model, e.g. its TF Hub URL.
+        max_entries (int): Compact to the most recently used entries when
+            there are more than this many.  Defaults to one million (about
+            2GB of 512-wide embeddings).
+    """
+    def __init__(self, directory, model_url, max_entries=1000000):
+        self.model_url = model_url
+        self.max_entries = max_entries
+        self.path = os.path.join(directory, model_directory_name(model_url))
+        self.hits = 0
+        self.misses = 0
+
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+
+        self.dim = None
+        meta_path = os.path.join(self.path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r') as file:
+                self.dim = json.loads(file.read())['dim']
+
+        self._load_index()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _load_index(self):
+        """ Reads the key file into a hash -> row dict.  Rows without a
+        complete vector (e.g. after an interrupted write) are ignored.
+        """
+        keys = b''
+        if os.path.exists(self._file(KEYS_FILE)):
+            with open(self._file(KEYS_FILE), 'rb') as file:
+                keys = file.read()
+
+        n_rows = len(keys) // KEY_BYTES
+        if self.dim:
+            vector_bytes = (os.path.getsize(self._file(VECTORS_FILE))
+                            if os.path.exists(self._file(VECTORS_FILE)) else 0)
+            n_rows = min(n_rows, vector_bytes // (4 * self.dim))
+        else:
+            n_rows = 0
+
+        self.index = {keys[row * KEY_BYTES:(row + 1) * KEY_BYTES] : row
+                      for row in range(n_rows)}
+        self.n_rows = n_rows
+        # Last use of each row, by a counter of lookups.
+        self.last_used = np.zeros(n_rows, dtype=np.int64)
+        self._clock = 0
+        self._vectors = None
+
+    def __len__(self):
+        return len(self.index)
+
+    def _vector_rows(self, rows):
+        """ Reads embedding rows through a (refreshed) memory map. """
+        if self._vectors is None or len(self._vectors) < self.n_rows:
+            self._vectors = np.memmap(self._file(VECTORS_FILE),
+                                      dtype=VECTOR_DTYPE, mode='r',
+                                      shape=(self.n_rows, self.dim))
+        return np.asarray(self._vectors[rows])
+
+    def lookup(self, keys):
+        """ Finds cached embeddings for a list of keys (see text_key).
+
+        Returns:
+        tuple: (2D array of embeddings for the keys found, or None if the
+            cache is empty; boolean mask of which keys were found).
+        """
+        rows = np.array([self.index.get(key, -1) for key in keys],
+                        dtype=np.int64)
+        found = rows >= 0
+
+        if not found.any():
+            return None, found
+
+        self._clock += 1
+        self.last_used[rows[found]] = self._clock
+        return self._vector_rows(rows[found]), found
+
+    def add(self, keys, embeddings):
+        """ Appends new entries; keys already cached are skipped. """
+        embeddings = np.ascontiguousarray(embeddings, dtype=VECTOR_DTYPE)
+
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+            with open(self._file(META_FILE), 'w') as file:
+                json.dump({'model_url' : self.model_url, 'dim' : self.dim},
+                          file)
+        elif embeddings.shape[1] != self.dim:
+            raise ValueError(f'Embeddings are {embeddings.shape[1]} wide; '
+                             f'this cache holds {self.dim}.')
+
+        new = []
+        for idx, key in enumerate(keys):
+            if key not in self.index:
+                self.index[key] = self.n_rows + len(new)
+                new.append(idx)
+        if not new:
+            return
+
+        # Vectors before keys, so a key always has its vector on disk.
+        with open(self._file(VECTORS_FILE), 'ab') as file:
+            file.write(embeddings[new].tobytes())
+        with open(self._file(KEYS_FILE), 'ab') as file:
+            file.write(b''.join(keys[idx] for idx in new))
+
+        self.n_rows += len(new)
+        self._clock += 1
+        self.last_used = np.concatenate((self.last_used,
+                                         np.full(len(new), self._clock)))
+
+        if self.n_rows > self.max_entries:
+            self.compact(int(self.max_entries * COMPACT_FRACTION))
+
+    def compact(self, n_keep):
+        """ Rewrites the cache with only the <n_keep> most recently used
+        entries, the later row winning ties, in order of last use.
+        """
+        keys = [None] * self.n_rows
+        for key, row in self.index.items():
+            keys[row] = key
+
+        # Least to most recently used, by last use and then row.
+        rows = np.arange(self.n_rows)
+        by_use = np.lexsort((rows, self.last_used[:self.n_rows]))
+        keep = by_use[len(by_use) - min(n_keep, len(by_use)):]
+        vectors = self._vector_rows(keep)
+
+        for name, data in [(VECTORS_FILE, vectors.tobytes()),
+                           (KEYS_FILE, b''.join(keys[row] for row in keep))]:
+            with open(self._file(name + '.tmp'), 'wb') as file:
+                file.write(data)
+        self._vectors = None
+        os.replace(self._file(VECTORS_FILE + '.tmp'), self._file(VECTORS_FILE))
+        os.replace(self._file(KEYS_FILE + '.tmp'), self._file(KEYS_FILE))
+
+        last_used = self.last_used[keep]
+        self._load_index()
+        self.last_used = last_used
+
+    def embed(self, texts, encode, batch_size=ENCODE_BATCH_SIZE):
+        """ Embeds <texts>, encoding only those not already cached.  Texts
+        that normalize to the same string are encoded once.
+
+        Args:
+        texts (list of str): Texts to embed.
+        encode (callable): Maps a list of texts to a 2D array of
+            embeddings; called for cache misses, <batch_size> at a time.
+        batch_size (int): Most texts per encode call.
+
+        Returns:
+        2D float32 numpy array: one embedding per text.
+        """
+        keys = [text_key(text) for text in texts]
+
+        # First occurrence of each distinct key.
+        first = {}
+        for idx, key in enumerate(keys):
+            first.setdefault(key, idx)
+        unique_keys = list(first)
+        positions = np.array([first[key] for key in unique_keys], dtype=np.intp)
+
+        found_vectors, found = self.lookup(unique_keys)
+        missing = np.flatnonzero(~found)
+        self.hits += int(found.sum())
+        self.misses += len(missing)
+
+        unique_vectors = None
+        if found_vectors is not None:
+            unique_vectors = np.empty((len(unique_keys), self.dim),
+                                      dtype=VECTOR_DTYPE)
+            unique_vectors[found] = found_vectors
+
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            encoded = np.asarray(encode([texts[positions[i]] for i in batch]),
+                                 dtype=VECTOR_DTYPE)
+            self.add([unique_keys[i] for i in batch], encoded)
+
+            if unique_vectors is None:
+                unique_vectors = np.empty((len(unique_keys), encoded.shape[1]),
+                                          dtype=VECTOR_DTYPE)
+            unique_vectors[batch] = encoded
+
+        if unique_vectors is None:
+            return np.zeros((0, self.dim or 0), dtype=VECTOR_DTYPE)
+
+        key_position = {key : idx for idx, key in enumerate(unique_keys)}
+        return unique_vectors[[key_position[key] for key in keys]]
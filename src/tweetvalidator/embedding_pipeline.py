@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Embeds many preprocessed user files with reading, encoding and writing
+overlapped in three stages connected by bounded queues:
+
+    reader thread   parses upcoming files and cuts them into batches
+    encoder         (calling thread) runs embed_phrases on each batch
+    writer thread   serializes and writes each batch as it's encoded
+
+The encoder stays busy while the next batch is parsed and the last one is
+written, and the bounded queues keep at most a few batches in memory.  Each
+stage's utilization (the fraction of the run it spent working rather than
+waiting on a queue) is reported, to show which stage limits throughput and
+how to size encoder thread pools (see SentenceEncoder's intra_op_threads and
+inter_op_threads).
+
+Output goes to the binary embedding store or to processed JSON files, in the
+same formats as embedding_store.embed_file_to_store/embed_file_to_json.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import time
+import queue
+import threading
+import numpy as np
+from itertools import islice
+from .embedding_store import (iter_json_array, EMBED_BATCH_SIZE,
+                              EMBEDDING_DTYPE, _StoreSink, _JSONSink)
+
+# Batches buffered between stages.
+QUEUE_BATCHES = 4
+
+# How often a blocked stage checks whether another stage has failed.
+POLL_SECONDS = 0.1
+
+class StageTimer:
+    """ Accumulates the time a pipeline stage spends working. """
+    def __init__(self):
+        self.busy = 0.
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.busy += time.perf_counter() - self._start
+
+class _Stopped(Exception):
+    """ Raised in a stage when another stage has failed. """
+
+def _put(out_queue, item, stop):
+    while True:
+        if stop.is_set():
+            raise _Stopped
+        try:
+            out_queue.put(item, timeout=POLL_SECONDS)
+            return
+        except queue.Full:
+            pass
+
+def _get(in_queue, stop):
+    while True:
+        if stop.is_set():
+            raise _Stopped
+        try:
+            return in_queue.get(timeout=POLL_SECONDS)
+        except queue.Empty:
+            pass
+
+def _is_embedded(input_file_path, sink):
+    """ True if <sink>'s output is complete and newer than the input. """
+    return (os.path.exists(sink.output_path)
+            and os.path.getmtime(sink.output_path)
+                >= os.path.getmtime(input_file_path))
+
+def embed_files_pipelined(input_file_paths, output_directory_path,
+                          embed_phrases, batch_size = EMBED_BATCH_SIZE,
+                          store = False, queue_batches = QUEUE_BATCHES):
+    """ Embeds preprocessed user files with reading, encoding and writing
+    running concurrently.
+
+    Args:
+    input_file_paths (list of str): Preprocessed user files, e.g.
+        @MrPeanut.json.
+    output_directory_path (str): Where to write processed JSON files (or the
+        embedding store, with <store>).
+    embed_phrases (callable): Maps a list of tweets to a 2D array of
+        embeddings, e.g. SentenceEncoder.embed_phrases.
+    batch_size (int): Tweets per encoder call.
+    store (bool): Write the binary embedding store rather than JSON.
+    queue_batches (int): Batches buffered between stages.
+
+    Returns:
+    dict: 'tweets', 'seconds', 'tweets_per_second', and the utilization
+        (busy fraction of the run) of the 'read', 'encode' and 'write'
+        stages.
+    """
+    def make_sink(input_file_path):
+        if store:
+            user = os.path.basename(input_file_path).split('.')[0]
+            return _StoreSink(output_directory_path, user)
+        return _JSONSink(os.path.join(output_directory_path,
+                                      os.path.basename(input_file_path)))
+
+    timers = {'read' : StageTimer(), 'encode' : StageTimer(),
+              'write' : StageTimer()}
+    read_queue  = queue.Queue(maxsize=queue_batches)
+    write_queue = queue.Queue(maxsize=queue_batches)
+    stop = threading.Event()
+    errors = []
+
+    # Messages between stages: ('start', path, n_rows), ('batch', rows) with
+    # embeddings added by the encoder, ('end', path), then None when done.
+    def read():
+        for input_file_path in input_file_paths:
+            if _is_embedded(input_file_path, make_sink(input_file_path)):
+                print(f'Skipping {input_file_path}; already embedded.')
+                continue
+
+            with timers['read']:
+                n_rows = sum(1 for _ in iter_json_array(input_file_path))
+            _put(read_queue, ('start', input_file_path, n_rows), stop)
+
+            rows = iter_json_array(input_file_path)
+            while True:
+                with timers['read']:
+                    batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                _put(read_queue, ('batch', batch), stop)
+
+            _put(read_queue, ('end', input_file_path), stop)
+        _put(read_queue, None, stop)
+
+    def write():
+        sink, rows_done = None, 0
+        while True:
+            message = _get(write_queue, stop)
+            if message is None:
+                return
+
+            with timers['write']:
+                if message[0] == 'start':
+                    _, input_file_path, n_rows = message
+                    sink, rows_done = make_sink(input_file_path), 0
+                    sink.open(n_rows, None)
+                elif message[0] == 'batch':
+                    _, rows, embeddings = message
+                    sink.write(rows_done, rows, embeddings)
+                    rows_done += len(rows)
+                else:
+                    sink.finish(message[1])
+                    print(f'Embedded {message[1]}; {rows_done} tweets.')
+
+    def run_stage(stage):
+        try:
+            stage()
+        except _Stopped:
+            pass
+        except BaseException as error:
+            errors.append(error)
+            stop.set()
+
+    threads = [threading.Thread(target=run_stage, args=(stage,), daemon=True)
+               for stage in [read, write]]
+
+    n_tweets = 0
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            message = _get(read_queue, stop)
+            if message is not None and message[0] == 'batch':
+                rows = message[1]
+                with timers['encode']:
+                    embeddings = np.asarray(
+                                    embed_phrases([row[0] for row in rows]),
+                                    dtype=EMBEDDING_DTYPE)
+                message = ('batch', rows, embeddings)
+                n_tweets += len(rows)
+            _put(write_queue, message, stop)
+            if message is None:
+                break
+    except _Stopped:
+        pass
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+
+    seconds = time.perf_counter() - start
+    report = {'tweets'            : n_tweets,
+              'seconds'           : seconds,
+              'tweets_per_second' : n_tweets / seconds if seconds else 0.}
+    report.update({stage : timer.busy / seconds if seconds else 0.
+                   for stage, timer in timers.items()})
+    return report
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Binary embedding store for processed tweet data.
+
+Each user is stored as two files in a store directory:
+
+    <user>.npy          float32 (n_tweets x embedding_dim) matrix in standard
+                        numpy format, so it can be memory-mapped on load.
+    <user>.tweets.json  [[tweet, date],...] in the same layout as the
+                        preprocessed data files.
+
+Compared with the JSON processed files (where every embedding is a list of
+decimal strings) this is roughly a fifth of the size on disk and loading is
+a memory-map rather than a parse.  Also provides converters from the JSON
+processed format, and streaming embedding of preprocessed files into either
+format in batches, with bounded memory and resumable progress.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import json
+import numpy as np
+import pandas as pd
+from itertools import islice
+from numpy.lib.format import open_memmap
+
+EMBEDDING_SUFFIX = '.npy'
+TWEETS_SUFFIX    = '.tweets.json'
+EMBEDDING_DTYPE  = np.float32
+PARTIAL_SUFFIX   = '.partial'
+PROGRESS_SUFFIX  = '.progress.json'
+
+# Characters read at a time when streaming JSON arrays.
+READ_CHUNK_CHARS = 1 << 16
+
+# Tweets embedded per encoder call when streaming.
+EMBED_BATCH_SIZE = 1024
+
+def work_file_path(path, suffix):
+    """ Path of a work file (partial output or progress) for <path>.  It
+    starts with '.', so listings of '@' user files never pick it up.
+    """
+    directory_path, file_name = os.path.split(path)
+    return os.path.join(directory_path, '.' + file_name + suffix)
+
+def store_file_paths(directory_path, user):
+    """ Returns the (embedding path, tweet side-file path) for <user>. """
+    return (os.path.join(directory_path, user + EMBEDDING_SUFFIX),
+            os.path.join(directory_path, user + TWEETS_SUFFIX))
+
+def is_embedding_store(directory_path):
+    """ True if <directory_path> holds embedding store files. """
+    return len(list_store_users(directory_path)) > 0
+
+def list_store_users(directory_path):
+    """ Lists the users (files starting with '@') in a store directory. """
+    return sorted(f[:-len(EMBEDDING_SUFFIX)]
+                  for f in os.listdir(directory_path)
+                  if f[0] == '@' and f.endswith(EMBEDDING_SUFFIX))
+
+def write_user_store(directory_path, user, tweets, dates, embeddings):
+    """ Writes one user's tweets and embeddings to the store.
+
+    Args:
+    directory_path (str): Store directory.
+    user (str): Twitter handle, e.g. @MrPeanut.
+    tweets (list of str): Tweet text.
+    dates (list of str): Tweet dates, matched to <tweets>.
+    embeddings (2D array-like): One embedding row per tweet.
+    """
+    embeddings = np.asarray(embeddings, dtype=EMBEDDING_DTYPE)
+
+    if len(embeddings) != len(tweets) or len(tweets) != len(dates):
+        raise ValueError(f'Mismatched tweet/date/embedding counts for {user}.')
+
+    embedding_path, tweets_path = store_file_paths(directory_path, user)
+
+    np.save(embedding_path, np.ascontiguousarray(embeddings))
+
+    with open(tweets_path, 'w') as file:
+        json.dump([[t, d] for t, d in zip(tweets, dates)], file)
+
+def read_user_store(directory_path, user, mmap_mode='r'):
+    """ Reads one user from the store without copying the embeddings.
+
+    Args:
+    directory_path (str): Store directory.
+    user (str): Twitter handle, e.g. @MrPeanut.
+    mmap_mode (str or None): Passed to np.load.  Defaults to 'r' so the
+        matrix is paged in from disk on demand; None reads it into memory.
+
+    Returns:
+    tuple: (DataFrame with 'tweet' and 'date' columns,
+            2D float32 array of embeddings with matching rows)
+    """
+    embedding_path, tweets_path = store_file_paths(directory_path, user)
+
+    embeddings = np.load(embedding_path, mmap_mode=mmap_mode)
+
+    with open(tweets_path, 'r') as file:
+        tweets = json.loads(file.read())
+
+    frame = pd.DataFrame(tweets, columns=['tweet', 'date'])
+
+    if len(frame) != len(embeddings):
+        raise ValueError(f'Corrupt embedding store entry for {user}: '
+                         f'{len(frame)} tweets, {len(embeddings)} embeddings.')
+
+    return frame, embeddings
+
+def load_user_frame(directory_path, user, mmap_mode='r'):
+    """ Reads one user from the store into the same columns produced by
+    evaluate_model.load_tweets_from_directory: tweet, date, embedding, name.
+    Each 'embedding' cell is a row view into the (memory-mapped) matrix.
+    """
+    frame, embeddings = read_user_store(directory_path, user, mmap_mode)
+    frame['embedding'] = list(embeddings)
+    frame['name'] = user
+    return frame
+
+def convert_json_to_store(input_file_path, output_directory_path):
+    """ Converts one JSON processed file of [[tweet, date, embedding],...]
+    into the store format.
+
+    Args:
+    input_file_path (str): Path to a processed user file, e.g. @MrPeanut.json
+    output_directory_path (str): Store directory to write to.
+    """
+    with open(input_file_path, 'r') as file:
+        in_data = json.loads(file.read())
+
+    user = os.path.basename(input_file_path).split('.')[0]
+
+    tweets = [row[0] for row in in_data]
+    dates  = [row[1] for row in in_data]
+    embeddings = np.array([row[2] for row in in_data], dtype=EMBEDDING_DTYPE)
+
+    write_user_store(output_directory_path, user, tweets, dates, embeddings)
+    print(f'Converted {input_file_path}; {len(tweets)} tweets.')
+
+def convert_directory_to_store(input_directory_path, output_directory_path):
+    """ Converts all of the JSON processed files (starting with '@') in
+    <input_directory_path> into store files in <output_directory_path>.
+    """
+    if not os.path.isdir(output_directory_path):
+        os.makedirs(output_directory_path)
+
+    tweet_files = [f for f in os.listdir(input_directory_path)
+                   if f[0] == '@' and f.endswith('.json')]
+
+    for file_name in tweet_files:
+        convert_json_to_store(os.path.join(input_directory_path, file_name),
+                              output_directory_path)
+
+def iter_json_array(file_path, chunk_chars=READ_CHUNK_CHARS):
+    """ Yields the elements of the top-level JSON array in <file_path> one at
+    a time, reading <chunk_chars> characters at a time, so a large file of
+    [[tweet, date],...] never has to be held in memory.
+    """
+    decoder = json.JSONDecoder()
+
+    with open(file_path, 'r') as file:
+        buffer, pos, at_eof = '', 0, False
+
+        def skip(chars):
+            """ Skips <chars>, reading more as needed; returns the next
+            character, or '' at the end of the file. """
+            nonlocal buffer, pos, at_eof
+            while True:
+                while pos < len(buffer) and buffer[pos] in chars:
+                    pos += 1
+                if pos < len(buffer) or at_eof:
+                    return buffer[pos:pos + 1]
+                chunk = file.read(chunk_chars)
+                at_eof = not chunk
+                buffer, pos = chunk, 0
+
+        if skip(' \t\r\n') != '[':
+            raise ValueError(f'{file_path} does not hold a JSON array.')
+        pos += 1
+
+        while True:
+            next_char = skip(' \t\r\n,')
+            if next_char == ']':
+                return
+            if next_char == '':
+                raise ValueError(f'{file_path} ends inside its JSON array.')
+
+            try:
+                element, end = decoder.raw_decode(buffer, pos)
+                error = None
+            except json.JSONDecodeError as decode_error:
+                end, error = None, decode_error
+
+            # The element may be cut off at the end of the buffer.
+            if error is not None or (end == len(buffer) and not at_eof):
+                chunk = file.read(chunk_chars)
+                if chunk:
+                    buffer, pos = buffer[pos:] + chunk, 0
+                    continue
+                at_eof = True
+                if error is not None:
+                    raise error
+
+            yield element
+            pos = end
+
+def embed_file_to_store(input_file_path, directory_path, embed_phrases,
+                        batch_size=EMBED_BATCH_SIZE, resume=True):
+    """ Embeds a preprocessed user file of [[tweet, date],...] into the store,
+    <batch_size> tweets at a time.  Each batch's embeddings are written into
+    a preallocated memory-mapped matrix as soon as they're computed, so peak
+    memory depends on the batch size rather than the file size.
+
+    Progress is recorded after every batch; with <resume>, a rerun after an
+    interruption continues from the last completed batch (provided the
+    input file hasn't changed), and a user already embedded from the current
+    input is skipped.  The user only appears in the store once complete.
+
+    Args:
+    input_file_path (str): Preprocessed user file, e.g. @MrPeanut.json.
+    directory_path (str): Store directory to write to.
+    embed_phrases (callable): Maps a list of tweets to a 2D array of
+        embeddings, e.g. SentenceEncoder.embed_phrases.
+    batch_size (int): Tweets embedded per call.
+    resume (bool): Continue an interrupted run rather than starting over.
+    """
+    user = os.path.basename(input_file_path).split('.')[0]
+    _embed_file(input_file_path, _StoreSink(directory_path, user),
+                embed_phrases, batch_size, resume)
+
+def embed_file_to_json(input_file_path, output_file_path, embed_phrases,
+                       batch_size=EMBED_BATCH_SIZE, resume=True):
+    """ As embed_file_to_store, but appends [tweet, date, embedding] rows to
+    a processed JSON file at <output_file_path>.
+    """
+    _embed_file(input_file_path, _JSONSink(output_file_path),
+                embed_phrases, batch_size, resume)
+
+def _embed_file(input_file_path, sink, embed_phrases, batch_size, resume):
+    """ Streams batches of tweets from <input_file_path> through
+    <embed_phrases> into <sink>, recording progress after each batch.
+    """
+    progress_path = work_file_path(sink.output_path, PROGRESS_SUFFIX)
+
+    # Progress only applies to the input it was recorded for.
+    stat = os.stat(input_file_path)
+    source = {'input_size' : stat.st_size, 'input_mtime' : stat.st_mtime}
+
+    if (resume and not os.path.exists(progress_path)
+            and os.path.exists(sink.output_path)
+            and os.path.getmtime(sink.output_path) >= stat.st_mtime):
+        print(f'Skipping {input_file_path}; already embedded.')
+        return
+
+    state = None
+    if resume and os.path.exists(progress_path):
+        with open(progress_path, 'r') as file:
+            state = json.loads(file.read())
+        if any(state.get(key) != value for key, value in source.items()):
+            state = None
+
+    n_rows = (state['n_rows'] if state is not None
+              else sum(1 for _ in iter_json_array(input_file_path)))
+
+    rows_done = sink.open(n_rows, state)
+    if rows_done:
+        print(f'Resuming {input_file_path} at tweet {rows_done} of {n_rows}.')
+
+    rows = islice(iter_json_array(input_file_path), rows_done, None)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+
+        embeddings = np.asarray(embed_phrases([row[0] for row in batch]),
+                                dtype=EMBEDDING_DTYPE)
+        sink_state = sink.write(rows_done, batch, embeddings)
+        rows_done += len(batch)
+
+        state = dict(source, n_rows=n_rows, rows_done=rows_done, **sink_state)
+        with open(progress_path + PARTIAL_SUFFIX, 'w') as file:
+            json.dump(state, file)
+        os.replace(progress_path + PARTIAL_SUFFIX, progress_path)
+
+        print(f'\t{rows_done}/{n_rows} tweets embedded.')
+
+    sink.finish(input_file_path)
+    if os.path.exists(progress_path):
+        os.remove(progress_path)
+    print(f'Embedded {input_file_path}; {n_rows} tweets.')
+
+class _StoreSink:
+    """ Writes embeddings into a preallocated, memory-mapped .npy file for
+    one user of a store directory, and the tweet side file once complete.
+    """
+    def __init__(self, directory_path, user):
+        self.output_path, self.tweets_path = store_file_paths(directory_path,
+                                                              user)
+        self.partial_path = work_file_path(self.output_path, PARTIAL_SUFFIX)
+        self.matrix = None
+
+    def open(self, n_rows, state):
+        """ Returns the number of rows already written, per <state>. """
+        self.n_rows = n_rows
+        if state is not None and os.path.exists(self.partial_path):
+            self.matrix = open_memmap(self.partial_path, mode='r+')
+            return state['rows_done']
+        return 0
+
+    def write(self, start, rows, embeddings):
+        # Embedding width isn't known until the first batch.
+        if self.matrix is None:
+            self.matrix = open_memmap(self.partial_path, mode='w+',
+                                      dtype=EMBEDDING_DTYPE,
+                                      shape=(self.n_rows, embeddings.shape[1]))
+        self.matrix[start:start + len(embeddings)] = embeddings
+        self.matrix.flush()
+        return {}
+
+    def finish(self, input_file_path):
+        # Side file first, since the .npy is what marks the user as stored.
+        tweets_partial_path = work_file_path(self.tweets_path, PARTIAL_SUFFIX)
+        _write_json_array(tweets_partial_path,
+                          (row[:2]
+                           for row in iter_json_array(input_file_path)))
+        os.replace(tweets_partial_path, self.tweets_path)
+
+        if self.matrix is None:
+            # An empty user.  Through a file, since np.save would add .npy to
+            # the partial path.
+            with open(self.partial_path, 'wb') as file:
+                np.save(file, np.zeros((0, 0), EMBEDDING_DTYPE))
+        self.matrix = None
+        os.replace(self.partial_path, self.output_path)
+
+class _JSONSink:
+    """ Appends [tweet, date, embedding] rows to a processed JSON file. """
+    def __init__(self, output_file_path):
+        self.output_path = output_file_path
+        self.partial_path = work_file_path(output_file_path, PARTIAL_SUFFIX)
+        self.file = None
+
+    def open(self, n_rows, state):
+        """ Returns the number of rows already written, per <state>. """
+        if state is not None and os.path.exists(self.partial_path):
+            # Drop anything written after the last recorded batch.
+            self.file = open(self.partial_path, 'r+')
+            self.file.seek(state['offset'])
+            self.file.truncate()
+            return state['rows_done']
+
+        self.file = open(self.partial_path, 'w')
+        self.file.write('[')
+        return 0
+
+    def write(self, start, rows, embeddings):
+        # Formatted as embed_tweets_from_file writes whole files.
+        data = pd.DataFrame([row[:2] for row in rows],
+                            columns=['tweet', 'date'])
+        data['embeddings'] = embeddings.tolist()
+
+        self.file.write(('' if start == 0 else ',')
+                        + data.to_json(orient='values')[1:-1])
+        self.file.flush()
+        return {'offset' : self.file.tell()}
+
+    def finish(self, input_file_path):
+        self.file.write(']')
+        self.file.close()
+        os.replace(self.partial_path, self.output_path)
+
+def _write_json_array(file_path, elements):
+    """ Writes an iterable as a JSON array one element at a time. """
+    with open(file_path, 'w') as file:
+        file.write('[')
+        for idx, element in enumerate(elements):
+            file.write((',' if idx else '') + json.dumps(element))
+        file.write(']')
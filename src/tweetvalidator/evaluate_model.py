@@ -8,36 +8,74 @@ June, 2019
 """
 
 import os
+import copy
 import json
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
+from .embedding_store import (is_embedding_store,
+                              list_store_users,
+                              load_user_frame)
+from .score_store import write_score_store
+
+def load_tweets(directory_path):
+    """ Pull in all tweet data by user from <directory_path>.
+
+    Args:
+    directory_path (str): Location of pre-embedded json user files, or of an
+        embedding store (see tweetvalidator.embedding_store), in which case
+        embeddings are memory-mapped rather than parsed.
+
+    Returns:
+    DataFrame: tweet, date, embedding and (user) name columns, users in
+        sorted order whichever the format, so a seeded split is the same.
+    """
+    frames = []
+    if is_embedding_store(directory_path):
+        for user in list_store_users(directory_path):
+            frames.append(load_user_frame(directory_path, user))
+    else:
+        for file in sorted(os.listdir(directory_path),
+                           key=lambda file: file.split('.')[0]):
+            if file[0] == '@':
+                newFrame = pd.read_json(os.path.join(directory_path,file))
+                newFrame.columns = ['tweet','date','embedding']
+                newFrame['name'] = file.split('.')[0]
+                frames.append(newFrame)
+        
+    return pd.concat(frames)
 
 def load_tweets_from_directory(directory_path, split_frac = 0.4,
-                               random_state = None):
+                               random_state = None, dataset_cache = None,
+                               stratify = False):
     """ Pull in tweet data by user from <directory_path>, shuffle, split.
         
     Args:
-    directory_path (str): Location of pre-embedded json user files.
+    directory_path (str): Location of pre-embedded json user files or of an
+        embedding store; see load_tweets.
     split_frac (float): train/test split fraction. Defaults to 0.4.
     random_state (None or int): Optionally set the random seed for the shuffle.
         Defaults to None.
+    dataset_cache (str): Optionally read the data through a cached columnar
+        copy in this directory and reuse the split stored there (see
+        evaluation_data.load_split).  Defaults to None.
+    stratify (bool): Give every user the same fraction of test tweets.
+        Defaults to False.
     
     Returns:
     tuple: train and test dataframes
     """
-    frames = []
-    for file in os.listdir(directory_path):
-        if file[0] == '@':
-            newFrame = pd.read_json(os.path.join(directory_path,file))
-            newFrame.columns = ['tweet','date','embedding']
-            newFrame['name'] = file.split('.')[0]
-            frames.append(newFrame)
-        
-    allData = pd.concat(frames)
+    if dataset_cache is not None:
+        from .evaluation_data import load_split
+        return load_split(directory_path, dataset_cache, split_frac,
+                          random_state, stratify)
+
+    from sklearn.model_selection import train_test_split
+
+    allData = load_tweets(directory_path)
 
     return train_test_split(allData, test_size = split_frac,
-                                            random_state = random_state)
+                            random_state = random_state,
+                            stratify = allData['name'] if stratify else None)
 
 # From https://stackoverflow.com/a/47626762/1306026; thanks!
 class NumpyEncoder(json.JSONEncoder):
@@ -59,16 +97,121 @@ def safe_mkdir(dir):
     if not os.path.isdir(dir):
         os.makedirs(dir)
 
+# Rows of the test set scored per matrix multiply in vectorized evaluation.
+SCORE_CHUNK_ROWS = 8192
+
+def stack_embeddings(column):
+    """ Turns a column of per-tweet embeddings into a contiguous 2D array. """
+    return np.vstack(column.values)
+
+def _characterize(model, corpus, context_corpus):
+    model.characterize(corpus, context_corpus)
+
+def user_similarity_scores(model, data_column, train_data, test_data, users,
+                           score_args = {}, cache = None):
+    """ Characterizes the model for each user in turn and yields
+    (user, own scores, other scores), where own scores are for the user's
+    test tweets and other scores are for every other user's test tweets.
+    If a CharacterizationCache is given, characterizations go through it.
+    """
+    characterize = cache.characterize if cache else _characterize
+
+    for user in users:
+        print(f'\tEvaluating model for {user}.')
+        
+        user_train_dat  = train_data[train_data['name'] == user][data_column]
+        other_train_dat = train_data[train_data['name'] != user][data_column]
+
+        # Initialize model for this user
+        characterize(model, user_train_dat, other_train_dat)
+        
+        my_test_tweets     = test_data[test_data['name'] == user][data_column]
+        other_test_tweets  = test_data[test_data['name'] != user][data_column]
+        
+        my_scores     = model.similarity_score(my_test_tweets, **score_args)
+        not_my_scores = model.similarity_score(other_test_tweets, **score_args)
+
+        yield user, my_scores, not_my_scores
+
+def vectorized_user_similarity_scores(model, data_column, train_data,
+                                      test_data, users, score_args = {},
+                                      cache = None):
+    """ Same output as user_similarity_scores, for cluster-based embedding
+    models (e.g. ClusteredCosSimModel).  Each user is characterized once,
+    all cluster means are stacked into a single (total clusters x embedding)
+    matrix and the whole test set is scored against it with one matrix
+    multiply per chunk of rows.  Per-user scores are then the max over the
+    columns belonging to that user's clusters.
+
+    The model's context corpus is not used by these models, so None is passed
+    to characterize.  Models with an encoder embed the test tweets once.
+    """
+    characterize = cache.characterize if cache else _characterize
+    cluster_scaling = score_args.get('cluster_scaling', True)
+
+    train_rows = train_data.groupby('name').indices
+
+    means         = []
+    means_offsets = []
+    cluster_count = []
+    for user in users:
+        print(f'\tCharacterizing model for {user}.')
+        characterize(model, train_data[data_column].iloc[train_rows[user]],
+                     None)
+
+        if not hasattr(model, 'cluster_means'):
+            raise ValueError('Vectorized evaluation requires a cluster-based '
+                             'embedding model.')
+
+        cluster_means = np.asarray(model.cluster_means)
+        cluster_offsets = (np.asarray(model.cluster_scales) if cluster_scaling
+                           else np.zeros(len(cluster_means)))
+
+        means.append(cluster_means)
+        means_offsets.append(cluster_offsets)
+        cluster_count.append(len(cluster_means))
+
+    # Columns of the stacked matrix are grouped by user; this is the first
+    # column of each user's block of clusters.
+    first_cluster = np.concatenate(([0], np.cumsum(cluster_count)[:-1]))
+    means         = np.vstack(means)
+    means_offsets = np.concatenate(means_offsets)
+
+    if getattr(model, 'encoder', None) is not None:
+        test_embeddings = model.embed_inputs(test_data[data_column])
+    else:
+        test_embeddings = stack_embeddings(test_data[data_column])
+
+    # (test tweets x users) best score of each tweet against each user.
+    user_scores = np.empty((len(test_embeddings), len(users)),
+                           dtype=np.result_type(means, test_embeddings))
+    for start in range(0, len(test_embeddings), SCORE_CHUNK_ROWS):
+        chunk = test_embeddings[start:start + SCORE_CHUNK_ROWS]
+        user_scores[start:start + len(chunk)] = np.maximum.reduceat(
+                                chunk.dot(means.T) - means_offsets,
+                                first_cluster, axis=1)
+
+    test_names = test_data['name'].values
+    for user_idx, user in enumerate(users):
+        is_user = test_names == user
+        yield (user, user_scores[is_user, user_idx],
+                     user_scores[~is_user, user_idx])
+
 def generate_similarity_scores(model, data_column,
                                file_prefix = '',
                                score_args = {},
                                config_file_dir=None,
                                input_directory=None,
                                output_directory=None,
-                               users = None):
+                               users = None,
+                               vectorize = False,
+                               cache = None,
+                               dataset_cache = None,
+                               stratify = False):
     """ Ingests a model and a directory full of twitter data on various users
     and writes two fies: one contianing similarity scores for the "own" user's
     tweets and an "other" file with scores for tweets belonging to other users.
+    These are float32 arrays with per-user offsets (see score_store).
      
     Args:
         
@@ -85,6 +228,16 @@ def generate_similarity_scores(model, data_column,
     output_directory(str): Override for metrics output directory path.
     users (list of strings): Override input_directory contents to select
         specific users.
+    vectorize (bool): Score all users with a single matrix multiply rather
+        than user by user (see vectorized_user_similarity_scores).  Only
+        applicable to cluster-based embedding models.  Defaults to False.
+    cache (CharacterizationCache): Reuse characterizations from this cache
+        where the model and training data match.  Defaults to None.
+    dataset_cache (str): Directory of the cached dataset and persisted
+        train/test split, shared by every evaluation (see
+        load_tweets_from_directory).  Defaults to None.
+    stratify (bool): Stratify the train/test split by user.  Defaults to
+        False.
         
     Return:
         
@@ -95,42 +248,168 @@ def generate_similarity_scores(model, data_column,
     safe_mkdir(output_directory)
 
     train_data, test_data = load_tweets_from_directory(input_directory,
-                                                       random_state = 1)  
-    scores_own   = []
-    scores_other = []
-
+                                                random_state = 1,
+                                                dataset_cache = dataset_cache,
+                                                stratify = stratify)
     if users is None:
         users = train_data['name'].unique()
 
-    for user in users:
-        print(f'\tEvaluating model for {user}.')
-        
-        user_train_dat  = train_data[train_data['name'] == user][data_column]
-        other_train_dat = train_data[train_data['name'] != user][data_column]
+    score_users = (vectorized_user_similarity_scores if vectorize
+                   else user_similarity_scores)
 
-        # Initialize model for this user
-        model.characterize(user_train_dat, other_train_dat)
-        
-        my_test_tweets     = test_data[test_data['name'] == user][data_column]
-        other_test_tweets  = test_data[test_data['name'] != user][data_column]
-        
-        my_scores     = model.similarity_score(my_test_tweets, **score_args)
-        not_my_scores = model.similarity_score(other_test_tweets, **score_args)
-             
-        # Write out user-specific similarity scores
-        user_out_dir = os.path.join(output_directory, user)
-        safe_mkdir(user_out_dir)
-        write_scores_to_json_file(user_out_dir,'own.json', my_scores)
-        write_scores_to_json_file(user_out_dir,'other.json', not_my_scores)
-
-        # Add user-specific scores to aggregate
-        scores_own   = np.concatenate((scores_own,   my_scores))
-        scores_other = np.concatenate((scores_other, not_my_scores))   
- 
-       
-    os.makedirs(output_directory, exist_ok=True)
-
-    write_scores_to_json_file(output_directory,'own.json', scores_own)
-    write_scores_to_json_file(output_directory,'other.json', scores_other)
-
-    return scores_own, scores_other
\ No newline at end of file
+    user_scores = list(score_users(model, data_column, train_data, test_data,
+                                   users, score_args, cache))
+
+    return write_score_store(output_directory, user_scores)
+
+def auc_score(own_scores, other_scores):
+    """ ROC AUC of telling <own_scores> (positives) from <other_scores>, or
+    NaN if either is empty.
+    """
+    from sklearn.metrics import roc_auc_score
+
+    if not len(own_scores) or not len(other_scores):
+        return np.nan
+    truth = np.concatenate([np.ones(len(own_scores)),
+                            np.zeros(len(other_scores))])
+    return roc_auc_score(truth, np.concatenate([own_scores, other_scores]))
+
+def _cross_validate_fold(model_config, input_directory, dataset_cache,
+                         train_rows, test_rows, users, limit_threads, cache):
+    """ Worker entry point: scores one model configuration on one fold.
+    Returns a list of (user, own scores, other scores).
+    """
+    from .evaluation_data import load_dataset
+    from .parallel_evaluation import _limit_worker_threads
+
+    if limit_threads:
+        _limit_worker_threads()
+
+    # Memory-mapped, so every worker shares the one copy in the page cache.
+    data = load_dataset(input_directory, dataset_cache)
+
+    model = copy.deepcopy(model_config['model'])
+    score_users = (vectorized_user_similarity_scores
+                   if model_config.get('vectorize', False)
+                   else user_similarity_scores)
+
+    return list(score_users(model, model_config['data_column'],
+                            data.iloc[train_rows], data.iloc[test_rows],
+                            users, model_config.get('score_args', {}), cache))
+
+def cross_validate(model_configs, input_directory, dataset_cache = None,
+                   n_folds = 5, n_repeats = 1, random_state = 1,
+                   stratify = False, users = None, n_workers = None,
+                   output_directory = None, cache = None):
+    """ k-fold cross-validation of several model configurations, with the
+    (configuration, fold) evaluations run in a pool of worker processes.
+
+    The data is loaded once into the dataset cache, whose embeddings workers
+    memory-map rather than copy, and the folds are drawn once and stored
+    there, so every configuration is scored on the same folds.
+
+    Args:
+
+    model_configs (list of dicts): As for generate_similarity_scores_parallel.
+    input_directory (str): Data source directory.
+    dataset_cache (str): Dataset cache directory (see evaluation_data).  A
+        temporary one is used if not given.
+    n_folds (int): Folds per repeat.  Defaults to 5.
+    n_repeats (int): Times the k-fold split is repeated with a new shuffle.
+        Defaults to 1.
+    random_state (int): Seed for the fold shuffles.  Defaults to 1.
+    stratify (bool): Give every fold the same fraction of each user's tweets.
+        Defaults to False.
+    users (list of strings): Users to evaluate; defaults to all.
+    n_workers (int): Number of worker processes.  None uses all CPUs; 1 runs
+        everything in this process.  Every run is limited to one BLAS
+        thread, so results don't depend on <n_workers>.
+    output_directory (str): If given, the AUC summary is also written to
+        <output_directory>/cross_validation.json.
+    cache (CharacterizationCache): Shared by all workers.
+
+    Return:
+
+    (dict): file_prefix -> dict with
+        'own', 'other': per fold, the pooled own and other scores;
+        'fold_auc': per fold, the AUC of the pooled scores;
+        'auc_mean', 'auc_std': over folds;
+        'user_auc': user -> (mean, std) of the user's AUC over folds.
+    """
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+    from .evaluation_data import load_dataset, load_folds
+    from .parallel_evaluation import _thread_limit
+
+    temporary_cache = None
+    if dataset_cache is None:
+        temporary_cache = tempfile.TemporaryDirectory()
+        dataset_cache = temporary_cache.name
+
+    try:
+        # Loaded before the pool forks, so workers inherit it.
+        data = load_dataset(input_directory, dataset_cache)
+        folds = load_folds(input_directory, dataset_cache, n_folds,
+                           n_repeats, random_state, stratify)
+        if users is None:
+            users = sorted(data['name'].unique())
+
+        tasks = [(config_idx, fold_idx)
+                 for config_idx in range(len(model_configs))
+                 for fold_idx in range(len(folds))]
+        task_args = [(model_configs[config_idx], input_directory,
+                      dataset_cache, folds[fold_idx][0], folds[fold_idx][1],
+                      list(users), n_workers != 1, cache)
+                     for config_idx, fold_idx in tasks]
+
+        if n_workers == 1:
+            # Pinned as the workers are, so results match any worker count.
+            with _thread_limit(True):
+                results = [_cross_validate_fold(*args) for args in task_args]
+        else:
+            with ProcessPoolExecutor(max_workers = n_workers) as executor:
+                results = list(executor.map(_cross_validate_fold,
+                                            *zip(*task_args)))
+    finally:
+        if temporary_cache is not None:
+            temporary_cache.cleanup()
+
+    summary = {}
+    for (config_idx, fold_idx), fold_results in zip(tasks, results):
+        prefix = model_configs[config_idx]['file_prefix']
+        evaluation = summary.setdefault(prefix, {'own' : [], 'other' : [],
+                                                 'fold_auc' : [],
+                                                 'user_auc' : {}})
+
+        own   = np.concatenate([scores for _, scores, _ in fold_results])
+        other = np.concatenate([scores for _, _, scores in fold_results])
+        evaluation['own'].append(own)
+        evaluation['other'].append(other)
+        evaluation['fold_auc'].append(auc_score(own, other))
+
+        for user, my_scores, not_my_scores in fold_results:
+            evaluation['user_auc'].setdefault(user, []).append(
+                                        auc_score(my_scores, not_my_scores))
+
+    for evaluation in summary.values():
+        evaluation['auc_mean'] = float(np.nanmean(evaluation['fold_auc']))
+        evaluation['auc_std']  = float(np.nanstd(evaluation['fold_auc']))
+        evaluation['user_auc'] = {user : (float(np.nanmean(aucs)),
+                                          float(np.nanstd(aucs)))
+                                  for user, aucs in
+                                  evaluation['user_auc'].items()}
+
+    if output_directory is not None:
+        safe_mkdir(output_directory)
+        report = {prefix : {'n_folds'  : n_folds,
+                            'n_repeats': n_repeats,
+                            'fold_auc' : [float(auc) for auc in
+                                          evaluation['fold_auc']],
+                            'auc_mean' : evaluation['auc_mean'],
+                            'auc_std'  : evaluation['auc_std'],
+                            'user_auc' : evaluation['user_auc']}
+                  for prefix, evaluation in summary.items()}
+        write_scores_to_json_file(output_directory, 'cross_validation.json',
+                                  report)
+
+    return summary
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+A cached columnar copy of the processed tweet data, and train/test splits
+and cross-validation folds of it persisted as row indices, so every
+evaluation reads the corpus and shuffles it once.
+
+The dataset cache directory holds
+
+    dataset.json     source directory fingerprint, users and their row counts
+    tweets.json      {"tweet": [...], "date": [...]} for every row
+    embeddings.npy   (rows x embedding dim) matrix, memory-mapped on load
+    split_<test fraction>_<seed>[_stratified].npz
+                     'train' and 'test' row ids of one split, and the
+                     fingerprint of the dataset they index
+    folds_<folds>x<repeats>_<seed>[_stratified].npz
+                     'train_<i>' and 'test_<i>' row ids of each
+                     cross-validation fold, and the fingerprint
+
+Rows are in evaluate_model.load_tweets order (grouped by user, in sorted
+order), so row ids are stable for a given source and a seeded split is the
+same as splitting without the cache.  The cache and its splits are rebuilt
+when a source file changes.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+DATASET_FILE    = 'dataset.json'
+TWEETS_FILE     = 'tweets.json'
+EMBEDDINGS_FILE = 'embeddings.npy'
+PARTIAL_SUFFIX  = '.partial'
+
+# Part of every fingerprint, so caches (and their splits) from a version
+# with a different row order are rebuilt.
+CACHE_VERSION = 2
+
+# The dataset last loaded in this process, by (cache directory, source
+# fingerprint).
+_loaded = {}
+
+def source_fingerprint(directory_path):
+    """ Hex digest of the name, size and modification time of every user
+    file in <directory_path> (and the cache version); changes whenever the
+    data does.
+    """
+    digest = hashlib.sha1(f'version {CACHE_VERSION}\0'.encode('utf-8'))
+    for file_name in sorted(os.listdir(directory_path)):
+        if file_name[0] != '@':
+            continue
+        stat = os.stat(os.path.join(directory_path, file_name))
+        digest.update(f'{file_name}\0{stat.st_size}\0{stat.st_mtime_ns}\0'
+                      .encode('utf-8'))
+    return digest.hexdigest()
+
+def _write_atomically(path, write):
+    write(path + PARTIAL_SUFFIX)
+    os.replace(path + PARTIAL_SUFFIX, path)
+
+def _write_json(path, data):
+    def write(partial_path):
+        with open(partial_path, 'w') as file:
+            json.dump(data, file)
+    _write_atomically(path, write)
+
+def _write_arrays(path, save, *args, **kwargs):
+    def write(partial_path):
+        with open(partial_path, 'wb') as file:
+            save(file, *args, **kwargs)
+    _write_atomically(path, write)
+
+def build_dataset(input_directory, cache_directory):
+    """ Reads the processed data in <input_directory> (JSON files or an
+    embedding store; see evaluate_model.load_tweets) into the dataset cache
+    in <cache_directory>.
+    """
+    from .evaluate_model import load_tweets
+
+    if not os.path.isdir(cache_directory):
+        os.makedirs(cache_directory)
+
+    fingerprint = source_fingerprint(input_directory)
+    # In source order, which groups rows by user.
+    data = load_tweets(input_directory)
+    users = list(pd.unique(data['name']))
+
+    embeddings = np.vstack(data['embedding'].values)
+    _write_arrays(os.path.join(cache_directory, EMBEDDINGS_FILE), np.save,
+                  embeddings)
+    _write_json(os.path.join(cache_directory, TWEETS_FILE),
+                {'tweet' : list(data['tweet']),
+                 'date'  : [str(date) for date in data['date']]})
+    # Written last: a dataset is only valid once this matches the source.
+    _write_json(os.path.join(cache_directory, DATASET_FILE),
+                {'source'      : os.path.abspath(input_directory),
+                 'fingerprint' : fingerprint,
+                 'users'       : users,
+                 'counts'      : [int(n) for n in
+                                  data['name'].value_counts()[users]]})
+
+def _read_description(cache_directory):
+    path = os.path.join(cache_directory, DATASET_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as file:
+        return json.load(file)
+
+def load_dataset(input_directory, cache_directory, mmap_mode='r'):
+    """ The processed data in <input_directory> via the dataset cache in
+    <cache_directory>, building it if it's missing or stale.
+
+    Args:
+    input_directory (str): Processed JSON files or an embedding store.
+    cache_directory (str): Dataset cache directory.
+    mmap_mode (str or None): Passed to np.load for the embeddings.
+
+    Returns:
+    DataFrame: tweet, date, embedding and (user) name columns, as
+        evaluate_model.load_tweets, indexed by row id.  Each 'embedding' cell
+        is a row view into the (memory-mapped) matrix.
+    """
+    fingerprint = source_fingerprint(input_directory)
+    key = (os.path.abspath(cache_directory), fingerprint)
+    if key in _loaded:
+        return _loaded[key]
+
+    description = _read_description(cache_directory)
+    if description is None or description['fingerprint'] != fingerprint:
+        build_dataset(input_directory, cache_directory)
+        description = _read_description(cache_directory)
+
+    with open(os.path.join(cache_directory, TWEETS_FILE), 'r') as file:
+        columns = json.loads(file.read())
+    embeddings = np.load(os.path.join(cache_directory, EMBEDDINGS_FILE),
+                         mmap_mode=mmap_mode)
+
+    data = pd.DataFrame(columns)
+    data['embedding'] = list(embeddings)
+    data['name'] = np.repeat(description['users'], description['counts'])
+
+    _loaded.clear()
+    _loaded[key] = data
+    return data
+
+def split_file_path(cache_directory, test_size, random_state, stratify):
+    return os.path.join(cache_directory,
+                        f'split_{test_size}_{random_state}'
+                        f'{"_stratified" if stratify else ""}.npz')
+
+def folds_file_path(cache_directory, n_folds, n_repeats, random_state,
+                    stratify):
+    return os.path.join(cache_directory,
+                        f'folds_{n_folds}x{n_repeats}_{random_state}'
+                        f'{"_stratified" if stratify else ""}.npz')
+
+def make_split(names, test_size = 0.4, random_state = None, stratify = False):
+    """ Train and test row ids for a dataset whose rows belong to users
+    <names>, shuffled as sklearn's train_test_split shuffles rows.  With
+    <stratify>, each user has the same fraction of their tweets in the test
+    set.
+    """
+    from sklearn.model_selection import train_test_split
+
+    train, test = train_test_split(np.arange(len(names)), test_size = test_size,
+                                   random_state = random_state,
+                                   stratify = names if stratify else None)
+    return train.astype(np.int32), test.astype(np.int32)
+
+def make_folds(names, n_folds = 5, n_repeats = 1, random_state = None,
+               stratify = False):
+    """ Shuffled k-fold cross-validation folds, <n_repeats> times over with
+    different shuffles, for a dataset whose rows belong to users <names>.
+    With <stratify>, each fold holds the same fraction of every user's
+    tweets.
+
+    Returns:
+    list: (train row ids, test row ids) per fold, n_folds * n_repeats long.
+    """
+    from sklearn.model_selection import (RepeatedKFold,
+                                         RepeatedStratifiedKFold)
+
+    splitter = (RepeatedStratifiedKFold if stratify else RepeatedKFold)(
+                    n_splits = n_folds, n_repeats = n_repeats,
+                    random_state = random_state)
+    return [(train.astype(np.int32), test.astype(np.int32))
+            for train, test in splitter.split(np.zeros(len(names)), names)]
+
+def _stored_arrays(path, fingerprint, make):
+    """ The arrays in <path> if they were made from the dataset with
+    <fingerprint>, otherwise make()'s, which are stored there.  A None path
+    makes them without storing.
+    """
+    if path is not None and os.path.exists(path):
+        with np.load(path) as arrays:
+            stored = {name : arrays[name] for name in arrays.files}
+        if str(stored.pop('fingerprint')) == fingerprint:
+            return stored
+
+    arrays = make()
+    if path is not None:
+        _write_arrays(path, np.savez, fingerprint = fingerprint, **arrays)
+    return arrays
+
+def load_split(input_directory, cache_directory, test_size = 0.4,
+               random_state = None, stratify = False):
+    """ A train/test split of the processed data in <input_directory>,
+    computed once per dataset and (test size, seed, stratification) and
+    stored in <cache_directory>.  Splits without a seed are drawn afresh and
+    not stored.
+
+    Returns:
+    tuple: train and test dataframes, as
+        evaluate_model.load_tweets_from_directory.
+    """
+    data = load_dataset(input_directory, cache_directory)
+    fingerprint = _read_description(cache_directory)['fingerprint']
+    path = (split_file_path(cache_directory, test_size, random_state, stratify)
+            if random_state is not None else None)
+
+    def make():
+        train, test = make_split(data['name'].values, test_size,
+                                 random_state, stratify)
+        return {'train' : train, 'test' : test}
+
+    split = _stored_arrays(path, fingerprint, make)
+    return data.iloc[split['train']], data.iloc[split['test']]
+
+def load_folds(input_directory, cache_directory, n_folds = 5, n_repeats = 1,
+               random_state = None, stratify = False):
+    """ Cross-validation folds (see make_folds) of the processed data in
+    <input_directory>, stored in <cache_directory> as load_split stores
+    splits, so every model configuration is evaluated on the same folds.
+
+    Returns:
+    list: (train row ids, test row ids) per fold, into
+        load_dataset(<input_directory>, <cache_directory>).
+    """
+    data = load_dataset(input_directory, cache_directory)
+    fingerprint = _read_description(cache_directory)['fingerprint']
+    path = (folds_file_path(cache_directory, n_folds, n_repeats, random_state,
+                            stratify)
+            if random_state is not None else None)
+
+    def make():
+        folds = make_folds(data['name'].values, n_folds, n_repeats,
+                           random_state, stratify)
+        arrays = {}
+        for fold_idx, (train, test) in enumerate(folds):
+            arrays[f'train_{fold_idx}'] = train
+            arrays[f'test_{fold_idx}'] = test
+        return arrays
+
+    arrays = _stored_arrays(path, fingerprint, make)
+    return [(arrays[f'train_{fold_idx}'], arrays[f'test_{fold_idx}'])
+            for fold_idx in range(n_folds * n_repeats)]
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lazy re-exports for the package __init__ modules, so importing one public
+symbol (e.g. filter_tweets_from_directories) doesn't import its siblings and
+their heavy dependencies (TensorFlow, tweepy, scikit-learn).
+
+Each package lists its exports as {name : submodule}.  On Python 3.7+ the
+package gets a module-level __getattr__ (PEP 562) that imports a symbol's
+submodule the first time the symbol is used; earlier Pythons don't support
+module __getattr__, so everything is imported eagerly there, as before.
+
+The modules themselves also defer heavy imports to where they're needed,
+e.g. TensorFlow until a SentenceEncoder is constructed.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import sys
+import importlib
+
+LAZY = sys.version_info >= (3, 7)
+
+def export_lazily(package, exports):
+    """ Makes the symbols in <exports> available from <package>.
+
+    Args:
+    package (str): Name of the package, i.e. its __name__.
+    exports (dict): Public name -> relative name of the submodule defining
+        it, e.g. {'SentenceEncoder' : '.embed_tweets'}.
+
+    Returns:
+    callable or None: The module __getattr__ for <package> (assign it to
+        __getattr__), or None where symbols were imported eagerly.
+    """
+    module = sys.modules[package]
+
+    def resolve(name):
+        value = getattr(importlib.import_module(exports[name], package), name)
+        # Cache it, so __getattr__ isn't consulted again.
+        setattr(module, name, value)
+        return value
+
+    if not LAZY:
+        for name in exports:
+            resolve(name)
+        return None
+
+    def __getattr__(name):
+        if name not in exports:
+            raise AttributeError(f'module {package!r} has no attribute '
+                                 f'{name!r}')
+        return resolve(name)
+
+    return __getattr__
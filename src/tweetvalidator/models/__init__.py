@@ -1,4 +1,13 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-from .tfidf_model import TFIDFModel
-from .clustered_cos_sim_model import ClusteredCosSimModel
+from ..lazy_imports import export_lazily
+
+# Public name -> defining module, imported on first use (see lazy_imports).
+_EXPORTS = {'TFIDFModel'           : '.tfidf_model',
+            'ClusteredCosSimModel' : '.clustered_cos_sim_model',
+            'TFIDFEngine'          : '.tfidf_engine',
+            'ModelRegistry'        : '.registry',
+            'load_model'           : '.registry'}
+
+__all__ = list(_EXPORTS)
+__getattr__ = export_lazily(__name__, _EXPORTS)
@@ -8,6 +8,13 @@ June, 2019
 @author: Joshua Rubin
 """
 
+import os
+import json
+import numpy as np
+
+# Name of the file describing a saved model; see Model.save.
+MODEL_FILE = 'model.json'
+
 class Model:
     """ Base class for binary classifier to identify fraudulent tweet.
     """
@@ -19,3 +26,139 @@ class Model:
         
         params (dict): Inference-time settings (e.g. cos-sim threshold)"""
         self.params = params
+
+    def get_init_params(self):
+        """ Constructor arguments that reproduce this (uncharacterized) model.
+        Subclasses override.
+
+        Returns:
+        dict: keyword arguments for the constructor.
+        """
+        return {}
+
+    def uses_context_corpus(self):
+        """ Whether characterize depends on its context_corpus argument.
+        Subclasses that use it override.
+        """
+        return False
+
+    def save(self, path, shared_directory=None):
+        """ Writes the model and its characterization to directory <path>.
+        Subclasses extend this to write their characterization, after calling
+        it to write the model description.
+
+        Args:
+        path (str): Directory to write; created if missing.
+        shared_directory (str or None): Where subclasses may write data
+            common to many saved models (e.g. a vocabulary) once, by content,
+            rather than into every model's directory.
+        """
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        with open(os.path.join(path, MODEL_FILE), 'w') as file:
+            json.dump({'model_class' : type(self).__name__,
+                       'init_params' : self.get_init_params(),
+                       'params'      : self.params}, file)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """ Reconstructs a model saved with save.  Subclasses extend this to
+        read their characterization.
+
+        Args:
+        path (str): Directory written by save.
+        mmap_mode (str or None): How to open stored arrays; 'r' (default)
+            memory-maps them so they're only paged in when used.
+
+        Returns:
+        Model: the saved model.
+        """
+        description = read_model_description(path)
+
+        if description['model_class'] != cls.__name__:
+            raise ValueError(f"{path} holds a {description['model_class']}, "
+                             f'not a {cls.__name__}.')
+
+        model = cls(**description['init_params'])
+        model.set_hyperparameters(description['params'])
+        return model
+
+    @classmethod
+    def similarity_score_many(cls, models, user_ids, inputs, **score_args):
+        """ Scores a batch of tweets interleaved across users, each against
+        its own user's characterization.
+
+        Args:
+        models (mapping): User id -> characterized model of this class, e.g.
+            a dict or a ModelRegistry.
+        user_ids (1D array-like): User id of each row of <inputs>.
+        inputs: Tweets or embeddings, as passed to similarity_score.
+        score_args: Passed on to the scoring, as for similarity_score.
+
+        Returns:
+        1D numpy array: similarity score of each row, in input order.
+        """
+        users, inverse = np.unique(np.asarray(user_ids), return_inverse=True)
+        return cls._score_many([models[user] for user in users],
+                               inverse, inputs, **score_args)
+
+    @classmethod
+    def infer_many(cls, models, user_ids, inputs):
+        """ Batched counterpart to infer for tweets interleaved across users;
+        each row is thresholded by its own user's model.
+
+        Args:
+        models (mapping): User id -> characterized model of this class.
+        user_ids (1D array-like): User id of each row of <inputs>.
+        inputs: Tweets or embeddings, as passed to infer.
+
+        Returns:
+        tuple: (similarity scores, true/false values corresponding to
+            fraud/authentic), by row in input order.
+        """
+        users, inverse = np.unique(np.asarray(user_ids), return_inverse=True)
+        user_models = [models[user] for user in users]
+
+        scores = cls._score_many(user_models, inverse, inputs)
+        thresholds = np.array([model.params['threshold']
+                               for model in user_models])
+
+        return scores, scores < thresholds[inverse]
+
+    @classmethod
+    def _score_many(cls, user_models, inverse, inputs, **score_args):
+        """ Scores row i of <inputs> with user_models[inverse[i]].  This
+        default scores each user's rows with a separate similarity_score
+        call; subclasses override it with a single batched operation.
+        """
+        scores = np.empty(len(inverse))
+        for user_idx, rows in enumerate(group_rows(inverse,
+                                                   len(user_models))):
+            if len(rows):
+                scores[rows] = user_models[user_idx].similarity_score(
+                                        take_rows(inputs, rows), **score_args)
+        return scores
+
+def group_rows(labels, n_groups):
+    """ Splits row indices by integer label into <n_groups> arrays, with a
+    single sort rather than a scan per group.
+    """
+    order = np.argsort(labels, kind='stable')
+    bounds = np.cumsum(np.bincount(labels, minlength=n_groups))[:-1]
+    return np.split(order, bounds)
+
+def take_rows(inputs, rows):
+    """ Selects <rows> by position from an array, Series or list. """
+    if hasattr(inputs, 'iloc'):
+        return inputs.iloc[rows]
+    if isinstance(inputs, np.ndarray):
+        return inputs[rows]
+    return [inputs[row] for row in rows]
+
+def read_model_description(path):
+    """ Returns the class name, constructor and inference parameters of the
+    model saved in directory <path>.
+    """
+    with open(os.path.join(path, MODEL_FILE), 'r') as file:
+        return json.loads(file.read())
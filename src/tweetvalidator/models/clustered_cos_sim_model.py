@@ -11,13 +11,66 @@ June, 2019
 @author: Joshua Rubin
 """
 
+import os
+import json
 import numpy as np
 from .base_model import Model
+from ..embedding_backends import make_backend, backend_config
 
-# This is an implementation of k-means on the hypersphere which uses
-# cosine similarity rather than cartesian distance to cluster.
-# https://github.com/jasonlaska/spherecluster
-from spherecluster import SphericalKMeans
+# k-means on the hypersphere, which uses cosine similarity rather than
+# cartesian distance to cluster.
+from .spherical_kmeans import SphericalKMeans, member_sums, normalize_rows
+
+# Outcomes of partial_characterize.
+UPDATED     = 'updated'
+RECLUSTERED = 'reclustered'
+DRIFTED     = 'drifted'
+
+def as_embedding_matrix(embedded_tweets, dtype=np.float32):
+    """ Returns embedded tweets as a contiguous 2D array of <dtype>.
+
+    Accepts a 2D array (used as-is when it's already contiguous and of the
+    right type) or a sequence/Series of per-tweet embedding vectors, which is
+    how they come out of a dataframe.
+    """
+    if isinstance(embedded_tweets, np.ndarray) and embedded_tweets.ndim == 2:
+        return np.ascontiguousarray(embedded_tweets, dtype=dtype)
+
+    # Series of arrays/lists; stack without a per-row Python comprehension.
+    rows = getattr(embedded_tweets, 'values', embedded_tweets)
+    if len(rows) == 0:
+        return np.zeros((0, 0), dtype=dtype)
+    return np.vstack(rows).astype(dtype, copy=False)
+
+# Rows scored per step of the batched multi-user scoring; bounds the
+# (rows x clusters x embedding) gather of cluster means.
+SCORE_MANY_CHUNK_ROWS = 1024
+
+def cluster_statistics(corpus, labels, cluster_means):
+    """ Computes per-cluster statistics of a clustered corpus.
+
+    Args:
+    corpus (2D numpy array): embedded tweets, one per row.
+    labels (1D int array): cluster index of each row of <corpus>.
+    cluster_means (2D numpy array): cluster centroids, one per row.
+
+    Returns:
+    tuple: (tweet count, smallest similarity to the centroid (capped at 1),
+        and sum of similarities to the centroid) for each cluster.
+    """
+    n_clusters = len(cluster_means)
+
+    # Similarity of each tweet with the centroid of its own cluster.  With
+    # few clusters one matmul beats gathering a centroid per tweet.
+    sims = corpus.dot(cluster_means.T)[np.arange(len(corpus)), labels]
+
+    count   = np.bincount(labels, minlength=n_clusters)
+    sim_sum = np.bincount(labels, weights=sims, minlength=n_clusters)
+
+    edges = np.ones(n_clusters, dtype=sims.dtype)
+    np.minimum.at(edges, labels, sims)
+
+    return count, edges, sim_sum.astype(sims.dtype)
 
 class ClusteredCosSimModel(Model):
     """ Derives a model that creates a mean or clustered tweet characterizaton.
@@ -28,55 +81,167 @@ class ClusteredCosSimModel(Model):
         k-means (which uses similarity rather than cartesian distance) to
         properly cluster normalized vectors on the unit-hypersphere.
     """
-    def __init__(self, embedded_corpus=True, max_clusters=1, verbose=False):
-        """ Requires a pre-embedded corpus passed in through <embedded_corpus>.
+    def __init__(self, embedded_corpus=True, max_clusters=1, verbose=False,
+                 warm_start=False, minibatch_threshold=100000,
+                 minibatch_size=2048, drift_tolerance=0.01, keep_history=False,
+                 encoder=None):
+        """ Takes a pre-embedded corpus, or raw tweets with an <encoder>.
+
+        Args:
+        embedded_corpus (bool): True if corpora and scored tweets are
+            embeddings.  If false, they're tweet text, embedded with
+            <encoder>.
+        max_clusters (int): Number of k-means clusters to fit.
+        verbose (bool): Print cluster information after characterizing.
+        warm_start (bool): Start clustering from the previous
+            characterization's centroids, so re-characterizing after new
+            tweets arrive converges in a few iterations.  Defaults to False.
+        minibatch_threshold (int): Corpora with at least this many tweets are
+            clustered with mini-batches of <minibatch_size>.
+        drift_tolerance (float): partial_characterize reclusters (or
+            reports drift) once any cluster mean has moved by more than this
+            cosine distance since the last full characterization.
+        keep_history (bool): Keep (and save) every characterized embedding,
+            so drifted clusters can be reclustered from scratch.  Without
+            it, only the cluster sums are kept and partial_characterize
+            reports drift for the caller to characterize again.  Defaults
+            to False.
+        encoder (EmbeddingBackend, str or dict): Embedding backend for
+            tweet text, or its name or config (see embedding_backends),
+            built on first use.  Required unless <embedded_corpus>.
         """
  
-        if not embedded_corpus:
-            raise Exception('Sorry, currently requires an embedded_corpus.')
+        if not embedded_corpus and encoder is None:
+            raise Exception('An encoder is required when the corpus is not '
+                            'embedded.')
        
+        self.encoder = encoder
+        # As given, so a model built from a name keeps the same parameters
+        # (and cache key) once its encoder is built.
+        self.encoder_config = (None if encoder is None else
+                               backend_config(encoder))
         self.max_clusters = max_clusters
         self.embedded_corpus = embedded_corpus
         self.verbose = verbose
+        self.warm_start = warm_start
+        self.minibatch_threshold = minibatch_threshold
+        self.minibatch_size = minibatch_size
+        self.drift_tolerance = drift_tolerance
+        self.keep_history = keep_history
         # Default setting; change with set_hyperparameter on base-class
         self.params = { 'threshold': 0.3 }   
         
         self.characterization_complete = False
      
+    # Arrays written by save, loaded (memory-mapped) by load.
+    SAVED_ARRAYS = ['cluster_means', 'cluster_scales', 'cluster_edges',
+                    'cluster_count', 'cluster_sums', 'reference_means',
+                    'kmeans_centers']
+
+    def get_init_params(self):
+        return {'embedded_corpus'     : self.embedded_corpus,
+                'max_clusters'        : self.max_clusters,
+                'verbose'             : self.verbose,
+                'warm_start'          : self.warm_start,
+                'minibatch_threshold' : self.minibatch_threshold,
+                'minibatch_size'      : self.minibatch_size,
+                'drift_tolerance'     : self.drift_tolerance,
+                'keep_history'        : self.keep_history,
+                'encoder'             : self.encoder_config}
+
+    def embed_inputs(self, inputs, dtype=np.float32):
+        """ Returns corpus or scoring inputs as a 2D embedding matrix,
+        embedding tweet text with the model's encoder unless the model
+        takes embeddings.
+        """
+        if self.embedded_corpus:
+            return as_embedding_matrix(inputs, dtype)
+
+        if isinstance(self.encoder, (str, dict)):
+            self.encoder = make_backend(self.encoder)
+
+        tweets = list(getattr(inputs, 'values', inputs))
+        if not tweets:
+            return np.zeros((0, 0), dtype=dtype)
+        return as_embedding_matrix(self.encoder.embed_phrases(tweets), dtype)
+
+    def save(self, path, shared_directory=None):
+        """ Writes the model to directory <path>, with each characterization
+        array as a .npy file and, with <keep_history>, the training history
+        (needed to recluster after partial_characterize) as history.npy.
+        """
+        super().save(path, shared_directory)
+
+        if not self.characterization_complete:
+            return
+
+        for name in self.SAVED_ARRAYS:
+            np.save(os.path.join(path, name + '.npy'), getattr(self, name))
+
+        if self.history is not None:
+            np.save(os.path.join(path, 'history.npy'), np.vstack(self.history))
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """ Reads a model written by save.  Arrays are memory-mapped by
+        default, so a loaded model costs almost nothing until it scores.
+        """
+        model = super().load(path)
+
+        if not os.path.exists(os.path.join(path, 'cluster_means.npy')):
+            return model
+
+        for name in cls.SAVED_ARRAYS:
+            setattr(model, name, np.load(os.path.join(path, name + '.npy'),
+                                         mmap_mode=mmap_mode))
+
+        history_path = os.path.join(path, 'history.npy')
+        model.history = ([np.load(history_path, mmap_mode=mmap_mode)]
+                         if model.keep_history and os.path.exists(history_path)
+                         else None)
+        model.characterization_complete = True
+        return model
+
     def characterize(self, corpus, context_corpus):
-        
-        # Because dataframe holds nested arrays awkwardly
-        corpus = np.asarray([x for x in corpus])
+        """ Clusters a user's embedded tweets and tabulates the size, edge
+        (smallest similarity) and typical similarity of each cluster.
+
+        Args:
+        corpus (2D numpy array or Series of arrays): embedded user tweets,
+            or their text if the model has an encoder.
+        context_corpus: Unused; present for the standard model idiom.
+        """
+        corpus = self.embed_inputs(corpus)
                    
-        kmeans = SphericalKMeans(n_clusters=self.max_clusters,
-                                 random_state=0).fit(corpus)
+        kmeans = self._make_kmeans(len(corpus)).fit(corpus)
+
+        # Unpruned centroids, kept to warm start the next characterization.
+        self.kmeans_centers = kmeans.cluster_centers_
                
-        self.cluster_means = kmeans.cluster_centers_
-    
-        sim_sum            = np.zeros(self.max_clusters)
-        self.cluster_count = np.zeros(self.max_clusters, dtype=np.int)
-        self.cluster_edges = np.ones(self.max_clusters)
-    
+        cluster_means = np.asarray(kmeans.cluster_centers_, dtype=corpus.dtype)
+        labels        = np.asarray(kmeans.labels_, dtype=np.intp)
+
         # Compute characteristics of each cluster
-        for cluster_idx, embedded_tweet in zip(kmeans.labels_, corpus):
-            sim = np.inner(embedded_tweet, self.cluster_means[cluster_idx])
-            
-            # Tabulating the smallest similarity by cluster.
-            if sim < self.cluster_edges[cluster_idx]:
-                self.cluster_edges[cluster_idx] = sim
-                
-            self.cluster_count[cluster_idx] += 1
-            sim_sum[cluster_idx] += sim
+        count, edges, sim_sum = cluster_statistics(corpus, labels,
+                                                   cluster_means)
 
         # prune lists of single tweet clusters
-        prune_list = [i for i, v in enumerate(self.cluster_count) if v == 1]
-        self.cluster_count = np.delete(self.cluster_count, prune_list, axis=0)
-        self.cluster_edges = np.delete(self.cluster_edges, prune_list, axis=0)
-        self.cluster_means = np.delete(self.cluster_means, prune_list, axis=0)    
-        sim_sum = np.delete(sim_sum, prune_list)
+        keep = count != 1
+        self.cluster_count = count[keep]
+        self.cluster_edges = edges[keep]
+        self.cluster_means = cluster_means[keep]
+        sim_sum = sim_sum[keep]
         
         # Mean similarity by cluster
         self.cluster_scales = sim_sum/self.cluster_count
+
+        # Streaming state for partial_characterize: the (unnormalized) sum of
+        # each cluster's members, the means as of this full characterization
+        # and, optionally, the history needed to recluster.
+        self.cluster_sums = member_sums(corpus, labels,
+                                        len(cluster_means))[keep]
+        self.reference_means = self.cluster_means
+        self.history = [corpus] if self.keep_history else None
         
         if self.verbose:
             print('\tCluster information:')
@@ -88,6 +253,93 @@ class ClusteredCosSimModel(Model):
         
         self.characterization_complete = True
     
+    def partial_characterize(self, new_embeddings):
+        """ Folds new tweets into an existing characterization at a cost
+        proportional to the number of new tweets.
+
+        Each new tweet joins its most similar cluster.  Cluster counts and
+        member sums are updated exactly; means are the normalized member sums
+        and, for unit-length embeddings, the mean similarity of a cluster's
+        members to its mean is |member sum| / count, so scales are exact too.
+        Edges only ever shrink to take in new tweets, so they're approximate
+        until the next full characterization.  Once any mean has drifted more
+        than <drift_tolerance> (cosine distance) from where the last full
+        characterization put it, the whole history is reclustered if the
+        model keeps it.  Otherwise the update is kept but reported as
+        DRIFTED (as is every later one) until the caller characterizes the
+        user's full corpus again; the reference means never move without a
+        full characterization.
+
+        Args:
+        new_embeddings (2D numpy array or Series of arrays): new embedded
+            tweets from the characterized user, or their text if the model
+            has an encoder.
+
+        Returns:
+        str: UPDATED if the clusters stayed within <drift_tolerance>,
+            RECLUSTERED if drift triggered a full recluster of the history,
+            or DRIFTED if they drifted and there's no history to recluster.
+        """
+        if not self.characterization_complete:
+            raise Exception('characterize must be called before '
+                            'partial_characterize.')
+
+        new_embeddings = self.embed_inputs(new_embeddings,
+                                           self.cluster_means.dtype)
+        if len(new_embeddings) == 0:
+            return UPDATED
+
+        if self.history is not None:
+            self.history.append(new_embeddings)
+
+        n_clusters = len(self.cluster_means)
+        sims   = new_embeddings.dot(self.cluster_means.T)
+        labels = sims.argmax(axis=1)
+        sims   = sims[np.arange(len(sims)), labels]
+
+        self.cluster_count = self.cluster_count + np.bincount(
+                                            labels, minlength=n_clusters)
+        self.cluster_sums = self.cluster_sums + member_sums(
+                                            new_embeddings, labels, n_clusters)
+
+        edges = self.cluster_edges.copy()
+        np.minimum.at(edges, labels, sims)
+        self.cluster_edges = edges
+
+        self.cluster_means  = normalize_rows(self.cluster_sums).astype(
+                                            self.cluster_means.dtype)
+        self.cluster_scales = (np.linalg.norm(self.cluster_sums, axis=1)
+                               / self.cluster_count).astype(
+                                            self.cluster_means.dtype)
+
+        drift = 1 - np.sum(self.cluster_means * self.reference_means, axis=1)
+        if drift.max() > self.drift_tolerance:
+            if self.history is None:
+                if self.verbose:
+                    print(f'\tCluster drift {drift.max():.3}; no history to '
+                          'recluster.')
+                return DRIFTED
+            if self.verbose:
+                print(f'\tCluster drift {drift.max():.3}; reclustering.')
+            self.characterize(np.vstack(self.history), None)
+            return RECLUSTERED
+
+        return UPDATED
+
+    def _make_kmeans(self, n_tweets):
+        """ Configures SphericalKMeans for a corpus of <n_tweets>. """
+        kmeans_args = {'n_clusters'   : self.max_clusters,
+                       'random_state' : 0}
+
+        if (self.warm_start
+                and getattr(self, 'kmeans_centers', None) is not None):
+            kmeans_args['init'] = self.kmeans_centers
+
+        if n_tweets >= self.minibatch_threshold:
+            kmeans_args['batch_size'] = self.minibatch_size
+
+        return SphericalKMeans(**kmeans_args)
+
     def similarity_score(self, embedded_tweets,
                          cluster_scaling = True):
         """ Generates similarity scores for each tweet supplied.
@@ -98,7 +350,8 @@ class ClusteredCosSimModel(Model):
         threshold will be applied, only the largest score is relevant.
         
         Args:
-        embedded_tweets (2D numpy array): array of embedded of tweets.
+        embedded_tweets (2D numpy array): array of embedded of tweets, or
+            tweet text if the model has an encoder.
         cluster_scaling (bool): Offset each score by the average similarity
             (i.e. cluster size) size of the cluster to which it belons.
             Defaults to true.
@@ -107,18 +360,60 @@ class ClusteredCosSimModel(Model):
         1D numpy array: best similarity scores by tweet supplied.
         """
         
-        embedded_tweets = np.asarray([x for x in embedded_tweets])      
-                        
+        embedded_tweets = self.embed_inputs(embedded_tweets,
+                                            self.cluster_means.dtype)
+
+        # (tweets x clusters) similarities
+        scores = embedded_tweets.dot(self.cluster_means.T)
+
         if cluster_scaling:
-            scores = [np.inner(mean, embedded_tweets)-scale
-                      for mean, scale in zip(self.cluster_means,
-                                              self.cluster_scales)]
-        else:
-            scores = [np.inner(mean, embedded_tweets)
-                          for mean in self.cluster_means]
+            scores -= self.cluster_scales
                   
-        return np.asarray(scores).max(axis=0)
+        return scores.max(axis=1)
         
+    @classmethod
+    def _score_many(cls, user_models, inverse, embedded_tweets,
+                    cluster_scaling = True):
+        """ Batched similarity_score across users.  Every user's cluster
+        means are packed into one (users x max clusters x embedding) array,
+        padded with clusters that can never score highest, and each row is
+        scored against its own user's clusters in one batched product.
+        Tweet text is embedded once for all users, so their models must
+        share an encoder.
+        """
+        if len(user_models) == 0:
+            return np.zeros(0)
+
+        encoders = {json.dumps(model.encoder_config, sort_keys=True)
+                    for model in user_models}
+        if len(encoders) > 1:
+            raise ValueError('Batched scoring requires every user model to '
+                             'use the same encoder.')
+
+        dtype = user_models[0].cluster_means.dtype
+        embedded_tweets = user_models[0].embed_inputs(embedded_tweets, dtype)
+
+        n_clusters = max(len(model.cluster_means) for model in user_models)
+        means = np.zeros((len(user_models), n_clusters,
+                          embedded_tweets.shape[1]), dtype=dtype)
+        offsets = np.full((len(user_models), n_clusters), np.inf, dtype=dtype)
+        for user_idx, model in enumerate(user_models):
+            user_clusters = len(model.cluster_means)
+            means[user_idx, :user_clusters] = model.cluster_means
+            offsets[user_idx, :user_clusters] = (model.cluster_scales
+                                                 if cluster_scaling else 0)
+
+        scores = np.empty(len(embedded_tweets), dtype=dtype)
+        for start in range(0, len(embedded_tweets), SCORE_MANY_CHUNK_ROWS):
+            stop = start + SCORE_MANY_CHUNK_ROWS
+            users = inverse[start:stop]
+            # (rows x clusters) similarity of each row with its user's means.
+            sims = np.matmul(means[users],
+                             embedded_tweets[start:stop, :, None])[:, :, 0]
+            scores[start:stop] = (sims - offsets[users]).max(axis=1)
+
+        return scores
+
     def infer(self, embedded_tweets=None):
         """ Applies a threshold to a best similarity score to produce a boolean
         indicator.  Fraudulent:True.
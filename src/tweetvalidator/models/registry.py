@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Provides ModelRegistry, a directory of saved per-user model
+characterizations, and load_model, which reads any saved model.
+
+Layout: <registry directory>/<user>/ holds one model written by Model.save,
+and <registry directory>/.shared/ data common to many of them (e.g. TFIDF
+vocabularies), stored once.
+Models are loaded on first use, with their arrays memory-mapped, so a
+service can front thousands of users and only page in the ones it sees.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import numpy as np
+from collections import OrderedDict
+from .base_model import MODEL_FILE, read_model_description
+from .tfidf_model import TFIDFModel
+from .clustered_cos_sim_model import ClusteredCosSimModel
+
+# Registry subdirectory for data shared between saved models.
+SHARED_DIRECTORY = '.shared'
+
+# Saved models are reconstructed by class name.
+MODEL_CLASSES = {cls.__name__ : cls
+                 for cls in [TFIDFModel, ClusteredCosSimModel]}
+
+def load_model(path, mmap_mode='r'):
+    """ Loads a model written by Model.save, whatever its class.
+
+    Args:
+    path (str): Directory written by Model.save.
+    mmap_mode (str or None): Passed to the model's load.
+
+    Returns:
+    Model: the saved model.
+    """
+    model_class = read_model_description(path)['model_class']
+    if model_class not in MODEL_CLASSES:
+        raise ValueError(f'Unknown model class {model_class} in {path}.')
+    return MODEL_CLASSES[model_class].load(path, mmap_mode)
+
+class ModelRegistry:
+    """ Per-user saved models in a directory, loaded lazily.
+
+        Args:
+        directory (str): Registry directory; created if missing.
+        max_loaded (int or None): Keep at most this many models loaded,
+            dropping the least recently used.  None (default) keeps all.
+        mmap_mode (str or None): Passed to load_model.
+    """
+    def __init__(self, directory, max_loaded=None, mmap_mode='r'):
+        self.directory = directory
+        self.max_loaded = max_loaded
+        self.mmap_mode = mmap_mode
+        self._loaded = OrderedDict()
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def user_path(self, user):
+        return os.path.join(self.directory, user)
+
+    def users(self):
+        """ Users with a saved model. """
+        return sorted(user for user in os.listdir(self.directory)
+                      if os.path.exists(os.path.join(self.directory, user,
+                                                     MODEL_FILE)))
+
+    def __contains__(self, user):
+        return (user in self._loaded or
+                os.path.exists(os.path.join(self.user_path(user), MODEL_FILE)))
+
+    def save(self, user, model):
+        """ Saves a characterized model for <user>, replacing any other. """
+        model.save(self.user_path(user),
+                   os.path.join(self.directory, SHARED_DIRECTORY))
+        self._loaded.pop(user, None)
+
+    def get(self, user):
+        """ Returns <user>'s model, loading it on first use.
+
+        Raises:
+        KeyError: if <user> has no saved model.
+        """
+        if user in self._loaded:
+            self._loaded.move_to_end(user)
+            return self._loaded[user]
+
+        if user not in self:
+            raise KeyError(f'No saved model for {user}.')
+
+        model = load_model(self.user_path(user), self.mmap_mode)
+        self._loaded[user] = model
+
+        if self.max_loaded is not None:
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+
+        return model
+
+    __getitem__ = get
+
+    def infer_many(self, user_ids, inputs):
+        """ Scores and thresholds tweets interleaved across users, each
+        against its own user's saved model (see Model.infer_many).  All of
+        the users' models must be of the same class.
+
+        Args:
+        user_ids (1D array-like): User id of each row of <inputs>.
+        inputs: Tweets or embeddings, as the users' models expect.
+
+        Returns:
+        tuple: (similarity scores, fraud flags) by row in input order.
+
+        Raises:
+        KeyError: if a user has no saved model.
+        """
+        models = {user : self.get(user)
+                  for user in np.unique(np.asarray(user_ids))}
+
+        model_classes = {type(model) for model in models.values()}
+        if len(model_classes) > 1:
+            raise ValueError('infer_many needs every user to have the same '
+                             'model class, not '
+                             f'{sorted(c.__name__ for c in model_classes)}.')
+        if not model_classes:
+            return np.zeros(0), np.zeros(0, dtype=bool)
+
+        return model_classes.pop().infer_many(models, user_ids, inputs)
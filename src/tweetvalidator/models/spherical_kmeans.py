@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Provides SphericalKMeans, k-means on the unit hypersphere, which clusters by
+cosine similarity rather than cartesian distance.  It replaces the
+spherecluster package and has three modes:
+
+- full-batch Lloyd iterations (the default), vectorized over the corpus;
+- mini-batch updates (set batch_size) for very large corpora;
+- warm start from previous centroids (pass them as init), so that
+  re-clustering after a few new tweets arrive converges in a few iterations.
+
+The fitted attributes mirror scikit-learn/spherecluster: cluster_centers_,
+labels_, inertia_ and n_iter_.  inertia_ is the sum of squared euclidean
+distances of the (normalized) samples to their centroids, i.e.
+2 * sum(1 - cosine similarity), as in spherecluster.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import numpy as np
+
+def normalize_rows(X):
+    """ Returns a copy of <X> with each row scaled to unit length.  All-zero
+    rows are left as zeros.
+    """
+    norms = np.linalg.norm(X, axis=1)
+    norms[norms == 0] = 1
+    return X / norms[:, None]
+
+def member_sums(X, labels, n_clusters):
+    """ Sums the rows of <X> by cluster label with a single matmul. """
+    one_hot = (labels == np.arange(n_clusters)[:, None]).astype(X.dtype)
+    return one_hot.dot(X)
+
+class SphericalKMeans:
+    """ K-means clustering of normalized vectors by cosine similarity.
+
+        Args:
+        n_clusters (int): Number of clusters.
+        init (str or 2D array): 'k-means++', 'random', or an array of initial
+            centroids (e.g. a previous fit's cluster_centers_).  An array
+            with fewer than n_clusters rows is completed by k-means++
+            seeding.  Arrays imply a single initialization.
+        n_init (int): Number of initializations; the lowest inertia wins.
+        max_iter (int): Maximum Lloyd iterations, or mini-batch steps.
+        tol (float): Converged when no centroid moves by more than this
+            cosine distance in an iteration.
+        batch_size (int or None): If set, fit with mini-batches of this many
+            samples instead of the full corpus.
+        random_state (int or None): Seed for initialization and sampling.
+    """
+    def __init__(self, n_clusters=8, init='k-means++', n_init=10,
+                 max_iter=300, tol=1e-4, batch_size=None, random_state=None):
+        self.n_clusters   = n_clusters
+        self.init         = init
+        self.n_init       = n_init
+        self.max_iter     = max_iter
+        self.tol          = tol
+        self.batch_size   = batch_size
+        self.random_state = random_state
+
+    def fit(self, X):
+        """ Clusters the rows of <X>, which are normalized first.
+
+        Args:
+        X (2D numpy array): Samples, one per row.
+
+        Returns:
+        SphericalKMeans: self, fitted.
+        """
+        X = np.asarray(X)
+        if not np.issubdtype(X.dtype, np.floating):
+            X = X.astype(np.float64)
+        X = normalize_rows(X)
+
+        if len(X) < self.n_clusters:
+            raise ValueError(f'n_samples={len(X)} should be >= '
+                             f'n_clusters={self.n_clusters}.')
+
+        rng = np.random.RandomState(self.random_state)
+
+        warm_start = not isinstance(self.init, str)
+        n_init = 1 if warm_start else self.n_init
+
+        best = None
+        for _ in range(n_init):
+            centers = self._init_centroids(X, rng)
+
+            if self.batch_size:
+                centers, n_iter = self._fit_minibatch(X, centers, rng)
+            else:
+                centers, n_iter = self._fit_lloyd(X, centers)
+
+            labels, sims = self._assign(X, centers)
+            inertia = 2 * float(np.sum(1 - sims))
+
+            if best is None or inertia < best[2]:
+                best = (centers, labels, inertia, n_iter)
+
+        (self.cluster_centers_, self.labels_,
+         self.inertia_, self.n_iter_) = best
+
+        return self
+
+    def predict(self, X):
+        """ Returns the index of the closest centroid to each row of <X>. """
+        return self._assign(normalize_rows(np.asarray(X)),
+                            self.cluster_centers_)[0]
+
+    def _init_centroids(self, X, rng):
+        """ Picks starting centroids per self.init. """
+        if isinstance(self.init, str):
+            if self.init == 'random':
+                idx = rng.choice(len(X), self.n_clusters, replace=False)
+                return X[idx].copy()
+            if self.init != 'k-means++':
+                raise ValueError(f'Unknown init method {self.init}.')
+            centers = np.zeros((0, X.shape[1]), dtype=X.dtype)
+        else:
+            centers = normalize_rows(np.asarray(self.init, dtype=X.dtype))
+            centers = centers[:self.n_clusters]
+
+        return self._kmeans_plusplus(X, centers, rng)
+
+    def _kmeans_plusplus(self, X, centers, rng):
+        """ Adds centroids to <centers> until there are n_clusters of them,
+        each chosen with probability proportional to its cosine distance from
+        the nearest existing centroid.
+        """
+        if len(centers) == 0:
+            centers = X[rng.randint(len(X))][None, :].copy()
+
+        if len(centers) >= self.n_clusters:
+            return centers
+
+        closest = 1 - X.dot(centers.T).max(axis=1)
+
+        new_centers = [centers]
+        for _ in range(self.n_clusters - len(centers)):
+            weights = np.clip(closest, 0, None)
+            total = weights.sum()
+            if total > 0:
+                idx = rng.choice(len(X), p=weights / total)
+            else:
+                idx = rng.randint(len(X))
+
+            new_centers.append(X[idx][None, :])
+            closest = np.minimum(closest, 1 - X.dot(X[idx]))
+
+        return np.vstack(new_centers)
+
+    @staticmethod
+    def _assign(X, centers):
+        """ Returns the closest centroid and similarity for each sample. """
+        sims = X.dot(centers.T)
+        labels = sims.argmax(axis=1)
+        return labels, sims[np.arange(len(X)), labels]
+
+    def _update_centers(self, X, labels, sims, old_centers):
+        """ Centroids are the normalized sums of their members.  An empty
+        cluster takes over the sample furthest from its own centroid.
+        """
+        sums = member_sums(X, labels, self.n_clusters)
+
+        counts = np.bincount(labels, minlength=self.n_clusters)
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            furthest = np.argsort(sims)[:len(empty)]
+            sums[empty] = X[furthest]
+
+        return normalize_rows(sums)
+
+    def _fit_lloyd(self, X, centers):
+        """ Full-batch Lloyd iterations.  Returns (centers, n_iter). """
+        n_iter = 0
+        for n_iter in range(1, self.max_iter + 1):
+            labels, sims = self._assign(X, centers)
+            new_centers = self._update_centers(X, labels, sims, centers)
+
+            shift = 1 - np.sum(new_centers * centers, axis=1)
+            centers = new_centers
+
+            if shift.max() <= self.tol:
+                break
+
+        return centers, n_iter
+
+    def _fit_minibatch(self, X, centers, rng):
+        """ Mini-batch updates: each centroid moves towards the mean of its
+        batch members with a learning rate of (batch members / all members
+        seen so far).  Returns (centers, n_iter).
+        """
+        batch_size = min(self.batch_size, len(X))
+        counts = np.zeros(self.n_clusters)
+
+        # Require a few quiet steps in a row, since batches are noisy.
+        quiet_steps = 0
+        n_iter = 0
+        for n_iter in range(1, self.max_iter + 1):
+            batch = X[rng.choice(len(X), batch_size, replace=False)]
+            labels, _ = self._assign(batch, centers)
+
+            sums = member_sums(batch, labels, self.n_clusters)
+            batch_counts = np.bincount(labels, minlength=self.n_clusters)
+
+            counts += batch_counts
+            hit = batch_counts > 0
+            rate = batch_counts[hit] / counts[hit]
+
+            new_centers = centers.copy()
+            new_centers[hit] = normalize_rows(
+                      (1 - rate)[:, None] * centers[hit]
+                    + (rate / batch_counts[hit])[:, None] * sums[hit])
+
+            shift = 1 - np.sum(new_centers * centers, axis=1)
+            centers = new_centers
+
+            quiet_steps = quiet_steps + 1 if shift.max() <= self.tol else 0
+            if quiet_steps >= 3:
+                break
+
+        return centers, n_iter
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Provides TFIDFEngine, which fits one vocabulary and IDF over a set of
+documents and keeps a TF/TFIDF characterization for each document owner as a
+row of a sparse CSR (owners x vocabulary) matrix.  Scoring a batch of tweets
+against any or all owners is then a single sparse matrix product.
+
+With n_features set, terms are hashed into a fixed number of buckets instead
+of being looked up in a vocabulary, so memory no longer grows with the
+vocabulary and document frequencies can be updated online (partial_fit).
+
+Used two ways:
+- Multi-user: documents are individual tweets and owners are their users, so
+  IDF is computed across all tweets once for every user.
+- Single-user: TFIDFModel fits an engine on its concatenated user/context
+  documents and is a thin view over the 'user' row.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+import scipy.sparse as sp
+
+VOCABULARY_FILE = 'vocabulary.npy'
+
+def _write_vocabulary(path, terms):
+    """ Writes <terms>, in column order, as one newline-separated UTF-8
+    byte array in .npy format (tokens never contain whitespace).
+    """
+    partial_path = path + '.partial'
+    with open(partial_path, 'wb') as file:
+        np.save(file, np.frombuffer('\n'.join(terms).encode('utf-8'),
+                                    dtype=np.uint8))
+    os.replace(partial_path, path)
+
+def _read_vocabulary(path, mmap_mode='r'):
+    """ Terms, in column order, written by _write_vocabulary. """
+    data = np.load(path, mmap_mode=mmap_mode)
+    if len(data) == 0:
+        return []
+    return bytes(data).decode('utf-8').split('\n')
+
+class TFIDFEngine:
+    """ Shared vocabulary/IDF with one sparse characterization row per owner.
+
+        Args:
+        use_idf (boolean): Weight characterizations by inverse document
+            frequency (TFIDF) or not (TF).
+        stop_words (str or list): Passed to the tokenizer; defaults to
+            'english' as elsewhere in this package.
+        n_features (int or None): Number of hash buckets.  None (default)
+            uses an exact vocabulary learned by fit.
+    """
+    def __init__(self, use_idf=True, stop_words='english', n_features=None):
+        self.use_idf = use_idf
+        self.stop_words = stop_words
+        self.n_features = n_features
+
+    def _make_vectorizer(self):
+        # scikit-learn is slow to import, so it's imported on first use.
+        from sklearn.feature_extraction.text import (CountVectorizer,
+                                                     HashingVectorizer)
+        if self.n_features:
+            # Raw counts, so weighting and normalization happen here.
+            return HashingVectorizer(stop_words=self.stop_words,
+                                     n_features=self.n_features,
+                                     alternate_sign=False, norm=None)
+        return CountVectorizer(stop_words=self.stop_words)
+
+    @property
+    def hashed(self):
+        return bool(self.n_features)
+
+    def fit(self, documents, owners=None):
+        """ Fits vocabulary and IDF to <documents> and characterizes each
+        owner by the IDF-weighted, L2-normalized sum of its documents' term
+        counts.
+
+        Args:
+        documents (iterable of str): Text units for document frequency.
+        owners (iterable): Owner label of each document.  Defaults to one
+            owner per document, labelled by position.
+
+        Returns:
+        TFIDFEngine: self, fitted.
+        """
+        documents = list(documents)
+        if owners is None:
+            owners = range(len(documents))
+
+        self.vectorizer = self._make_vectorizer()
+        counts = self.vectorizer.fit_transform(documents).tocsr()
+
+        self.n_documents = 0
+        self.document_freq = np.zeros(counts.shape[1], dtype=np.int64)
+        self.owners = []
+        self.owner_index = {}
+        self.owner_counts = sp.csr_matrix((0, counts.shape[1]))
+
+        self._compile()
+        self._accumulate(counts, owners)
+
+        return self
+
+    def partial_fit(self, documents, owners=None):
+        """ Adds documents to the document-frequency count, and to their
+        owners' characterizations if <owners> is given (new owners get new
+        rows).  IDF and every characterization are reweighted to match.
+
+        In exact-vocabulary mode, terms missing from the vocabulary learned
+        by fit are ignored; hashed mode has no such limit.
+
+        Args:
+        documents (iterable of str): New text units.
+        owners (iterable or None): Owner label of each document, or None to
+            only update document frequencies (e.g. for context documents).
+
+        Returns:
+        TFIDFEngine: self.
+        """
+        documents = list(documents)
+        counts = self.vectorizer.transform(documents).tocsr()
+        self._accumulate(counts, owners)
+        return self
+
+    def _accumulate(self, counts, owners):
+        """ Folds a (documents x terms) count matrix into the document
+        frequencies and owner term counts, then reweights.
+        """
+        n_documents, n_terms = counts.shape
+
+        self.n_documents += n_documents
+        self.document_freq = (self.document_freq
+                              + np.bincount(counts.indices, minlength=n_terms))
+
+        if owners is not None:
+            # Owners in order of first appearance.
+            owner_rows = np.empty(n_documents, dtype=np.intp)
+            for document_idx, owner in enumerate(owners):
+                if owner not in self.owner_index:
+                    self.owner_index[owner] = len(self.owners)
+                    self.owners.append(owner)
+                owner_rows[document_idx] = self.owner_index[owner]
+
+            # (owners x documents) indicator sums each owner's term counts.
+            membership = sp.csr_matrix((np.ones(n_documents),
+                                        (owner_rows, np.arange(n_documents))),
+                                       shape=(len(self.owners), n_documents))
+
+            owner_counts = self.owner_counts.tocoo()
+            owner_counts = sp.csr_matrix(
+                    (owner_counts.data, (owner_counts.row, owner_counts.col)),
+                    shape=(len(self.owners), n_terms))
+            self.owner_counts = owner_counts + membership.dot(counts)
+
+        self._reweight()
+
+    def _reweight(self):
+        """ Recomputes IDF and the normalized owner characterizations. """
+        if self.use_idf:
+            # Smoothed IDF, as TfidfVectorizer computes it.
+            self.idf = (np.log((1 + self.n_documents)
+                               / (1 + self.document_freq)) + 1)
+        else:
+            self.idf = np.ones(len(self.document_freq))
+
+        from sklearn.preprocessing import normalize
+        self.characterizations = normalize(
+                self.owner_counts.dot(sp.diags(self.idf)), norm='l2').tocsr()
+        # Sorted columns make (owner, term) lookups a binary search.
+        self.characterizations.sort_indices()
+
+    def _compile(self):
+        """ Caches the tokenizer and term->column map used by transform, so
+        scoring a tweet costs tokenization plus a sparse dot.
+        """
+        self._analyzer = self.vectorizer.build_analyzer()
+        self._vocabulary = (None if self.hashed
+                            else self.vectorizer.vocabulary_)
+
+    def __getstate__(self):
+        # The compiled tokenizer is rebuilt rather than pickled.
+        state = self.__dict__.copy()
+        for key in ['_analyzer', '_vocabulary']:
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if hasattr(self, 'vectorizer'):
+            self._compile()
+
+    @property
+    def feature_names(self):
+        """ Vocabulary terms in column order (None when hashed). """
+        if self.hashed:
+            return None
+        vocabulary = self.vectorizer.vocabulary_
+        names = [None] * len(vocabulary)
+        for term, column in vocabulary.items():
+            names[column] = term
+        return names
+
+    def transform(self, tweets):
+        """ L2-normalized term frequencies of <tweets> over the vocabulary.
+
+        Args:
+        tweets (1D numpy array): plaintext tweets.
+
+        Returns:
+        scipy CSR matrix: (tweets x vocabulary) term frequencies.
+        """
+        if isinstance(tweets, str):
+            raise ValueError('Expected an iterable of tweets, not a string.')
+
+        if self.hashed:
+            from sklearn.preprocessing import normalize
+            # Hashing is stateless, so buckets never seen in fit are dropped
+            # here, as the exact branch drops out-of-vocabulary terms.
+            counts = self.vectorizer.transform(tweets).tocsr()
+            counts.data[self.document_freq[counts.indices] == 0] = 0
+            counts.eliminate_zeros()
+            return normalize(counts, norm='l2')
+
+        analyzer   = self._analyzer
+        vocabulary = self._vocabulary
+
+        indices = []
+        values  = []
+        indptr  = [0]
+        for tweet in tweets:
+            counts = {}
+            for term in analyzer(tweet):
+                column = vocabulary.get(term)
+                if column is not None:
+                    counts[column] = counts.get(column, 0) + 1
+            indices.extend(counts.keys())
+            values.extend(counts.values())
+            indptr.append(len(indices))
+
+        values = np.asarray(values, dtype=np.float64)
+        indptr = np.asarray(indptr)
+
+        # L2-normalize each row in place; empty rows stay empty.
+        row_lengths = np.diff(indptr)
+        squares = np.zeros(len(row_lengths))
+        nonempty = row_lengths > 0
+        squares[nonempty] = np.add.reduceat(values ** 2, indptr[:-1][nonempty])
+        values /= np.repeat(np.sqrt(np.where(nonempty, squares, 1)),
+                            row_lengths)
+
+        return sp.csr_matrix((values, np.asarray(indices, dtype=np.int32),
+                              indptr),
+                             shape=(len(row_lengths), len(self.idf)))
+
+    def save(self, path, owners=None, shared_directory=None):
+        """ Writes the engine to directory <path>: settings as JSON, the
+        vocabulary as a compact byte array (see _write_vocabulary), IDF
+        statistics as .npy and owner term counts as a sparse .npz.
+
+        Args:
+        path (str): Directory to write; created if missing.
+        owners (list or None): Only keep these owners' characterizations.
+            Defaults to all of them.
+        shared_directory (str or None): Write the vocabulary here instead,
+            named by its content, so engines saved with the same vocabulary
+            (e.g. every user of a registry) store it once.
+        """
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        owner_counts = self.owner_counts
+        if owners is None:
+            owners = self.owners
+        else:
+            owner_counts = owner_counts[[self.owner_index[o] for o in owners]]
+
+        # Vocabulary file path, relative to <path>.
+        vocabulary = None
+        if not self.hashed:
+            terms = self.feature_names
+            if shared_directory is None:
+                vocabulary = VOCABULARY_FILE
+                _write_vocabulary(os.path.join(path, vocabulary), terms)
+            else:
+                if not os.path.isdir(shared_directory):
+                    os.makedirs(shared_directory)
+                digest = hashlib.sha1('\n'.join(terms).encode('utf-8'))
+                vocabulary_path = os.path.join(
+                        shared_directory,
+                        f'vocabulary-{digest.hexdigest()}.npy')
+                if not os.path.exists(vocabulary_path):
+                    _write_vocabulary(vocabulary_path, terms)
+                vocabulary = os.path.relpath(vocabulary_path, path)
+
+        with open(os.path.join(path, 'engine.json'), 'w') as file:
+            json.dump({'use_idf'     : self.use_idf,
+                       'stop_words'  : self.stop_words,
+                       'n_features'  : self.n_features,
+                       'n_documents' : int(self.n_documents),
+                       'owners'      : list(owners),
+                       'vocabulary'  : vocabulary}, file)
+
+        np.save(os.path.join(path, 'document_freq.npy'), self.document_freq)
+        sp.save_npz(os.path.join(path, 'owner_counts.npz'),
+                    sp.csr_matrix(owner_counts))
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """ Reads an engine written by save.
+
+        Args:
+        path (str): Directory written by save.
+        mmap_mode (str or None): How to open the document frequency and
+            vocabulary arrays.
+
+        Returns:
+        TFIDFEngine: the saved engine, ready to score.
+        """
+        with open(os.path.join(path, 'engine.json'), 'r') as file:
+            settings = json.loads(file.read())
+
+        engine = cls(use_idf=settings['use_idf'],
+                     stop_words=settings['stop_words'],
+                     n_features=settings['n_features'])
+
+        engine.vectorizer = engine._make_vectorizer()
+        if not engine.hashed:
+            terms = settings['vocabulary']
+            if isinstance(terms, str):
+                terms = _read_vocabulary(os.path.join(path, terms), mmap_mode)
+            engine.vectorizer.vocabulary_ = {
+                    term : column for column, term in enumerate(terms)}
+
+        engine.n_documents   = settings['n_documents']
+        engine.document_freq = np.load(os.path.join(path, 'document_freq.npy'),
+                                       mmap_mode=mmap_mode)
+        engine.owners        = settings['owners']
+        engine.owner_index   = {owner : row
+                                for row, owner in enumerate(engine.owners)}
+        engine.owner_counts  = sp.load_npz(os.path.join(path,
+                                                        'owner_counts.npz'))
+
+        engine._compile()
+        engine._reweight()
+        return engine
+
+    def characterization(self, owner):
+        """ The (1 x vocabulary) sparse characterization of <owner>. """
+        return self.characterizations[self.owner_index[owner]]
+
+    def similarity_score(self, tweets, owner):
+        """ Scores tweets against a single owner's characterization.
+
+        Args:
+        tweets (1D numpy array): plaintext tweets.
+        owner: Owner to score against.
+
+        Returns:
+        1D numpy array: similarity scores by tweet supplied.
+        """
+        # Sparse against sparse, so nothing vocabulary-wide is materialized.
+        return self.transform(tweets).dot(
+                        self.characterization(owner).T).toarray().ravel()
+
+    def similarity_scores(self, tweets, owners=None):
+        """ Scores every tweet against the characterization of every owner
+        given, with one sparse matrix product.
+
+        Args:
+        tweets (1D numpy array): plaintext tweets.
+        owners (list): Owners to score against.  Defaults to all of them.
+
+        Returns:
+        2D numpy array: (tweets x owners) similarity scores.
+        """
+        characterizations = self.characterizations
+        if owners is not None:
+            characterizations = characterizations[
+                                    [self.owner_index[o] for o in owners]]
+
+        return self.transform(tweets).dot(characterizations.T).toarray()
+
+    def paired_similarity_scores(self, tweets, owners):
+        """ Scores each tweet against the characterization of its own owner,
+        for batches of tweets interleaved across owners.
+
+        Args:
+        tweets (1D numpy array): plaintext tweets.
+        owners (iterable): Owner to score each tweet against.
+
+        Returns:
+        1D numpy array: similarity scores by tweet supplied.
+        """
+        owner_rows = np.fromiter((self.owner_index[o] for o in owners),
+                                 dtype=np.intp, count=len(tweets))
+
+        # Look up the owner's weight for each nonzero term of each tweet,
+        # rather than gathering whole characterization rows per tweet.
+        counts = self.transform(tweets)
+        tweet_rows = np.repeat(np.arange(counts.shape[0]),
+                               np.diff(counts.indptr))
+        weights = self.characterizations[owner_rows[tweet_rows],
+                                         counts.indices]
+
+        scores = np.bincount(tweet_rows,
+                             weights=counts.data * np.asarray(weights).ravel(),
+                             minlength=counts.shape[0])
+        # bincount gives integers when no tweet has a known term.
+        return scores.astype(np.float64, copy=False)
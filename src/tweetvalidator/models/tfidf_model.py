@@ -10,20 +10,71 @@ June, 2019
 @author: Joshua Rubin
 """
 
-from .base_model import Model
-from sklearn.feature_extraction.text import TfidfVectorizer
+import os
+import numpy as np
+from .base_model import Model, group_rows, take_rows
+from .tfidf_engine import TFIDFEngine
 
 class TFIDFModel(Model):
     """ Initializes TF/TFIDF model according to the standard model idiom.
+
+        The characterization lives in a TFIDFEngine; this model is a view on
+        one of its rows, either its own engine (after characterize) or a row
+        of a shared multi-user engine (see from_engine).
     
         Args:
         use_context (boolean): Initialize the model as either (false)
         term-frequency or (true) term-frequency-inverse-document-frequency.
+        n_features (int or None): Hash terms into this many buckets rather
+        than keeping a vocabulary, bounding memory per characterization at
+        some cost in accuracy from collisions.  Defaults to None (exact).
     """
-    def __init__(self, use_context=True):      
+    # Engine owner label of the user's own characterization.
+    USER = 'user'
+
+    def __init__(self, use_context=True, n_features=None):      
         # Default setting; change with set_hyperparameter on base-class
         self.params = {'threshold':0.3}
         self.use_context = use_context
+        self.n_features = n_features
+
+    def get_init_params(self):
+        return {'use_context' : self.use_context,
+                'n_features'  : self.n_features}
+
+    def uses_context_corpus(self):
+        return self.use_context
+
+    def save(self, path, shared_directory=None):
+        """ Writes the model to directory <path>, including the engine
+        holding this model's characterization (and only that one).  The
+        vocabulary goes to <shared_directory> if given; see
+        TFIDFEngine.save.
+        """
+        super().save(path, shared_directory)
+        if hasattr(self, 'engine'):
+            self.engine.save(os.path.join(path, 'engine'), [self.owner],
+                             shared_directory)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """ Reads a model written by save. """
+        model = super().load(path)
+        engine_path = os.path.join(path, 'engine')
+        if os.path.isdir(engine_path):
+            model.engine = TFIDFEngine.load(engine_path, mmap_mode)
+            model.owner = model.engine.owners[0]
+        return model
+
+    @classmethod
+    def from_engine(cls, engine, owner):
+        """ Returns a characterized model that views <owner>'s row of an
+        already-fitted (e.g. multi-user) TFIDFEngine.
+        """
+        model = cls(use_context=engine.use_idf, n_features=engine.n_features)
+        model.engine = engine
+        model.owner = owner
+        return model
 
     def characterize(self, corpus, context_corpus):
         """Computes TFIDF for a corpus of user tweets.  TF is computed from
@@ -36,20 +87,27 @@ class TFIDFModel(Model):
             common word normalization.  If none, skip the IDF (default:none).
         """
         if self.use_context:  # provided context vector to support IDF
-            tfidf_vectorizer = TfidfVectorizer(stop_words='english',
-                                                       use_idf=True)
-            self.word_freq_vec = tfidf_vectorizer.fit_transform(
-                [' '.join(corpus),
-                 ' '.join(corpus)+' '.join(context_corpus)]
-                 ).toarray()[0]
+            documents = [' '.join(corpus),
+                         ' '.join(corpus)+' '.join(context_corpus)]
+            owners = [self.USER, 'context']
         
         else: # No context, just term frequency
-            tfidf_vectorizer = TfidfVectorizer(stop_words='english',
-                                               use_idf=False)
-            self.word_freq_vec = tfidf_vectorizer.fit_transform(
-                                [' '.join(corpus)]).toarray()[0]
-    
-        self.feature_names = tfidf_vectorizer.get_feature_names()
+            documents = [' '.join(corpus)]
+            owners = [self.USER]
+
+        self.engine = TFIDFEngine(use_idf=self.use_context,
+                                  n_features=self.n_features).fit(documents,
+                                                                  owners)
+        self.owner = self.USER
+
+    @property
+    def word_freq_vec(self):
+        """ Dense characterization vector over feature_names. """
+        return self.engine.characterization(self.owner).toarray()[0]
+
+    @property
+    def feature_names(self):
+        return self.engine.feature_names
         
     def similarity_score(self, tweets):
         """ Computes similarity score of corpus characterization and input
@@ -61,14 +119,34 @@ class TFIDFModel(Model):
         Returns:
         1D numpy array: similarity scores by tweet supplied.
         """
-        
-        tfidf_vectorizer = TfidfVectorizer(stop_words='english', use_idf=False,
-                                           vocabulary = self.feature_names)
-        
-        tweet_freqs = tfidf_vectorizer.fit_transform(tweets)
-        
-        return tweet_freqs.dot(self.word_freq_vec)
+        return self.engine.similarity_score(tweets, self.owner)
+
+
+    @classmethod
+    def _score_many(cls, user_models, inverse, tweets):
+        """ Batched similarity_score across users.  Models that view the
+        same engine (see from_engine) are scored together, so a batch over a
+        multi-user engine costs one transform and one sparse product.
+        """
+        engines = []
+        engine_index = {}
+        user_engines = np.empty(len(user_models), dtype=np.intp)
+        for user_idx, model in enumerate(user_models):
+            key = id(model.engine)
+            if key not in engine_index:
+                engine_index[key] = len(engines)
+                engines.append(model.engine)
+            user_engines[user_idx] = engine_index[key]
 
+        scores = np.empty(len(inverse))
+        for engine_idx, rows in enumerate(group_rows(user_engines[inverse],
+                                                     len(engines))):
+            if len(rows):
+                owners = [user_models[user_idx].owner
+                          for user_idx in inverse[rows]]
+                scores[rows] = engines[engine_idx].paired_similarity_scores(
+                                            take_rows(tweets, rows), owners)
+        return scores
     
     def infer(self, tweets):
         """ Applies a threshold to each similarity score to produce a boolean
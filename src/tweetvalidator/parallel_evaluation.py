@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Runs several model configurations across users in a pool of worker processes.
+
+The tweet data is loaded once in the parent process and shared with workers
+by fork (copy-on-write); with an embedding store input the embeddings are
+memory-mapped as well, so workers never hold a private copy.  Each task is a
+(model configuration, user) pair, and results are written to the same
+<output_directory>/<file_prefix> score store (see score_store) as
+evaluate_model.generate_similarity_scores.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import copy
+import warnings
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .evaluate_model import (load_tweets_from_directory,
+                             user_similarity_scores,
+                             vectorized_user_similarity_scores)
+from .score_store import write_score_store
+
+# Populated in the parent before the pool forks so that workers inherit it.
+# Workers started some other way (e.g. spawn) load it on first use instead.
+_shared = {}
+
+def _load_shared(input_directory, random_state, dataset_cache = None,
+                 stratify = False):
+    """ Loads the train/test split into the module-level cache. """
+    key = (input_directory, random_state, dataset_cache, stratify)
+    if _shared.get('key') != key:
+        train_data, test_data = load_tweets_from_directory(input_directory,
+                                                random_state = random_state,
+                                                dataset_cache = dataset_cache,
+                                                stratify = stratify)
+        _shared.update({'key'   : key,
+                        'train' : train_data,
+                        'test'  : test_data})
+    return _shared['train'], _shared['test']
+
+def _thread_limit(limit_threads):
+    """ Pins BLAS/OpenMP pools to a single thread if <limit_threads>, so
+    results don't depend on how many threads each run is given.  The limit
+    applies at once and can be used as a context manager to undo it on exit.
+    Needs threadpoolctl; without it nothing is pinned, with a warning, since
+    results may then differ between runs with different worker counts.
+    """
+    if limit_threads:
+        try:
+            from threadpoolctl import threadpool_limits
+        except ImportError:
+            warnings.warn('threadpoolctl is not installed, so BLAS threads '
+                          "can't be pinned and deterministic results may "
+                          'differ between worker counts.', RuntimeWarning)
+        else:
+            return threadpool_limits(limits=1)
+    return contextlib.ExitStack()
+
+def _limit_worker_threads():
+    """ Pins a worker process's BLAS/OpenMP pools to one thread for the
+    rest of its life (see _thread_limit).
+    """
+    _thread_limit(True)
+
+def _run_task(model_config, users, input_directory, random_state,
+              limit_threads, cache, dataset_cache = None, stratify = False):
+    """ Worker entry point.  Returns a list of (user, own, other) tuples. """
+    if limit_threads:
+        _limit_worker_threads()
+
+    train_data, test_data = _load_shared(input_directory, random_state,
+                                         dataset_cache, stratify)
+
+    # Private copy so that no characterization state leaks between tasks.
+    model = copy.deepcopy(model_config['model'])
+
+    score_users = (vectorized_user_similarity_scores
+                   if model_config.get('vectorize', False)
+                   else user_similarity_scores)
+
+    return list(score_users(model, model_config['data_column'],
+                            train_data, test_data, users,
+                            model_config.get('score_args', {}), cache))
+
+def generate_similarity_scores_parallel(model_configs,
+                                        input_directory=None,
+                                        output_directory=None,
+                                        users = None,
+                                        n_workers = None,
+                                        deterministic = True,
+                                        random_state = 1,
+                                        cache = None,
+                                        dataset_cache = None,
+                                        stratify = False):
+    """ Parallel counterpart to generate_similarity_scores for a list of model
+    configurations.
+
+    Args:
+
+    model_configs (list of dicts): One per configuration with keys 'model',
+        'data_column' and 'file_prefix', and optionally 'score_args' and
+        'vectorize'; these match the arguments of generate_similarity_scores.
+    input_directory (str): Data source directory.
+    output_directory (str): Metrics output directory path.
+    users (list of strings): Override input_directory contents to select
+        specific users.
+    n_workers (int): Number of worker processes.  None uses all CPUs; 1 runs
+        everything in this process.
+    deterministic (bool): Limit every run, including one with a single
+        worker, to one BLAS thread and merge results in task order, so
+        output files are identical for any <n_workers>.  Otherwise results
+        are aggregated in completion order.  Defaults to True.
+    random_state (int): Seed for the train/test shuffle.  Defaults to 1, as in
+        generate_similarity_scores.
+    cache (CharacterizationCache): Shared by all workers; entries are written
+        atomically, so concurrent tasks can use the same directory.
+    dataset_cache (str): Directory of the cached dataset and persisted
+        train/test split (see evaluation_data.load_split).  Defaults to None.
+    stratify (bool): Stratify the train/test split by user.  Defaults to
+        False.
+
+    Return:
+
+    (dict): file_prefix -> (own, other) aggregate similarity score arrays.
+    """
+    train_data, _ = _load_shared(input_directory, random_state, dataset_cache,
+                                 stratify)
+
+    if users is None:
+        users = train_data['name'].unique()
+
+    # Vectorized configurations score all users at once, so they're a single
+    # task; everything else is split by user.
+    tasks = []
+    for config_idx, model_config in enumerate(model_configs):
+        if model_config.get('vectorize', False):
+            tasks.append((config_idx, list(users)))
+        else:
+            tasks.extend((config_idx, [user]) for user in users)
+
+    # Workers pin their own threads; a run in this process is pinned only
+    # for its duration.
+    task_args = [(model_configs[config_idx], task_users, input_directory,
+                  random_state, deterministic and n_workers != 1, cache,
+                  dataset_cache, stratify)
+                 for config_idx, task_users in tasks]
+
+    if n_workers == 1:
+        with _thread_limit(deterministic):
+            results = [_run_task(*args) for args in task_args]
+    else:
+        with ProcessPoolExecutor(max_workers = n_workers) as executor:
+            futures = {executor.submit(_run_task, *args) : task_idx
+                       for task_idx, args in enumerate(task_args)}
+
+            if deterministic:
+                results = [None] * len(tasks)
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+            else:
+                completed_tasks, results = [], []
+                for future in as_completed(futures):
+                    completed_tasks.append(tasks[futures[future]])
+                    results.append(future.result())
+                tasks = completed_tasks
+
+    # Merge results into the per-configuration output layout.
+    user_scores = {model_config['file_prefix'] : []
+                   for model_config in model_configs}
+
+    for (config_idx, _), task_results in zip(tasks, results):
+        user_scores[model_configs[config_idx]['file_prefix']].extend(
+                                                                task_results)
+
+    return {prefix : write_score_store(os.path.join(output_directory, prefix),
+                                       prefix_scores)
+            for prefix, prefix_scores in user_scores.items()}
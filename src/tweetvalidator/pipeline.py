@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+A streaming pipeline from raw tweets to similarity scores, with no
+intermediate files.
+
+Stages are generators over batches of tweets, so they chain like
+
+    batches = raw_file_source(raw_directory)
+    batches = filter_stage(batches, filters, min_tweet_characters)
+    batches = embed_stage(buffered(batches), encoder)
+    batches = score_stage(buffered(batches), registry)
+
+and each batch flows through every stage before the next is read.  A batch
+is a dict of equal-length columns named as in the project's dataframes:
+'name', 'tweet' and 'date' from the source, 'embedding' (a 2D array) from
+embed_stage, 'score' and 'fraudulent' (arrays) from score_stage.
+
+buffered runs the stages upstream of it in a background thread, up to a few
+batches ahead, so e.g. reading and filtering overlap with embedding while
+memory stays bounded.  side_output writes the batches passing through in the
+formats of the preprocessed (and, with embeddings, processed) data
+directories, for when the intermediate files are still wanted.
+stream_pipeline assembles the usual chain.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import json
+import time
+import queue
+import threading
+import numpy as np
+from itertools import islice
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from .embedding_store import (iter_json_array, work_file_path, PARTIAL_SUFFIX,
+                              _JSONSink)
+from .embedding_pipeline import _put, _get, _Stopped
+
+# Tweets per batch.
+BATCH_SIZE = 1024
+
+# Batches buffered ahead by buffered.
+BUFFER_BATCHES = 4
+
+COLUMNS = ['name', 'tweet', 'date']
+
+def _rows_to_batches(rows, batch_size):
+    """ Groups (user, tweet, date) rows into column batches. """
+    rows = iter(rows)
+    while True:
+        batch_rows = list(islice(rows, batch_size))
+        if not batch_rows:
+            return
+        yield {column : list(values)
+               for column, values in zip(COLUMNS, zip(*batch_rows))}
+
+def user_tweets_source(user_tweets, batch_size = BATCH_SIZE):
+    """ Source stage over tweets already in memory.
+
+    Args:
+    user_tweets (iterable): (user, list of [tweet, date]) pairs.
+    batch_size (int): Tweets per batch; batches may span users.
+    """
+    return _rows_to_batches(((user, tweet[0], tweet[1])
+                             for user, tweets in user_tweets
+                             for tweet in tweets), batch_size)
+
+def raw_file_source(directory_path, batch_size = BATCH_SIZE):
+    """ Source stage over the raw user files (e.g. @MrPeanut.json, holding
+    [[tweet, date],...]) in <directory_path>.  Files are read incrementally.
+    """
+    file_names = sorted(f for f in os.listdir(directory_path) if f[0]=='@')
+
+    return _rows_to_batches(((file_name.split('.')[0], tweet[0], tweet[1])
+                             for file_name in file_names
+                             for tweet in iter_json_array(
+                                os.path.join(directory_path, file_name))),
+                            batch_size)
+
+def download_source(users, max_tweets = 1000, batch_size = BATCH_SIZE,
+                    downloader = None):
+    """ Source stage downloading each user's recent tweets from Twitter,
+    newest first.  Users are fetched concurrently through one shared
+    TweetDownloader (one client and rate limit, paged requests), at most
+    its <workers> users ahead of the stream.  Users that fail are reported
+    and skipped.
+
+    Args:
+    users (list of str): Twitter handles, e.g. @MrPeanut.
+    max_tweets (int): Most tweets per user.
+    batch_size (int): Tweets per batch.
+    downloader (TweetDownloader): Defaults to one over the Twitter API with
+        credentials from the environment; without them nothing is
+        downloaded.
+    """
+    from .data_processing.download_tweets import (TweetDownloader,
+                                                  twitter_transport)
+    if downloader is None:
+        transport = twitter_transport()
+        if transport is None:
+            return user_tweets_source([], batch_size)
+        downloader = TweetDownloader(transport)
+
+    def user_tweets():
+        pending, remaining = deque(), iter(users)
+        with ThreadPoolExecutor(max_workers=downloader.workers) as executor:
+            def submit(user):
+                pending.append((user, executor.submit(downloader.fetch, user,
+                                                      max_tweets)))
+
+            for user in islice(remaining, downloader.workers):
+                submit(user)
+            while pending:
+                user, future = pending.popleft()
+                for next_user in islice(remaining, 1):
+                    submit(next_user)
+                try:
+                    tweets = future.result()
+                except Exception as error:
+                    print(f'Failed to download {user}: {error}')
+                    continue
+                yield user, [[tweet['text'], tweet['created_at']]
+                             for tweet in tweets]
+
+    return user_tweets_source(user_tweets(), batch_size)
+
+def take(batch, rows):
+    """ The rows of <batch> selected by index or boolean mask <rows>. """
+    rows = np.asarray(rows)
+    if rows.dtype == bool:
+        rows = np.flatnonzero(rows)
+
+    return {column : (values[rows] if isinstance(values, np.ndarray)
+                      else [values[row] for row in rows])
+            for column, values in batch.items()}
+
+def filter_stage(batches, filters, min_tweet_characters = 1):
+    """ Removes text matching <filters> from each tweet, as filter_tweets
+    does, and drops tweets left shorter than <min_tweet_characters>.
+
+    Args:
+    batches (iterable of batches): Upstream stage.
+    filters (list or RegexFilter): Regular expressions to remove.
+    min_tweet_characters (int): Shortest tweet kept.
+    """
+    from .data_processing.filter_tweets import RegexFilter
+    if not isinstance(filters, RegexFilter):
+        filters = RegexFilter(filters)
+
+    for batch in batches:
+        tweets = [filters(tweet).strip() for tweet in batch['tweet']]
+        batch = dict(batch, tweet=tweets)
+        keep = [len(tweet) >= min_tweet_characters for tweet in tweets]
+
+        if not all(keep):
+            batch = take(batch, keep)
+        if batch['tweet']:
+            yield batch
+
+def embed_stage(batches, encoder):
+    """ Adds an 'embedding' column with one encoder call per batch.
+
+    Args:
+    batches (iterable of batches): Upstream stage.
+    encoder: Embedding backend, e.g. SentenceEncoder or HashedNgramEncoder.
+    """
+    for batch in batches:
+        yield dict(batch, embedding=np.asarray(
+                                encoder.embed_phrases(batch['tweet']),
+                                dtype=np.float32))
+
+def _infer_many(models, user_ids, inputs):
+    if hasattr(models, 'infer_many'):
+        # A ModelRegistry.
+        return models.infer_many(user_ids, inputs)
+    return type(models[user_ids[0]]).infer_many(models, user_ids, inputs)
+
+def score_stage(batches, models):
+    """ Adds 'score' and 'fraudulent' columns, scoring each tweet against its
+    user's characterization in one batched call per batch.  Tweets of users
+    without a characterization get a NaN score and aren't flagged.
+
+    Args:
+    batches (iterable of batches): Upstream stage; needs an 'embedding'
+        column unless the models take tweet text (e.g. TF-IDF models, or
+        embedding models with an encoder).
+    models: ModelRegistry, or dict of user -> characterized model, all of
+        one class.
+    """
+    for batch in batches:
+        names = np.asarray(batch['name'])
+        known = np.array([name in models for name in batch['name']],
+                         dtype=bool)
+        scores = np.full(len(names), np.nan)
+        flags  = np.zeros(len(names), dtype=bool)
+
+        if known.any():
+            rows = np.flatnonzero(known)
+            first = models[names[rows[0]]]
+            if getattr(first, 'embedded_corpus', False):
+                inputs = batch['embedding'][rows]
+            else:
+                inputs = [batch['tweet'][row] for row in rows]
+            scores[rows], flags[rows] = _infer_many(models, names[rows],
+                                                    inputs)
+
+        yield dict(batch, score=scores, fraudulent=flags)
+
+def buffered(batches, max_batches = BUFFER_BATCHES):
+    """ Runs the upstream stages in a background thread, up to <max_batches>
+    batches ahead of the consumer.  An error upstream is raised here after
+    the batches before it; closing this generator early stops the thread.
+    """
+    buffer = queue.Queue(maxsize=max_batches)
+    stop = threading.Event()
+    errors = []
+    end = object()
+
+    def produce():
+        try:
+            for batch in batches:
+                _put(buffer, batch, stop)
+        except _Stopped:
+            return
+        except BaseException as error:
+            # Raised by the consumer once it's taken the batches before it.
+            errors.append(error)
+        try:
+            _put(buffer, end, stop)
+        except _Stopped:
+            pass
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            batch = _get(buffer, stop)
+            if batch is end:
+                break
+            yield batch
+    finally:
+        stop.set()
+        thread.join()
+
+    if errors:
+        raise errors[0]
+
+class _TweetFileWriter:
+    """ Streams [tweet, date] rows to a preprocessed user file. """
+    def __init__(self, output_file_path):
+        self.output_path = output_file_path
+        self.partial_path = work_file_path(output_file_path, PARTIAL_SUFFIX)
+        self.file = None
+        self.rows = 0
+
+    def write(self, tweets, dates):
+        if self.file is None:
+            self.file = open(self.partial_path, 'w')
+            self.file.write('[')
+        text = json.dumps([list(row) for row in zip(tweets, dates)])[1:-1]
+        self.file.write((',' if self.rows else '') + text)
+        self.rows += len(tweets)
+
+    def finish(self):
+        self.file.write(']')
+        self.file.close()
+        os.replace(self.partial_path, self.output_path)
+
+class _EmbeddedFileWriter:
+    """ Streams [tweet, date, embedding] rows to a processed user file. """
+    def __init__(self, output_file_path):
+        self.sink = _JSONSink(output_file_path)
+        self.sink.open(None, None)
+        self.rows = 0
+
+    def write(self, tweets, dates, embeddings):
+        self.sink.write(self.rows, list(zip(tweets, dates)), embeddings)
+        self.rows += len(tweets)
+
+    def finish(self):
+        self.sink.finish(None)
+
+def side_output(batches, directory_path, embeddings = False):
+    """ Passes batches through unchanged while writing one JSON file per user
+    to <directory_path>, as filter_tweets (or, with <embeddings>,
+    embed_tweets) would.  Files are written under a temporary name and
+    renamed into place once the stream ends, so an interrupted run leaves no
+    partial files in place of complete ones.
+    """
+    writers = {}
+    for batch in batches:
+        names = np.asarray(batch['name'])
+        for user in dict.fromkeys(batch['name']):
+            if user not in writers:
+                path = os.path.join(directory_path, user + '.json')
+                writers[user] = (_EmbeddedFileWriter(path) if embeddings
+                                 else _TweetFileWriter(path))
+
+            user_batch = take(batch, names == user)
+            if embeddings:
+                writers[user].write(user_batch['tweet'], user_batch['date'],
+                                    user_batch['embedding'])
+            else:
+                writers[user].write(user_batch['tweet'], user_batch['date'])
+        yield batch
+
+    for writer in writers.values():
+        writer.finish()
+
+def stream_pipeline(source, filters = None, min_tweet_characters = 1,
+                    encoder = None, models = None,
+                    preprocessed_directory = None, processed_directory = None,
+                    buffer_batches = BUFFER_BATCHES):
+    """ Chains the standard stages: source, filter, embed, score.  Stages
+    without their argument are skipped, e.g. with no <models> the stream
+    ends at the embeddings.
+
+    Args:
+    source (iterable of batches): e.g. raw_file_source or download_source.
+    filters (list): Regular expressions to remove from tweets.
+    min_tweet_characters (int): Shortest filtered tweet kept.
+    encoder: Embedding backend.
+    models: ModelRegistry or dict of user -> model to score against.
+    preprocessed_directory (str): If given, also write the filtered tweets
+        there, as filter_raw_data.py would.
+    processed_directory (str): If given, also write the embedded tweets
+        there, as embed_preprocessed_data.py would.
+    buffer_batches (int): Batches buffered between the filter, embed and
+        score stages, which run in separate threads.
+
+    Returns:
+    generator: batches from the last stage.
+    """
+    batches = source
+    if filters is not None:
+        batches = filter_stage(batches, filters, min_tweet_characters)
+    if preprocessed_directory:
+        batches = side_output(batches, preprocessed_directory)
+
+    if encoder is not None:
+        batches = embed_stage(buffered(batches, buffer_batches), encoder)
+        if processed_directory:
+            batches = side_output(batches, processed_directory,
+                                  embeddings = True)
+
+    if models is not None:
+        batches = score_stage(buffered(batches, buffer_batches), models)
+
+    return batches
+
+def write_scores(batches, output_file_path):
+    """ Sink stage writing scored tweets to <output_file_path>, one JSON
+    object per line with name, tweet, date, score and fraudulent.
+
+    Returns:
+    dict: 'tweets', 'flagged', 'seconds' and 'tweets_per_second' for the
+        whole stream.
+    """
+    n_tweets, n_flagged = 0, 0
+    start = time.perf_counter()
+
+    with open(output_file_path, 'w') as file:
+        for batch in batches:
+            for name, tweet, date, score, flag in zip(
+                    batch['name'], batch['tweet'], batch['date'],
+                    batch['score'], batch['fraudulent']):
+                file.write(json.dumps({'name'       : name,
+                                       'tweet'      : tweet,
+                                       'date'       : date,
+                                       'score'      : (None if np.isnan(score)
+                                                       else float(score)),
+                                       'fraudulent' : bool(flag)}) + '\n')
+            n_tweets  += len(batch['name'])
+            n_flagged += int(np.sum(batch['fraudulent']))
+
+    seconds = time.perf_counter() - start
+    return {'tweets'            : n_tweets,
+            'flagged'           : n_flagged,
+            'seconds'           : seconds,
+            'tweets_per_second' : n_tweets / seconds if seconds else 0.}
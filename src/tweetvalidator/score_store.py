@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Binary storage for the similarity scores written by model evaluation.
+
+Each model configuration's directory (<eval_output_path>/<file_prefix>)
+holds
+
+    own.npy      float32 scores of every user's own test tweets, user after
+                 user, in standard numpy format so it can be memory-mapped
+    other.npy    float32 scores of every other user's test tweets against
+                 each user, user after user
+    scores.json  {"users": [...], "own_offsets": [...],
+                  "other_offsets": [...]}: user i's scores are
+                 own[own_offsets[i]:own_offsets[i + 1]], and likewise other
+
+in place of the JSON own.json/other.json per user and in aggregate.  The
+whole of own.npy and other.npy are the aggregate scores.  Also converts
+directories of the JSON format.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import os
+import json
+import numpy as np
+
+SCORE_DTYPE      = np.float32
+OWN_FILE         = 'own.npy'
+OTHER_FILE       = 'other.npy'
+DESCRIPTION_FILE = 'scores.json'
+PARTIAL_SUFFIX   = '.partial'
+
+def is_score_store(directory_path):
+    """ True if <directory_path> holds binary scores. """
+    return os.path.exists(os.path.join(directory_path, DESCRIPTION_FILE))
+
+def _offsets(arrays):
+    return [0] + np.cumsum([len(array) for array in arrays]).tolist()
+
+def _save(path, array):
+    with open(path + PARTIAL_SUFFIX, 'wb') as file:
+        np.save(file, array)
+    os.replace(path + PARTIAL_SUFFIX, path)
+
+def write_score_store(directory_path, user_scores):
+    """ Writes one model configuration's scores to <directory_path>.
+
+    Args:
+    directory_path (str): Model configuration output directory; created if
+        missing.
+    user_scores (list of tuples): (user, own scores, other scores), as
+        yielded by evaluate_model.user_similarity_scores.
+
+    Returns:
+    tuple: (own, other) aggregate score arrays.
+    """
+    if not os.path.isdir(directory_path):
+        os.makedirs(directory_path)
+
+    users = [user for user, _, _ in user_scores]
+    own   = [np.asarray(scores, dtype=SCORE_DTYPE).ravel()
+             for _, scores, _ in user_scores]
+    other = [np.asarray(scores, dtype=SCORE_DTYPE).ravel()
+             for _, _, scores in user_scores]
+
+    empty = np.zeros(0, dtype=SCORE_DTYPE)
+    scores_own   = np.concatenate(own)   if own   else empty
+    scores_other = np.concatenate(other) if other else empty
+
+    _save(os.path.join(directory_path, OWN_FILE), scores_own)
+    _save(os.path.join(directory_path, OTHER_FILE), scores_other)
+
+    # Written last, so a store only appears once its arrays are complete.
+    description_path = os.path.join(directory_path, DESCRIPTION_FILE)
+    with open(description_path + PARTIAL_SUFFIX, 'w') as file:
+        json.dump({'users'         : users,
+                   'own_offsets'   : _offsets(own),
+                   'other_offsets' : _offsets(other)}, file)
+    os.replace(description_path + PARTIAL_SUFFIX, description_path)
+
+    return scores_own, scores_other
+
+class ScoreStore:
+    """ One model configuration's scores, memory-mapped.
+
+        Args:
+        directory_path (str): Directory written by write_score_store.
+        mmap_mode (str or None): Passed to np.load.  Defaults to 'r'.
+    """
+    def __init__(self, directory_path, mmap_mode='r'):
+        with open(os.path.join(directory_path, DESCRIPTION_FILE), 'r') as file:
+            description = json.load(file)
+
+        self.users = description['users']
+        self.own   = np.load(os.path.join(directory_path, OWN_FILE),
+                             mmap_mode=mmap_mode)
+        self.other = np.load(os.path.join(directory_path, OTHER_FILE),
+                             mmap_mode=mmap_mode)
+        self._own_offsets   = description['own_offsets']
+        self._other_offsets = description['other_offsets']
+        self._index = {user : i for i, user in enumerate(self.users)}
+
+        if (self._own_offsets[-1] != len(self.own) or
+                self._other_offsets[-1] != len(self.other)):
+            raise ValueError(f'Corrupt score store in {directory_path}.')
+
+    def __contains__(self, user):
+        return user in self._index
+
+    def user_scores(self, user):
+        """ (own, other) score arrays for <user>, as views into the store.
+
+        Raises:
+        KeyError: if the store has no scores for <user>.
+        """
+        i = self._index[user]
+        return (self.own[self._own_offsets[i]:self._own_offsets[i + 1]],
+                self.other[self._other_offsets[i]:self._other_offsets[i + 1]])
+
+def _read_json_scores(file_path):
+    with open(file_path, 'r') as file:
+        return json.loads(file.read())
+
+def convert_json_scores(directory_path, remove_json = False):
+    """ Converts a model configuration directory of JSON scores (own.json and
+    other.json in each user's subdirectory) to a score store in place.
+
+    Args:
+    directory_path (str): Model configuration output directory.
+    remove_json (bool): Delete the JSON files, and the emptied user
+        directories, once the store is written.
+
+    Returns:
+    int: the number of users converted.
+    """
+    users = sorted(user for user in os.listdir(directory_path)
+                   if os.path.exists(os.path.join(directory_path, user,
+                                                  'own.json')))
+    user_scores = [(user,
+                    _read_json_scores(os.path.join(directory_path, user,
+                                                   'own.json')),
+                    _read_json_scores(os.path.join(directory_path, user,
+                                                   'other.json')))
+                   for user in users]
+    if not users:
+        return 0
+    write_score_store(directory_path, user_scores)
+
+    if remove_json:
+        for user in users:
+            user_directory = os.path.join(directory_path, user)
+            for file_name in ['own.json', 'other.json']:
+                os.remove(os.path.join(user_directory, file_name))
+            if not os.listdir(user_directory):
+                os.rmdir(user_directory)
+        for file_name in ['own.json', 'other.json']:
+            file_path = os.path.join(directory_path, file_name)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    return len(users)
+
+def convert_eval_directory(eval_directory, remove_json = False):
+    """ Converts every model configuration directory of JSON scores in
+    <eval_directory> (e.g. 'eval_output_path') to a score store.
+    """
+    for model in sorted(os.listdir(eval_directory)):
+        model_directory = os.path.join(eval_directory, model)
+        if not os.path.isdir(model_directory):
+            continue
+        n_users = convert_json_scores(model_directory, remove_json)
+        if n_users:
+            print(f'Converted {model}; {n_users} users.')
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+A long-running tweet validation service over HTTP, built on asyncio.
+
+The sentence encoder and the per-user characterizations (a ModelRegistry)
+stay resident.  Concurrent requests are coalesced into micro-batches, up to
+max_batch_size requests or max_wait_ms after the first one arrives, and each
+batch is embedded with one embed_phrases call and scored with one
+infer_many call per model class, since both are far cheaper per tweet in
+batches.
+
+Endpoints:
+- POST /validate with a JSON body {"user": ..., "tweet": ...} returns
+  {"user": ..., "score": ..., "fraudulent": ...}.  Unknown users, and users
+  whose models don't score embeddings, get a 404.
+- GET /stats returns request count, throughput, p50/p99 latency and mean
+  batch size.
+
+Any object with an embed_phrases(list of str) -> 2D array method can be the
+encoder, e.g. SentenceEncoder or a stub for local testing.
+
+October, 2026
+@author: Joshua Rubin
+"""
+
+import json
+import time
+import asyncio
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Recent requests kept for the latency percentiles and throughput reported
+# by /stats.
+LATENCY_WINDOW = 10000
+
+# Largest request body accepted, in bytes.
+MAX_BODY_BYTES = 1 << 20
+
+HTTP_REASONS = {200 : 'OK', 400 : 'Bad Request', 404 : 'Not Found',
+                405 : 'Method Not Allowed', 413 : 'Payload Too Large',
+                500 : 'Internal Server Error'}
+
+class UnknownUserError(KeyError):
+    """ Raised for a request naming a user without a characterization. """
+
+class UnsupportedModelError(TypeError):
+    """ Raised for a request naming a user whose model doesn't score
+    embeddings (e.g. a TFIDFModel), so the service can't use it.
+    """
+
+class PayloadTooLarge(ValueError):
+    """ Raised for a request body over MAX_BODY_BYTES. """
+
+class LatencyStats:
+    """ Request latencies, throughput and batch sizes for /stats.
+    Latency and throughput are over the most recent <window> requests, so
+    they track current load rather than the whole uptime.
+    """
+    def __init__(self, window=LATENCY_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.completed = deque(maxlen=window)
+        self.requests = 0
+        self.batches = 0
+        self.batched_requests = 0
+
+    def record_request(self, latency):
+        self.latencies.append(latency)
+        self.completed.append(time.perf_counter())
+        self.requests += 1
+
+    def record_batch(self, batch_size):
+        self.batches += 1
+        self.batched_requests += batch_size
+
+    def summary(self):
+        """ Returns a JSON-serializable dict of the statistics so far. """
+        latencies = np.array(self.latencies)
+        elapsed = (self.completed[-1] - self.completed[0]
+                   if len(self.completed) > 1 else 0)
+
+        def percentile_ms(q):
+            return (float(np.percentile(latencies, q)) * 1000
+                    if len(latencies) else None)
+
+        return {'requests'        : self.requests,
+                'throughput'      : ((len(self.completed) - 1) / elapsed
+                                     if elapsed else 0.),
+                'p50_ms'          : percentile_ms(50),
+                'p99_ms'          : percentile_ms(99),
+                'batches'         : self.batches,
+                'mean_batch_size' : (self.batched_requests / self.batches
+                                     if self.batches else 0.)}
+
+class MicroBatcher:
+    """ Coalesces concurrent submissions into batches for a function that is
+    cheaper per item in bulk.
+
+        Args:
+        process_batch (callable): Takes a list of items and returns a list
+            of results (or exceptions, which are raised to that item's
+            submitter) in the same order.  Runs in a worker thread, one
+            batch at a time, so the event loop keeps accepting requests.
+        max_batch_size (int): Most items per batch.
+        max_wait_ms (float): Longest a batch waits for more items after its
+            first one arrives.
+        stats (LatencyStats or None): Where to record batch sizes.
+    """
+    def __init__(self, process_batch, max_batch_size=64, max_wait_ms=5,
+                 stats=None):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.stats = stats
+        self._pending = deque()
+        self._arrived = None
+        self._worker = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def start(self):
+        """ Starts batching on the running event loop. """
+        self._arrived = asyncio.Event()
+        self._worker = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._executor.shutdown(wait=True)
+
+    async def submit(self, item):
+        """ Queues <item> and returns its result once its batch is done. """
+        future = asyncio.get_event_loop().create_future()
+        self._pending.append((item, future))
+        self._arrived.set()
+        return await future
+
+    async def _next_batch(self):
+        """ Waits for an item, then collects more until the batch is full or
+        max_wait_ms has passed.
+        """
+        loop = asyncio.get_event_loop()
+        while not self._pending:
+            self._arrived.clear()
+            await self._arrived.wait()
+
+        deadline = loop.time() + self.max_wait_ms / 1000
+        while len(self._pending) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), timeout)
+            except asyncio.TimeoutError:
+                break
+
+        return [self._pending.popleft()
+                for _ in range(min(self.max_batch_size, len(self._pending)))]
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            batch = await self._next_batch()
+            items = [item for item, _ in batch]
+
+            try:
+                results = await loop.run_in_executor(self._executor,
+                                                     self.process_batch, items)
+            except Exception as error:
+                results = [error] * len(items)
+
+            if self.stats is not None:
+                self.stats.record_batch(len(items))
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+class ValidationService:
+    """ Validates (user, tweet) requests in micro-batches against resident
+    per-user characterizations.
+
+        Args:
+        encoder: Object with embed_phrases(list of str) -> 2D array.
+        registry (ModelRegistry): Per-user characterized embedding models.
+            Users with other models (e.g. TFIDF) aren't served.
+        max_batch_size (int): Most requests per micro-batch.
+        max_wait_ms (float): Longest a request waits for its batch to fill.
+        preload (bool): Load every user's model at start-up rather than on
+            first request.  Defaults to True.
+    """
+    def __init__(self, encoder, registry, max_batch_size=64, max_wait_ms=5,
+                 preload=True):
+        self.encoder = encoder
+        self.registry = registry
+        self.stats = LatencyStats()
+        self.batcher = MicroBatcher(self.validate_batch, max_batch_size,
+                                    max_wait_ms, self.stats)
+
+        if preload:
+            # Users that can't be served are reported now, and get an error
+            # per request later.
+            for user in registry.users():
+                try:
+                    self.model(user)
+                except Exception as error:
+                    print(f'Not serving {user}: {error}')
+
+    def model(self, user):
+        """ Returns <user>'s model, loading it on first use.
+
+        Raises:
+        UnknownUserError: if <user> has no saved model.
+        UnsupportedModelError: if <user>'s model doesn't score embeddings.
+        """
+        try:
+            model = self.registry.get(user)
+        except KeyError:
+            raise UnknownUserError(user)
+
+        if not getattr(model, 'embedded_corpus', False):
+            raise UnsupportedModelError(f'{user} has a '
+                                        f'{type(model).__name__}, which '
+                                        "doesn't score embeddings.")
+        return model
+
+    def validate_batch(self, requests):
+        """ Embeds and scores a batch of (user, tweet) pairs.  Users are
+        scored in groups by model class, and a user whose model can't be
+        loaded or used only fails its own requests.
+
+        Args:
+        requests (list of tuples): (user, tweet text) pairs.
+
+        Returns:
+        list: A (score, fraudulent) tuple for each request, or the
+            exception (e.g. UnknownUserError) for a request that failed.
+        """
+        models, errors = {}, {}
+        for user, _ in requests:
+            if user not in models and user not in errors:
+                try:
+                    models[user] = self.model(user)
+                except Exception as error:
+                    errors[user] = error
+
+        results = [errors.get(user) for user, _ in requests]
+        known = [idx for idx, (user, _) in enumerate(requests)
+                 if user in models]
+        if not known:
+            return results
+
+        embeddings = np.asarray(self.encoder.embed_phrases(
+                                    [requests[idx][1] for idx in known]))
+
+        # Rows of <embeddings> by the class of their user's model.
+        class_rows = {}
+        for row, idx in enumerate(known):
+            model_class = type(models[requests[idx][0]])
+            class_rows.setdefault(model_class, []).append(row)
+
+        for model_class, rows in class_rows.items():
+            users = [requests[known[row]][0] for row in rows]
+            try:
+                scores, flags = model_class.infer_many(
+                                    {user : models[user] for user in users},
+                                    users, embeddings[rows])
+            except Exception as error:
+                for row in rows:
+                    results[known[row]] = error
+                continue
+
+            for row, score, flag in zip(rows, scores, flags):
+                results[known[row]] = (float(score), bool(flag))
+
+        return results
+
+    async def validate(self, user, tweet):
+        """ Returns (score, fraudulent) for one tweet, batched with any
+        concurrent requests.
+        """
+        return await self.batcher.submit((user, tweet))
+
+    async def start(self, host='127.0.0.1', port=8080):
+        """ Starts serving HTTP; returns the asyncio server.  Port 0 picks a
+        free port (see server.sockets[0].getsockname()).
+        """
+        self.batcher.start()
+        self.server = await asyncio.start_server(self._handle_connection,
+                                                 host, port)
+        return self.server
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await self.batcher.stop()
+
+    async def _handle_connection(self, reader, writer):
+        """ Serves HTTP/1.1 requests on a connection until the client closes
+        it or asks to.
+        """
+        try:
+            while True:
+                request = await read_http_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+
+                status, response = await self._route(method, path, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                write_http_response(writer, status, response, keep_alive)
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError as error:
+            status = 413 if isinstance(error, PayloadTooLarge) else 400
+            write_http_response(writer, status, {'error' : str(error)},
+                                keep_alive=False)
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        """ Returns (HTTP status, JSON-serializable response). """
+        if path == '/stats':
+            if method != 'GET':
+                return 405, {'error' : 'Use GET.'}
+            return 200, self.stats.summary()
+
+        if path != '/validate':
+            return 404, {'error' : f'No endpoint {path}.'}
+        if method != 'POST':
+            return 405, {'error' : 'Use POST.'}
+
+        try:
+            request = json.loads(body.decode('utf-8'))
+            user, tweet = str(request['user']), str(request['tweet'])
+        except (ValueError, KeyError, TypeError):
+            return 400, {'error' : 'Expected a JSON object with "user" and '
+                                   '"tweet".'}
+
+        start = time.perf_counter()
+        try:
+            score, fraudulent = await self.validate(user, tweet)
+        except UnknownUserError:
+            return 404, {'error' : f'No characterization for {user}.'}
+        except UnsupportedModelError as error:
+            return 404, {'error' : str(error)}
+        except Exception as error:
+            return 500, {'error' : repr(error)}
+        self.stats.record_request(time.perf_counter() - start)
+
+        return 200, {'user' : user, 'score' : score, 'fraudulent' : fraudulent}
+
+async def read_http_request(reader):
+    """ Reads one HTTP request from an asyncio StreamReader.
+
+    Returns:
+    tuple: (method, path, headers with lowercase names, body bytes), or None
+        if the connection closed before a request started.
+
+    Raises:
+    PayloadTooLarge: for a body over MAX_BODY_BYTES.
+    ValueError: for malformed requests.
+    """
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+
+    try:
+        method, path, _ = request_line.decode('latin-1').split()
+    except ValueError:
+        raise ValueError('Malformed request line.')
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get('content-length', 0))
+    if length > MAX_BODY_BYTES:
+        raise PayloadTooLarge('Request body too large.')
+    body = await reader.readexactly(length) if length else b''
+
+    return method.upper(), path, headers, body
+
+def write_http_response(writer, status, response, keep_alive=True):
+    """ Writes <response> as a JSON HTTP/1.1 response. """
+    body = json.dumps(response).encode('utf-8')
+    head = (f'HTTP/1.1 {status} {HTTP_REASONS.get(status, "")}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+    writer.write(head.encode('latin-1') + body)
+
+def run_service(encoder, registry, host='127.0.0.1', port=8080,
+                max_batch_size=64, max_wait_ms=5):
+    """ Serves validation requests until interrupted.
+
+    Args:
+    encoder: Object with embed_phrases(list of str) -> 2D array.
+    registry (ModelRegistry): Per-user characterized embedding models.
+    host (str): Interface to listen on.
+    port (int): Port to listen on.
+    max_batch_size (int): Most requests per micro-batch.
+    max_wait_ms (float): Longest a request waits for its batch to fill.
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    service = ValidationService(encoder, registry, max_batch_size, max_wait_ms)
+    loop.run_until_complete(service.start(host, port))
+    print(f'Serving {len(registry.users())} users on http://{host}:{port} '
+          f'(max batch {max_batch_size}, max wait {max_wait_ms} ms).')
+
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(service.stats.summary()))
+        loop.run_until_complete(service.stop())
+        loop.close()
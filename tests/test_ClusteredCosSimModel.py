@@ -1,11 +1,15 @@
 
 import os
 import json
+import numpy as np
 import pandas as pd
 from get_config import get_config
 from sklearn.model_selection import train_test_split
 
 from tweetvalidator.models import ClusteredCosSimModel
+from tweetvalidator.models.clustered_cos_sim_model import (cluster_statistics,
+                                                        UPDATED, RECLUSTERED,
+                                                        DRIFTED)
 
 INPUT_DIR_KEY = 'processed_data_path'
 
@@ -33,3 +37,133 @@ def test_model():
     sim_scores = model.similarity_score(test)
 
     assert(len(test)==len(sim_scores))
+
+# Characterizing from a contiguous 2D array should match the dataframe column.
+def test_model_accepts_matrix():
+    input_directory = get_config()[INPUT_DIR_KEY]
+
+    infiles = [x for x in os.listdir(input_directory) if x[0]=='@']
+
+    test_file_path = os.path.join(input_directory, infiles[0])
+
+    with open(test_file_path, 'r') as file:
+        in_data =  json.loads(file.read())
+
+    df = pd.DataFrame(in_data, columns = ['tweet','date','embedding'])
+
+    column_model = ClusteredCosSimModel(max_clusters=2)
+    column_model.characterize(df['embedding'], None)
+
+    matrix_model = ClusteredCosSimModel(max_clusters=2)
+    matrix_model.characterize(np.array([x[2] for x in in_data]), None)
+
+    assert(np.allclose(column_model.cluster_means, matrix_model.cluster_means))
+    assert(np.allclose(column_model.similarity_score(df['embedding']),
+                       matrix_model.similarity_score(
+                                        np.vstack(df['embedding'].values))))
+
+# Vectorized cluster statistics should agree with a tweet-by-tweet tally.
+def test_cluster_statistics():
+    rng = np.random.RandomState(0)
+    corpus = rng.standard_normal((50, 8))
+    corpus /= np.linalg.norm(corpus, axis=1)[:, None]
+    means = corpus[:3]
+    labels = rng.randint(3, size=50)
+
+    count, edges, sim_sum = cluster_statistics(corpus, labels, means)
+
+    for k in range(3):
+        sims = corpus[labels==k].dot(means[k])
+        assert(count[k]==len(sims))
+        assert(np.isclose(edges[k], min(1, sims.min())))
+        assert(np.isclose(sim_sum[k], sims.sum()))
+
+# Streaming updates should track a full characterization of the same tweets.
+def test_partial_characterize():
+    input_directory = get_config()[INPUT_DIR_KEY]
+
+    infiles = [x for x in os.listdir(input_directory) if x[0]=='@']
+
+    test_file_path = os.path.join(input_directory, infiles[0])
+
+    with open(test_file_path, 'r') as file:
+        in_data =  json.loads(file.read())
+
+    embeddings = np.array([x[2] for x in in_data])
+    n_old = len(embeddings) - 2
+
+    full_model = ClusteredCosSimModel()
+    full_model.characterize(embeddings, None)
+
+    model = ClusteredCosSimModel(drift_tolerance=1)
+    model.characterize(embeddings[:n_old], None)
+    outcome = model.partial_characterize(embeddings[n_old:])
+
+    assert(outcome==UPDATED)
+    assert(model.cluster_count.sum()==len(embeddings))
+    assert(np.allclose(model.cluster_means, full_model.cluster_means,
+                       atol=1e-4))
+    assert(np.allclose(model.cluster_scales, full_model.cluster_scales,
+                       atol=1e-3))
+
+    # With the history kept, any drift at all forces a full recluster.
+    model = ClusteredCosSimModel(drift_tolerance=0, keep_history=True)
+    model.characterize(embeddings[:n_old], None)
+    assert(model.partial_characterize(embeddings[n_old:])==RECLUSTERED)
+    assert(np.allclose(model.cluster_means, full_model.cluster_means,
+                       atol=1e-5))
+
+    # Without it, nothing but the cluster state is kept, and drift is
+    # reported until the caller characterizes again.
+    model = ClusteredCosSimModel(drift_tolerance=0)
+    model.characterize(embeddings[:n_old], None)
+    reference_means = model.reference_means
+    assert(model.history is None)
+    assert(model.partial_characterize(embeddings[n_old:-1])==DRIFTED)
+    assert(model.partial_characterize(embeddings[-1:])==DRIFTED)
+    assert(np.array_equal(model.reference_means, reference_means))
+    assert(model.cluster_count.sum()==len(embeddings))
+
+    model.characterize(embeddings, None)
+    assert(model.partial_characterize(embeddings[:0])==UPDATED)
+
+# Batched multi-user scoring matches each user's own model, in input order.
+def test_infer_many():
+    input_directory = get_config()[INPUT_DIR_KEY]
+
+    infiles = [x for x in os.listdir(input_directory) if x[0]=='@']
+
+    test_file_path = os.path.join(input_directory, infiles[0])
+
+    with open(test_file_path, 'r') as file:
+        in_data =  json.loads(file.read())
+
+    df = pd.DataFrame(in_data, columns = ['tweet','date','embedding'])
+    embeddings = np.vstack(df['embedding'].values)
+
+    # Users with different numbers of clusters and thresholds.
+    models = {}
+    for user, max_clusters in [('@a', 1), ('@b', 2), ('@c', 3)]:
+        models[user] = ClusteredCosSimModel(max_clusters=max_clusters)
+        models[user].characterize(embeddings[::max_clusters], None)
+    models['@b'].set_hyperparameters({'threshold':0.5})
+
+    user_ids = np.array(['@c', '@a', '@b'])[np.arange(len(df)) % 3]
+
+    scores, flags = ClusteredCosSimModel.infer_many(models, user_ids,
+                                                    df['embedding'])
+
+    for user, model in models.items():
+        rows = user_ids == user
+        assert(np.allclose(scores[rows],
+                           model.similarity_score(embeddings[rows]),
+                           atol=1e-6))
+        assert(np.array_equal(flags[rows], model.infer(embeddings[rows])))
+
+    unscaled = ClusteredCosSimModel.similarity_score_many(
+                    models, user_ids, embeddings, cluster_scaling=False)
+    rows = user_ids == '@b'
+    assert(np.allclose(unscaled[rows],
+                       models['@b'].similarity_score(embeddings[rows],
+                                                     cluster_scaling=False),
+                       atol=1e-6))
@@ -0,0 +1,45 @@
+
+import numpy as np
+from tweetvalidator.models.spherical_kmeans import (SphericalKMeans,
+                                                    normalize_rows)
+
+# Three well separated groups of unit vectors.
+def make_corpus(n=300, dim=16, seed=0):
+    rng = np.random.RandomState(seed)
+    centers = normalize_rows(rng.standard_normal((3, dim)))
+    labels = rng.randint(3, size=n)
+    return normalize_rows(centers[labels]
+                          + 0.05 * rng.standard_normal((n, dim))), labels
+
+# Each true group should land in a single cluster with unit-norm centroids.
+def test_full_batch():
+    X, truth = make_corpus()
+    kmeans = SphericalKMeans(n_clusters=3, random_state=0).fit(X)
+
+    assert(np.allclose(np.linalg.norm(kmeans.cluster_centers_, axis=1), 1))
+    for group in range(3):
+        assert(len(set(kmeans.labels_[truth==group]))==1)
+    assert(np.isclose(kmeans.inertia_, 2 * np.sum(
+        1 - np.sum(X * kmeans.cluster_centers_[kmeans.labels_], axis=1))))
+
+# Mini-batch mode should find (nearly) the same solution.
+def test_minibatch():
+    X, _ = make_corpus()
+    full = SphericalKMeans(n_clusters=3, random_state=0).fit(X)
+    mini = SphericalKMeans(n_clusters=3, random_state=0, batch_size=64).fit(X)
+
+    assert(mini.inertia_ <= 1.05 * full.inertia_)
+
+# Warm starting from a converged fit should converge immediately.
+def test_warm_start():
+    X, _ = make_corpus()
+    full = SphericalKMeans(n_clusters=3, random_state=0).fit(X)
+    warm = SphericalKMeans(n_clusters=3, init=full.cluster_centers_).fit(X)
+
+    assert(warm.n_iter_ <= 2)
+    assert(np.isclose(warm.inertia_, full.inertia_))
+
+    # Fewer starting centroids than clusters are topped up.
+    partial = SphericalKMeans(n_clusters=3, random_state=0,
+                              init=full.cluster_centers_[:2]).fit(X)
+    assert(partial.cluster_centers_.shape==full.cluster_centers_.shape)
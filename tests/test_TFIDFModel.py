@@ -1,11 +1,15 @@
 
 import os
 import json
+import numpy as np
 import pandas as pd
 from get_config import get_config
 from sklearn.model_selection import train_test_split
+from sklearn.feature_extraction.text import (TfidfVectorizer,
+                                             CountVectorizer)
+from sklearn.preprocessing import normalize
 
-from tweetvalidator.models import TFIDFModel
+from tweetvalidator.models import TFIDFModel, TFIDFEngine
 
 INPUT_DIR_KEY = 'processed_data_path'
 
@@ -62,4 +66,173 @@ def test_TFIDF_model():
     sim_scores = model.similarity_score(test)
 
     assert(len(test)==len(sim_scores))
-    
\ No newline at end of file
+    
+# The engine-backed model must reproduce a TfidfVectorizer fit on the
+# concatenated user and context corpora.
+def test_matches_tfidf_vectorizer():
+    input_directory = get_config()[INPUT_DIR_KEY]
+
+    infiles = [x for x in os.listdir(input_directory) if x[0]=='@']
+
+    test_file_path = os.path.join(input_directory, infiles[0])
+
+    with open(test_file_path, 'r') as file:
+        in_data =  json.loads(file.read())
+
+    df = pd.DataFrame(in_data, columns = ['tweet','date','embedding'])
+
+    train, test =  train_test_split(df['tweet'],
+                                    test_size = 0.4, random_state = 1)
+    train_doc, train_context =  train_test_split(train,
+                                    test_size = 0.5, random_state = 1)
+
+    vectorizer = TfidfVectorizer(stop_words='english', use_idf=True)
+    word_freq_vec = vectorizer.fit_transform(
+                        [' '.join(train_doc),
+                         ' '.join(train_doc)+' '.join(train_context)]
+                        ).toarray()[0]
+    tweet_freqs = TfidfVectorizer(stop_words='english', use_idf=False,
+                        vocabulary=vectorizer.vocabulary_).fit_transform(test)
+
+    model = TFIDFModel(use_context=True)
+    model.characterize(train_doc, train_context)
+
+    assert(np.allclose(model.word_freq_vec, word_freq_vec))
+    assert(np.allclose(model.similarity_score(test),
+                       tweet_freqs.dot(word_freq_vec)))
+
+# One sparse product over all users should match per-user views.
+def test_multi_user_engine():
+    input_directory = get_config()[INPUT_DIR_KEY]
+
+    frames = []
+    for file_name in os.listdir(input_directory):
+        if file_name[0]=='@':
+            with open(os.path.join(input_directory, file_name), 'r') as file:
+                frame = pd.DataFrame(json.loads(file.read()),
+                                     columns = ['tweet','date','embedding'])
+            frame['name'] = file_name.split('.')[0]
+            frames.append(frame)
+    df = pd.concat(frames)
+
+    engine = TFIDFEngine().fit(df['tweet'], df['name'])
+    all_scores = engine.similarity_scores(df['tweet'])
+
+    assert(all_scores.shape==(len(df), len(frames)))
+    for user_idx, user in enumerate(engine.owners):
+        model = TFIDFModel.from_engine(engine, user)
+        assert(np.allclose(model.similarity_score(df['tweet']),
+                           all_scores[:, user_idx]))
+
+# The compiled tokenizer and term map must give exactly CountVectorizer's
+# counts over the same vocabulary, L2-normalized.
+def test_transform_matches_count_vectorizer():
+    input_directory = get_config()[INPUT_DIR_KEY]
+
+    infiles = [x for x in os.listdir(input_directory) if x[0]=='@']
+
+    test_file_path = os.path.join(input_directory, infiles[0])
+
+    with open(test_file_path, 'r') as file:
+        in_data =  json.loads(file.read())
+
+    tweets = [x[0] for x in in_data]
+    train, test = train_test_split(tweets, test_size = 0.4, random_state = 1)
+    # Unseen terms, repeated terms and nothing at all.
+    test = list(test) + ['zzyzx quux', 'peanut peanut butter peanut', '']
+
+    engine = TFIDFEngine().fit(train, ['a'] * len(train))
+    counts = CountVectorizer(stop_words='english',
+                             vocabulary=engine.vectorizer.vocabulary_
+                             ).transform(test)
+
+    assert(np.allclose(engine.transform(test).toarray(),
+                       normalize(counts, norm='l2').toarray()))
+    assert(np.allclose(engine.similarity_score(test, 'a'),
+                       engine.similarity_scores(test)[:, 0]))
+
+# Hashed mode needs no vocabulary and supports streaming IDF updates.
+def test_hashed_engine():
+    input_directory = get_config()[INPUT_DIR_KEY]
+
+    infiles = [x for x in os.listdir(input_directory) if x[0]=='@']
+
+    test_file_path = os.path.join(input_directory, infiles[0])
+
+    with open(test_file_path, 'r') as file:
+        in_data =  json.loads(file.read())
+
+    tweets = [x[0] for x in in_data]
+    half = len(tweets) // 2
+
+    model = TFIDFModel(use_context=False, n_features=2**12)
+    model.characterize(tweets, None)
+
+    assert(model.feature_names is None)
+    assert(model.word_freq_vec.shape==(2**12,))
+    assert(len(model.similarity_score(tweets))==len(tweets))
+
+    # Fitting in two steps matches fitting all at once.
+    engine = TFIDFEngine(n_features=2**12).fit(tweets, ['a'] * len(tweets))
+    streamed = TFIDFEngine(n_features=2**12).fit(tweets[:half],
+                                                 ['a'] * half)
+    streamed.partial_fit(tweets[half:], ['a'] * (len(tweets) - half))
+
+    assert(np.allclose(engine.idf, streamed.idf))
+    assert(np.allclose(engine.similarity_scores(tweets),
+                       streamed.similarity_scores(tweets)))
+
+# Without collisions, hashed scores match exact scores, including for tweets
+# with terms never seen in fit.
+def test_hashed_matches_exact():
+    corpus = ['the cat sat on the mat', 'a dog chased the cat',
+              'birds sing in the morning']
+    tweets = ['the cat likes zebras and quokkas', 'dog sat', 'zebras', '']
+
+    for use_idf in [False, True]:
+        exact = TFIDFEngine(use_idf=use_idf).fit(corpus, ['a', 'a', 'b'])
+        hashed = TFIDFEngine(use_idf=use_idf,
+                             n_features=2**20).fit(corpus, ['a', 'a', 'b'])
+
+        assert(np.allclose(exact.similarity_scores(tweets),
+                           hashed.similarity_scores(tweets)))
+        owners = ['a', 'b', 'a', 'b']
+        assert(np.allclose(exact.paired_similarity_scores(tweets, owners),
+                           hashed.paired_similarity_scores(tweets, owners)))
+
+# Batched multi-user scoring matches each user's model, whether the models
+# share a multi-user engine or have their own.
+def test_infer_many():
+    input_directory = get_config()[INPUT_DIR_KEY]
+
+    frames = []
+    for file_name in os.listdir(input_directory):
+        if file_name[0]=='@':
+            with open(os.path.join(input_directory, file_name), 'r') as file:
+                frame = pd.DataFrame(json.loads(file.read()),
+                                     columns = ['tweet','date','embedding'])
+            frame['name'] = file_name.split('.')[0]
+            frames.append(frame)
+    df = pd.concat(frames)
+
+    # Interleave users.
+    df = df.sample(frac=1, random_state=1)
+    tweets, user_ids = df['tweet'].values, df['name'].values
+
+    engine = TFIDFEngine().fit(tweets, user_ids)
+    shared = {user : TFIDFModel.from_engine(engine, user)
+              for user in engine.owners}
+
+    separate = {}
+    for user in engine.owners:
+        separate[user] = TFIDFModel(use_context=True)
+        separate[user].characterize(tweets[user_ids == user],
+                                    tweets[user_ids != user])
+
+    for models in [shared, separate]:
+        scores, flags = TFIDFModel.infer_many(models, user_ids, tweets)
+        for user, model in models.items():
+            rows = user_ids == user
+            assert(np.allclose(scores[rows],
+                               model.similarity_score(tweets[rows])))
+            assert(np.array_equal(flags[rows], model.infer(tweets[rows])))
@@ -0,0 +1,46 @@
+import os
+import numpy as np
+from sklearn import metrics
+
+from tweetvalidator.analysis import roc_curve, auc, analyze_scores
+from tweetvalidator.score_store import write_score_store
+
+# Curves and areas match scikit-learn's, ties included.
+def test_matches_sklearn():
+    random = np.random.RandomState(0)
+    own   = np.round(random.rand(300) + 0.2, 2)
+    other = np.round(random.rand(900), 2)
+
+    fpr, tpr, thresholds = roc_curve(own, other)
+    truth = np.r_[np.ones(len(own)), np.zeros(len(other))]
+    expected = metrics.roc_curve(truth, np.r_[own, other])
+
+    assert(np.allclose(fpr, expected[0]))
+    assert(np.allclose(tpr, expected[1]))
+    assert(np.array_equal(thresholds[1:], expected[2][1:]))
+    assert(np.isclose(auc(fpr, tpr),
+                      metrics.roc_auc_score(truth, np.r_[own, other])))
+
+# Tables for every model, user and model aggregate, without plots.
+def test_analyze_scores(tmpdir):
+    random = np.random.RandomState(1)
+    eval_directory = tmpdir.mkdir('eval')
+    for model in ['emb_1', 'tfidf']:
+        write_score_store(str(eval_directory.join(model)),
+                          [(user, random.rand(20) + 0.3, random.rand(40))
+                           for user in ['@a', '@b']])
+
+    output_directory = str(tmpdir.mkdir('analysis'))
+    aucs = analyze_scores(str(eval_directory), output_directory, plot=False)
+
+    assert(len(aucs)==6)
+    assert(all(0.5<area<=1 for area in aucs.values()))
+    for directory, names in [('', ['emb_1', 'tfidf']),
+                             ('@a', ['emb_1', 'tfidf']),
+                             ('emb_1', ['@a', '@b'])]:
+        for name in names:
+            rates = np.loadtxt(os.path.join(output_directory, directory,
+                                            f'rates_{name}.txt'),
+                               delimiter=',', skiprows=1)
+            assert(rates.shape[1]==3 and rates[-1, 0]==1 and rates[-1, 1]==1)
+    assert(os.path.exists(os.path.join(output_directory, 'auc.csv')))
@@ -0,0 +1,92 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from get_config import get_config
+
+from tweetvalidator import CharacterizationCache
+from tweetvalidator.models import ClusteredCosSimModel, TFIDFModel
+
+INPUT_DIR_KEY = 'processed_data_path'
+
+def load_test_frame():
+    input_directory = get_config()[INPUT_DIR_KEY]
+
+    infiles = [x for x in os.listdir(input_directory) if x[0]=='@']
+
+    test_file_path = os.path.join(input_directory, infiles[0])
+
+    with open(test_file_path, 'r') as file:
+        in_data =  json.loads(file.read())
+
+    return pd.DataFrame(in_data, columns = ['tweet','date','embedding'])
+
+# A second characterization on the same data is loaded from the cache and
+# scores exactly as a fresh one.
+def test_cache_hit(tmpdir):
+    df = load_test_frame()
+    cache = CharacterizationCache(str(tmpdir))
+
+    fresh = ClusteredCosSimModel(max_clusters=2)
+    fresh.characterize(df['embedding'], None)
+
+    cache.characterize(ClusteredCosSimModel(max_clusters=2),
+                       df['embedding'], None)
+    assert(len(os.listdir(str(tmpdir)))==1)
+
+    # verbose doesn't affect the characterization, so it isn't keyed.
+    cached = ClusteredCosSimModel(max_clusters=2, verbose=True)
+    cache.characterize(cached, df['embedding'], None)
+    assert(len(os.listdir(str(tmpdir)))==1)
+    assert(cached.verbose)
+    assert(isinstance(cached.cluster_means, np.memmap))
+    assert(np.allclose(cached.similarity_score(df['embedding']),
+                       fresh.similarity_score(df['embedding'])))
+
+    # Different data or parameters are different entries.
+    cache.characterize(ClusteredCosSimModel(max_clusters=2),
+                       df['embedding'][1:], None)
+    cache.characterize(ClusteredCosSimModel(max_clusters=1),
+                       df['embedding'], None)
+    assert(len(os.listdir(str(tmpdir)))==3)
+
+# The context corpus is only part of the key for models that use it.
+def test_context_key(tmpdir):
+    df = load_test_frame()
+    cache = CharacterizationCache(str(tmpdir))
+
+    tweets, context = df['tweet'][:5], df['tweet'][5:]
+
+    tfidf = TFIDFModel(use_context=True)
+    assert(cache.key(tfidf, tweets, context)
+           != cache.key(tfidf, tweets, context[1:]))
+    assert(cache.key(tfidf, tweets, context)
+           != cache.key(tfidf, df['tweet'][:6], df['tweet'][6:]))
+
+    tf = TFIDFModel(use_context=False)
+    assert(cache.key(tf, tweets, context) == cache.key(tf, tweets, None))
+
+    cache.characterize(tfidf, tweets, context)
+    cached = TFIDFModel(use_context=True)
+    cache.characterize(cached, tweets, context)
+    assert(np.allclose(cached.similarity_score(df['tweet']),
+                       tfidf.similarity_score(df['tweet'])))
+
+# Least recently used entries are evicted beyond max_bytes.
+def test_eviction(tmpdir):
+    df = load_test_frame()
+    cache = CharacterizationCache(str(tmpdir))
+
+    model = ClusteredCosSimModel(max_clusters=1)
+    cache.characterize(model, df['embedding'], None)
+    entry_size = sum(os.path.getsize(os.path.join(root, name))
+                     for root, _, names in os.walk(str(tmpdir))
+                     for name in names)
+
+    cache.max_bytes = int(1.5 * entry_size)
+    first = cache.key(model, df['embedding'], None)
+    cache.characterize(model, df['embedding'][1:], None)
+
+    assert(os.listdir(str(tmpdir))
+           == [cache.key(model, df['embedding'][1:], None)])
+    assert(first not in os.listdir(str(tmpdir)))
@@ -0,0 +1,116 @@
+import os
+import json
+
+from tweetvalidator.data_processing import (TweetDownloader, TokenBucket,
+                                            HTTPTransport, FakeTwitterServer)
+from tweetvalidator.data_processing.download_tweets import RateLimitError
+
+def read_json(path):
+    with open(path, 'r') as file:
+        return json.loads(file.read())
+
+def unlimited():
+    return TokenBucket(1e6, 1e6)
+
+# A first run downloads each user's recent tweets newest first, paging; a
+# second only fetches what's new, adding it to the front of the file.
+def test_incremental_download(tmpdir):
+    timelines = {'@a' : [f'a tweet {i}' for i in range(25)],
+                 '@b' : [f'b tweet {i}' for i in range(3)]}
+
+    with FakeTwitterServer(timelines) as server:
+        downloader = TweetDownloader(HTTPTransport(server.url), unlimited(),
+                                     workers=2, page_size=10)
+        report = downloader.download(['@a', '@b'], str(tmpdir), max_tweets=20)
+
+        assert(report['tweets']==23 and not report['failed'])
+        assert([row[0] for row in read_json(tmpdir.join('@a.json'))]
+               ==[f'a tweet {i}' for i in range(24, 4, -1)])
+        assert(len(read_json(tmpdir.join('@b.json')))==3)
+
+        server.add_tweets('@a', ['a new tweet'])
+        requests = server.requests
+        report = downloader.download(['@a', '@b'], str(tmpdir), max_tweets=20)
+
+        assert(report['tweets']==1)
+        # One page for @a's new tweet, and an empty one for each user.
+        assert(server.requests - requests==3)
+        assert(read_json(tmpdir.join('@a.json'))[0][0]=='a new tweet')
+        assert(len(read_json(tmpdir.join('@b.json')))==3)
+
+# An incremental run fetches everything since the last, even beyond
+# max_tweets, so no tweets are skipped.
+def test_incremental_beyond_max_tweets(tmpdir):
+    with FakeTwitterServer({'@a' : [f'old {i}' for i in range(5)]}) as server:
+        downloader = TweetDownloader(HTTPTransport(server.url), unlimited(),
+                                     page_size=10)
+        downloader.download(['@a'], str(tmpdir), max_tweets=20)
+
+        server.add_tweets('@a', [f'new {i}' for i in range(30)])
+        report = downloader.download(['@a'], str(tmpdir), max_tweets=20)
+        assert(report['tweets']==30)
+
+        report = downloader.download(['@a'], str(tmpdir), max_tweets=20)
+        assert(report['tweets']==0)
+
+    assert([row[0] for row in read_json(tmpdir.join('@a.json'))]
+           ==[f'new {i}' for i in range(29, -1, -1)]
+            + [f'old {i}' for i in range(4, -1, -1)])
+
+# A write interrupted before its rename leaves no '@' file behind.
+def test_interrupted_write(tmpdir, monkeypatch):
+    from tweetvalidator.data_processing import download_tweets
+
+    def interrupted(source, destination):
+        raise KeyboardInterrupt
+
+    with FakeTwitterServer({'@a' : ['hello']}) as server:
+        downloader = TweetDownloader(HTTPTransport(server.url), unlimited())
+        monkeypatch.setattr(download_tweets.os, 'replace', interrupted)
+        try:
+            downloader.update_user('@a', str(tmpdir), 20)
+        except KeyboardInterrupt:
+            pass
+
+    assert(os.listdir(str(tmpdir)))
+    assert(not [f for f in os.listdir(str(tmpdir)) if f[0]=='@'])
+
+# One user failing doesn't stop the others.
+def test_unknown_user(tmpdir):
+    with FakeTwitterServer({'@a' : ['hello']}) as server:
+        report = TweetDownloader(HTTPTransport(server.url),
+                                 unlimited()).download(['@a', '@nobody'],
+                                                       str(tmpdir))
+    assert(list(report['failed'])==['@nobody'])
+    assert(read_json(tmpdir.join('@a.json'))[0][0]=='hello')
+
+class RateLimitedOnce:
+    """ Transport refusing its first request for exceeding the limit. """
+    def __init__(self, transport):
+        self.transport = transport
+        self.refused = False
+
+    def user_timeline(self, *args, **kwargs):
+        if not self.refused:
+            self.refused = True
+            raise RateLimitError(0.05)
+        return self.transport.user_timeline(*args, **kwargs)
+
+# Rate-limited requests wait for the reset and are retried.
+def test_rate_limit_retry(tmpdir):
+    with FakeTwitterServer({'@a' : ['hello']}) as server:
+        transport = RateLimitedOnce(HTTPTransport(server.url))
+        report = TweetDownloader(transport, unlimited()).download(
+                                                        ['@a'], str(tmpdir))
+    assert(transport.refused and report['tweets']==1)
+
+# The bucket allows a burst of <capacity>, then <rate> a second.
+def test_token_bucket():
+    now = [0.]
+    def sleep(seconds):
+        now[0] += seconds
+
+    bucket = TokenBucket(2, 3, clock=lambda: now[0], sleep=sleep)
+    waits = [bucket.acquire() for _ in range(5)]
+    assert(waits[:3]==[0, 0, 0])
+    assert(abs(now[0] - 1.)<1e-9)
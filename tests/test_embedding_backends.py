@@ -0,0 +1,119 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from get_config import get_config
+
+from tweetvalidator.embedding_backends import (HashedNgramEncoder,
+                                               make_backend)
+from tweetvalidator.models import ClusteredCosSimModel
+from tweetvalidator.models.registry import load_model
+
+INPUT_DIR_KEY = 'processed_data_path'
+
+def load_user_tweets():
+    input_directory = get_config()[INPUT_DIR_KEY]
+    infiles = sorted(x for x in os.listdir(input_directory) if x[0]=='@')
+
+    with open(os.path.join(input_directory, infiles[0]), 'r') as file:
+        in_data =  json.loads(file.read())
+
+    return pd.DataFrame(in_data, columns = ['tweet','date','embedding'])
+
+# Embeddings are unit length, deterministic and closer for similar text.
+def test_hashed_ngram_encoder():
+    tweets = ['The weather is lovely today.',
+              'the weather is lovely today!',
+              'Quarterly earnings beat expectations.']
+
+    embeddings = HashedNgramEncoder(dim=64).embed_phrases(tweets)
+
+    assert(embeddings.shape==(3, 64))
+    assert(embeddings.dtype==np.float32)
+    assert(np.allclose(np.linalg.norm(embeddings, axis=1), 1))
+    assert(np.array_equal(embeddings,
+                          HashedNgramEncoder(dim=64).embed_phrases(tweets)))
+
+    sims = embeddings.dot(embeddings.T)
+    assert(sims[0, 1] > sims[0, 2])
+
+# Configs rebuild an equivalent backend, and equal configs share one.
+def test_make_backend():
+    encoder = HashedNgramEncoder(dim=32, random_state=3)
+    rebuilt = make_backend(json.loads(json.dumps(encoder.get_config())))
+
+    assert(rebuilt is make_backend(encoder.get_config()))
+    assert(np.array_equal(encoder.embed_phrases(['a tweet']),
+                          rebuilt.embed_phrases(['a tweet'])))
+
+    try:
+        make_backend('no_such_backend')
+        assert(False)
+    except ValueError:
+        pass
+
+# A model with an encoder takes tweet text and matches characterizing on
+# the same encoder's embeddings; it's saved and loaded with its encoder.
+def test_model_with_encoder(tmpdir):
+    tweets = load_user_tweets()['tweet']
+    train, test = tweets[:6], tweets[6:]
+    encoder = HashedNgramEncoder()
+
+    model = ClusteredCosSimModel(embedded_corpus=False, max_clusters=2,
+                                 encoder=encoder)
+    model.characterize(train, None)
+    scores = model.similarity_score(test)
+
+    reference = ClusteredCosSimModel(max_clusters=2)
+    reference.characterize(encoder.embed_phrases(train), None)
+    assert(np.allclose(scores,
+                       reference.similarity_score(encoder.embed_phrases(test))))
+
+    model.save(str(tmpdir))
+    loaded = load_model(str(tmpdir))
+    assert(np.allclose(loaded.similarity_score(test), scores))
+
+    scores_many, _ = ClusteredCosSimModel.infer_many({'me' : model},
+                                                     ['me'] * len(test), test)
+    assert(np.allclose(scores_many, scores))
+
+# Embedding a directory with a given backend caches its embeddings when
+# asked to, and refuses TensorFlow-only settings.
+def test_embed_directory_with_backend(tmpdir):
+    import pytest
+    from tweetvalidator.data_processing.embed_tweets import (
+                                                embed_tweets_from_directories)
+
+    input_directory = get_config()['preprocessed_data_path']
+    cache_directory = str(tmpdir.join('cache'))
+
+    class CountingEncoder(HashedNgramEncoder):
+        calls = 0
+        def embed_phrases(self, phrase_list):
+            self.calls += 1
+            return super().embed_phrases(phrase_list)
+
+    outputs, encoders = [], []
+    for run in range(2):
+        output = tmpdir.join(f'run_{run}')
+        output.mkdir()
+        encoder = CountingEncoder(dim=32, n_features=2**10)
+        embed_tweets_from_directories(input_directory, str(output),
+                                      cache_directory = cache_directory,
+                                      encoder = encoder)
+        outputs.append(output)
+        encoders.append(encoder)
+
+    # The second run found every tweet in the cache.
+    assert(encoders[0].calls>0 and encoders[1].calls==0)
+    assert(len(tmpdir.join('cache').listdir())==1)
+    for file_name in os.listdir(input_directory):
+        if file_name[0]=='@':
+            first, second = [json.loads(output.join(file_name).read())
+                             for output in outputs]
+            assert(np.allclose([x[2] for x in first], [x[2] for x in second]))
+
+    with pytest.raises(ValueError):
+        embed_tweets_from_directories(input_directory, str(tmpdir),
+                                      intra_op_threads = 2,
+                                      encoder = HashedNgramEncoder())
@@ -0,0 +1,80 @@
+import numpy as np
+
+from tweetvalidator.embedding_cache import EmbeddingCache, text_key
+
+class CountingEncoder:
+    """ Deterministic stand-in for SentenceEncoder that records its calls. """
+    def __init__(self):
+        self.encoded = []
+
+    def __call__(self, phrase_list):
+        self.encoded.append(list(phrase_list))
+        return np.array([[len(p), sum(map(ord, p)) % 97, 1.]
+                         for p in phrase_list])
+
+# Only misses are encoded, duplicates once, in batches.
+def test_embed(tmpdir):
+    encoder = CountingEncoder()
+    cache = EmbeddingCache(str(tmpdir), 'model-a')
+
+    tweets = ['hello there', 'RT same old', 'RT same old', 'bye',
+              'hello  there ', 'something new']
+    embeddings = cache.embed(tweets, encoder, batch_size=2)
+
+    # 'hello  there ' normalizes to 'hello there'.
+    assert(encoder.encoded==[['hello there', 'RT same old'],
+                             ['bye', 'something new']])
+    expected = CountingEncoder()(tweets[:4] + ['hello there', tweets[5]])
+    assert(np.allclose(embeddings, expected))
+    encoder.encoded = []
+
+    cache = EmbeddingCache(str(tmpdir), 'model-a')
+    assert(len(cache)==4)
+    assert(text_key('hello  there ')==text_key('hello there'))
+
+    embeddings = cache.embed(tweets + ['one more'], encoder, batch_size=2)
+    assert(encoder.encoded==[['one more']])
+    assert(cache.hits==4 and cache.misses==1)
+    assert(embeddings.dtype==np.float32)
+    assert(np.allclose(embeddings[:-1], expected))
+
+    # Each model has its own entries.
+    other = EmbeddingCache(str(tmpdir), 'model-b')
+    assert(len(other)==0)
+
+# The cache is compacted to its most recently used entries.
+def test_size_cap(tmpdir):
+    encoder = CountingEncoder()
+    cache = EmbeddingCache(str(tmpdir), 'model-a', max_entries=10)
+
+    cache.embed([f'tweet {i}' for i in range(8)], encoder)
+    cache.embed(['tweet 0'], encoder)
+    cache.embed([f'new tweet {i}' for i in range(5)], encoder)
+
+    assert(len(cache)<=10)
+
+    reopened = EmbeddingCache(str(tmpdir), 'model-a', max_entries=10)
+    assert(len(reopened)==len(cache))
+
+    encoder.encoded = []
+    embeddings = reopened.embed(['tweet 0', 'new tweet 4'], encoder)
+    assert(encoder.encoded==[])
+    assert(np.allclose(embeddings, CountingEncoder()(['tweet 0',
+                                                      'new tweet 4'])))
+
+# Recency outlives reopening: compaction keeps entries in order of use, so
+# later rows win the ties a fresh open leaves.
+def test_compaction_order(tmpdir):
+    encoder = CountingEncoder()
+    cache = EmbeddingCache(str(tmpdir), 'model-a', max_entries=100)
+    cache.embed([f'tweet {i}' for i in range(6)], encoder)
+    cache.embed(['tweet 0', 'tweet 1'], encoder)
+    cache.compact(4)
+
+    reopened = EmbeddingCache(str(tmpdir), 'model-a', max_entries=100)
+    reopened.compact(3)
+
+    encoder.encoded = []
+    reopened.embed(['tweet 0', 'tweet 1', 'tweet 5'], encoder)
+    assert(encoder.encoded==[])
+    assert(len(reopened)==3)
@@ -0,0 +1,68 @@
+import os
+import json
+import time
+import numpy as np
+from get_config import get_config
+
+from tweetvalidator.embedding_pipeline import embed_files_pipelined
+from tweetvalidator.embedding_store import read_user_store
+
+INPUT_DIR_KEY = 'preprocessed_data_path'
+
+def stub_embed_phrases(phrase_list):
+    time.sleep(0.001)
+    return np.array([[len(p), p.count(' '), 1.] for p in phrase_list])
+
+def input_files():
+    input_directory = get_config()[INPUT_DIR_KEY]
+    return sorted(os.path.join(input_directory, x)
+                  for x in os.listdir(input_directory) if x[0]=='@')
+
+# The pipeline writes the same output as embedding files one at a time.
+def test_pipeline(tmpdir):
+    for store in [False, True]:
+        output = str(tmpdir.join(f'store_{store}'))
+        os.makedirs(output)
+
+        report = embed_files_pipelined(input_files(), output,
+                                       stub_embed_phrases, batch_size=16,
+                                       store=store, queue_batches=2)
+
+        n_tweets = 0
+        for input_file in input_files():
+            with open(input_file, 'r') as file:
+                in_data = json.loads(file.read())
+            n_tweets += len(in_data)
+
+            expected = stub_embed_phrases([x[0] for x in in_data])
+            if store:
+                user = os.path.basename(input_file).split('.')[0]
+                frame, embeddings = read_user_store(output, user)
+                assert(list(frame['tweet'])==[x[0] for x in in_data])
+            else:
+                with open(os.path.join(output, os.path.basename(input_file)),
+                          'r') as file:
+                    out_data = json.loads(file.read())
+                assert([x[:2] for x in out_data]==in_data)
+                embeddings = [x[2] for x in out_data]
+            assert(np.allclose(embeddings, expected))
+
+        assert(report['tweets']==n_tweets)
+        for stage in ['read', 'encode', 'write']:
+            assert(0 < report[stage] <= 1)
+
+        # Finished files are skipped.
+        assert(embed_files_pipelined(input_files(), output, stub_embed_phrases,
+                                     store=store)['tweets']==0)
+
+# A failing stage stops the pipeline and its error reaches the caller.
+def test_pipeline_error(tmpdir):
+    def failing_embed_phrases(phrase_list):
+        raise RuntimeError('encoder failed')
+
+    try:
+        embed_files_pipelined(input_files(), str(tmpdir),
+                              failing_embed_phrases, batch_size=16)
+        assert(False)
+    except RuntimeError as error:
+        assert(str(error)=='encoder failed')
@@ -0,0 +1,170 @@
+
+import os
+import json
+import shutil
+import pytest
+import numpy as np
+from get_config import get_config
+from tweetvalidator.embedding_store import (convert_directory_to_store,
+                                            list_store_users,
+                                            read_user_store,
+                                            iter_json_array,
+                                            embed_file_to_store,
+                                            embed_file_to_json)
+from tweetvalidator.evaluate_model import load_tweets_from_directory
+
+INPUT_DIR_KEY = 'processed_data_path'
+
+# Convert the processed test data into a temp store directory
+@pytest.fixture(scope='module')
+def temp_store_dir(tmpdir_factory):
+    config = get_config()
+    tmpdir = str(tmpdir_factory.mktemp('store'))
+    convert_directory_to_store(config[INPUT_DIR_KEY], tmpdir)
+    return tmpdir
+
+# Make sure there's a store entry for every processed file.
+def test_makes_all_users(temp_store_dir):
+    input_directory = get_config()[INPUT_DIR_KEY]
+
+    infiles = [x.split('.')[0] for x in os.listdir(input_directory)
+               if x[0]=='@']
+
+    assert(sorted(infiles)==list_store_users(temp_store_dir))
+
+# Make sure the round trip preserves tweets, dates and embeddings.
+def test_round_trip(temp_store_dir):
+    input_directory = get_config()[INPUT_DIR_KEY]
+
+    for user in list_store_users(temp_store_dir):
+        with open(os.path.join(input_directory, user + '.json'), 'r') as file:
+            in_data =  json.loads(file.read())
+
+        frame, embeddings = read_user_store(temp_store_dir, user)
+
+        assert(isinstance(embeddings, np.memmap))
+        assert(embeddings.dtype==np.float32)
+        assert(list(frame['tweet'])==[x[0] for x in in_data])
+        assert(list(frame['date'])==[x[1] for x in in_data])
+        assert(np.allclose(embeddings, [x[2] for x in in_data]))
+
+# Loading from a store should give the same data as loading from json.
+def test_load_matches_json(temp_store_dir):
+    input_directory = get_config()[INPUT_DIR_KEY]
+
+    json_train, json_test = load_tweets_from_directory(input_directory,
+                                                       random_state = 1)
+    store_train, store_test = load_tweets_from_directory(temp_store_dir,
+                                                         random_state = 1)
+
+    assert(list(json_train.columns)==list(store_train.columns))
+    # Users are read in the same order, so the same seed gives the same split.
+    assert(json_train['tweet'].tolist()==store_train['tweet'].tolist())
+    assert(json_test['tweet'].tolist()==store_test['tweet'].tolist())
+
+class FlakyEncoder:
+    """ Stand-in for SentenceEncoder.embed_phrases that fails after a given
+    number of calls, as if the run were interrupted.
+    """
+    def __init__(self, fail_after=None):
+        self.calls = 0
+        self.fail_after = fail_after
+
+    def __call__(self, phrase_list):
+        if self.fail_after is not None and self.calls >= self.fail_after:
+            raise KeyboardInterrupt
+        self.calls += 1
+        return np.array([[len(p), i, 1.] for i, p in enumerate(phrase_list)])
+
+# Streaming embeds in batches, resumes after an interruption and gives the
+# same output in either format.
+def test_streaming_embed(tmpdir):
+    input_directory = get_config()['preprocessed_data_path']
+    input_file = os.path.join(input_directory,
+                              sorted(os.listdir(input_directory))[0])
+    user = os.path.basename(input_file).split('.')[0]
+
+    with open(input_file, 'r') as file:
+        in_data =  json.loads(file.read())
+    assert(list(iter_json_array(input_file, chunk_chars=7))==in_data)
+
+    expected = np.vstack([FlakyEncoder()([x[0] for x in in_data[i:i + 4]])
+                          for i in range(0, len(in_data), 4)])
+
+    for write in [embed_file_to_store, embed_file_to_json]:
+        output = str(tmpdir.join(write.__name__))
+        if write is embed_file_to_store:
+            os.makedirs(output)
+        else:
+            output += '.json'
+
+        try:
+            write(input_file, output, FlakyEncoder(fail_after=2), 4)
+        except KeyboardInterrupt:
+            pass
+        assert(not os.path.exists(output) or os.path.isdir(output))
+
+        encoder = FlakyEncoder()
+        write(input_file, output, encoder, 4)
+        assert(encoder.calls==(len(in_data) + 3) // 4 - 2)
+
+        if write is embed_file_to_store:
+            frame, embeddings = read_user_store(output, user)
+            assert(list(frame['tweet'])==[x[0] for x in in_data])
+        else:
+            with open(output, 'r') as file:
+                out_data = json.loads(file.read())
+            assert([x[:2] for x in out_data]==in_data)
+            embeddings = [x[2] for x in out_data]
+        assert(np.allclose(embeddings, expected))
+
+        # A finished file is skipped on rerun.
+        encoder = FlakyEncoder()
+        write(input_file, output, encoder, 4)
+        assert(encoder.calls==0)
+
+# A user with no tweets is stored as an empty matrix, whether embedded alone
+# or through the pipeline.
+def test_empty_user(tmpdir):
+    from tweetvalidator.embedding_pipeline import embed_files_pipelined
+
+    input_file = str(tmpdir.join('@nobody.json'))
+    with open(input_file, 'w') as file:
+        file.write('[]')
+
+    for embed in ['file', 'pipeline']:
+        output = str(tmpdir.join(embed))
+        os.makedirs(output)
+        if embed == 'file':
+            embed_file_to_store(input_file, output, FlakyEncoder())
+        else:
+            embed_files_pipelined([input_file], output, FlakyEncoder(),
+                                  store=True)
+
+        assert(list_store_users(output)==['@nobody'])
+        frame, embeddings = read_user_store(output, '@nobody')
+        assert(len(frame)==0 and embeddings.shape==(0, 0))
+        assert(not [f for f in os.listdir(output) if 'partial' in f])
+
+# An interrupted run leaves nothing that readers of a processed directory
+# mistake for a user file.
+def test_interrupted_run_is_hidden(tmpdir):
+    input_directory = get_config()['preprocessed_data_path']
+    input_file = os.path.join(input_directory,
+                              sorted(os.listdir(input_directory))[0])
+
+    output_directory = str(tmpdir.join('processed'))
+    shutil.copytree(get_config()[INPUT_DIR_KEY], output_directory)
+    expected_train, _ = load_tweets_from_directory(output_directory,
+                                                   random_state = 1)
+
+    output = os.path.join(output_directory, '@interrupted.json')
+    try:
+        embed_file_to_json(input_file, output, FlakyEncoder(fail_after=2), 4)
+    except KeyboardInterrupt:
+        pass
+    assert(not [f for f in os.listdir(output_directory)
+                if f.startswith('@interrupted')])
+
+    train, _ = load_tweets_from_directory(output_directory, random_state = 1)
+    assert(train['tweet'].tolist()==expected_train['tweet'].tolist())
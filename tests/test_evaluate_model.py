@@ -0,0 +1,174 @@
+
+import os
+import sys
+import shutil
+import pytest
+import numpy as np
+from get_config import get_config
+from tweetvalidator import (generate_similarity_scores,
+                            generate_similarity_scores_parallel)
+from tweetvalidator.models import ClusteredCosSimModel
+from tweetvalidator.score_store import ScoreStore
+
+INPUT_DIR_KEY = 'processed_data_path'
+
+# The vectorized all-users evaluation must reproduce the per-user loop.
+def test_vectorized_matches_loop(tmpdir):
+    input_directory = get_config()[INPUT_DIR_KEY]
+
+    for cluster_scaling in [True, False]:
+        args = {'input_directory'  : input_directory,
+                'output_directory' : str(tmpdir),
+                'score_args'       : {'cluster_scaling' : cluster_scaling}}
+
+        loop_own, loop_other = generate_similarity_scores(
+                        ClusteredCosSimModel(max_clusters=2), 'embedding',
+                        file_prefix = 'loop', **args)
+
+        vec_own, vec_other = generate_similarity_scores(
+                        ClusteredCosSimModel(max_clusters=2), 'embedding',
+                        file_prefix = 'vectorized', vectorize = True, **args)
+
+        assert(np.allclose(loop_own, vec_own))
+        assert(np.allclose(loop_other, vec_other))
+
+        store = ScoreStore(str(tmpdir.join('loop')))
+        assert(np.array_equal(store.own, loop_own))
+        assert(np.array_equal(store.other, loop_other))
+
+# Parallel evaluation must reproduce the sequential run exactly.
+def test_parallel_matches_sequential(tmpdir):
+    input_directory = get_config()[INPUT_DIR_KEY]
+
+    model_configs = [{'model'       : ClusteredCosSimModel(max_clusters=2),
+                      'data_column' : 'embedding',
+                      'file_prefix' : 'emb_2'},
+                     {'model'       : ClusteredCosSimModel(max_clusters=2),
+                      'data_column' : 'embedding',
+                      'file_prefix' : 'emb_2_vectorized',
+                      'vectorize'   : True}]
+
+    sequential = generate_similarity_scores_parallel(model_configs,
+                                    input_directory = input_directory,
+                                    output_directory = str(tmpdir.mkdir('seq')),
+                                    n_workers = 1)
+
+    parallel = generate_similarity_scores_parallel(model_configs,
+                                    input_directory = input_directory,
+                                    output_directory = str(tmpdir.mkdir('par')),
+                                    n_workers = 2)
+
+    for prefix in sequential:
+        assert(np.array_equal(sequential[prefix][0], parallel[prefix][0]))
+        assert(np.array_equal(sequential[prefix][1], parallel[prefix][1]))
+
+# Deterministic runs in this process are pinned to one BLAS thread only while
+# they run, and a missing threadpoolctl is reported rather than ignored.
+def test_thread_limit(monkeypatch):
+    threadpool_info = pytest.importorskip('threadpoolctl').threadpool_info
+    from tweetvalidator.parallel_evaluation import _thread_limit
+
+    before = [pool['num_threads'] for pool in threadpool_info()]
+    with _thread_limit(True):
+        assert(all(pool['num_threads']==1 for pool in threadpool_info()))
+    assert([pool['num_threads'] for pool in threadpool_info()]==before)
+
+    monkeypatch.setitem(sys.modules, 'threadpoolctl', None)
+    with pytest.warns(RuntimeWarning):
+        _thread_limit(True)
+
+# The cached dataset reproduces the uncached split of the same rows, and the
+# stored split is reused until the source changes.
+def test_persisted_split(tmpdir):
+    from tweetvalidator.evaluate_model import load_tweets_from_directory
+    from tweetvalidator.evaluation_data import load_dataset, split_file_path
+
+    input_directory = str(tmpdir.mkdir('processed'))
+    source_directory = get_config()[INPUT_DIR_KEY]
+    for file_name in os.listdir(source_directory):
+        shutil.copy(os.path.join(source_directory, file_name), input_directory)
+    cache_directory = str(tmpdir.join('dataset'))
+
+    train, test = load_tweets_from_directory(input_directory, random_state=1,
+                                             dataset_cache=cache_directory)
+    data = load_dataset(input_directory, cache_directory)
+    assert(len(train) + len(test)==len(data))
+    assert(sorted(train.index.tolist() + test.index.tolist())
+           ==list(range(len(data))))
+
+    # The same split as without the cache.
+    expected_train, expected_test = load_tweets_from_directory(
+                                                input_directory, random_state=1)
+    assert(list(train['tweet'])==list(expected_train['tweet']))
+    assert(list(test['tweet'])==list(expected_test['tweet']))
+
+    split_path = split_file_path(cache_directory, 0.4, 1, False)
+    mtime = os.path.getmtime(split_path)
+    again, _ = load_tweets_from_directory(input_directory, random_state=1,
+                                          dataset_cache=cache_directory)
+    assert(list(again.index)==list(train.index))
+    assert(os.path.getmtime(split_path)==mtime)
+
+    # Stratified: each user's test fraction matches the overall one.
+    _, test = load_tweets_from_directory(input_directory, random_state=1,
+                                         dataset_cache=cache_directory,
+                                         stratify=True)
+    counts = data['name'].value_counts()
+    test_counts = test['name'].value_counts()
+    assert(all(abs(test_counts[user] - 0.4 * counts[user])<=1
+               for user in counts.index))
+    _, expected_test = load_tweets_from_directory(input_directory,
+                                                  random_state=1,
+                                                  stratify=True)
+    assert(list(test['tweet'])==list(expected_test['tweet']))
+
+    # Dropping a user rebuilds the dataset and its split.
+    os.remove(os.path.join(input_directory, sorted(os.listdir(
+                                                    input_directory))[0]))
+    train, test = load_tweets_from_directory(input_directory, random_state=1,
+                                             dataset_cache=cache_directory)
+    assert(len(train) + len(test)==len(load_dataset(input_directory,
+                                                    cache_directory)))
+    assert(len(train) + len(test)<len(data))
+
+# Folds cover every row once per repeat, and parallel cross-validation
+# reproduces the sequential run.
+def test_cross_validate(tmpdir):
+    from tweetvalidator import cross_validate
+    from tweetvalidator.evaluation_data import load_dataset, load_folds
+
+    input_directory = get_config()[INPUT_DIR_KEY]
+    cache_directory = str(tmpdir.join('dataset'))
+
+    folds = load_folds(input_directory, cache_directory, n_folds=3,
+                       n_repeats=2, random_state=1)
+    n_rows = len(load_dataset(input_directory, cache_directory))
+    assert(len(folds)==6)
+    for repeat in [folds[:3], folds[3:]]:
+        assert(sorted(np.concatenate([test for _, test in repeat]))
+               ==list(range(n_rows)))
+
+    model_configs = [{'model'       : ClusteredCosSimModel(max_clusters=1),
+                      'data_column' : 'embedding',
+                      'file_prefix' : 'emb_1',
+                      'vectorize'   : True},
+                     {'model'       : ClusteredCosSimModel(max_clusters=1),
+                      'data_column' : 'embedding',
+                      'file_prefix' : 'emb_1_loop'}]
+    args = {'input_directory' : input_directory,
+            'dataset_cache'   : cache_directory,
+            'n_folds'         : 3,
+            'n_repeats'       : 2}
+
+    sequential = cross_validate(model_configs, n_workers=1,
+                                output_directory=str(tmpdir), **args)
+    parallel = cross_validate(model_configs, n_workers=2, **args)
+
+    for prefix in sequential:
+        assert(len(sequential[prefix]['fold_auc'])==6)
+        assert(0<=sequential[prefix]['auc_mean']<=1)
+        assert(np.allclose(sequential[prefix]['fold_auc'],
+                           parallel[prefix]['fold_auc']))
+    assert(np.allclose(sequential['emb_1']['fold_auc'],
+                       sequential['emb_1_loop']['fold_auc']))
+    assert(os.path.exists(tmpdir.join('cross_validation.json')))
@@ -1,9 +1,11 @@
 
 import os
+import re
 import json
 import pytest
 import pandas as pd
-from tweetvalidator.data_processing import filter_tweets_from_directories
+from tweetvalidator.data_processing import (filter_tweets_from_directories,
+                                            RegexFilter)
 from get_config import get_config
 
 INPUT_DIR_KEY = 'raw_data_path'
@@ -44,3 +46,41 @@ def test_file_structure(temp_output_dir):
     
         df = pd.DataFrame(in_data) 
         assert(df.shape[1]==EXPECTED_OUTPUT_COLUMNS)
+
+# The combined alternation only passes untouched tweets through, so the
+# output is exactly re.sub applied filter by filter, even where the filters
+# interact and whatever tweets come first.
+def test_regex_filter():
+    tweets = ['hello world', 'plain',
+              'field of #AI: https://t.co/x by @someone', 'plain tweet',
+              '@a #b http://c.d e']
+
+    def sequential(filters, tweet):
+        for reFilter in filters:
+            tweet = re.sub(reFilter, '', tweet)
+        return tweet
+
+    for filters in [get_config()['regexp_tweet_filters'],
+                    ['http\\S+', '\\d+']]:
+        regex_filter = RegexFilter(filters)
+        assert(regex_filter.combine())
+        assert([regex_filter(t) for t in tweets + ['call 555 now']]
+               ==[sequential(filters, t) for t in tweets + ['call 555 now']])
+
+    assert(RegexFilter(get_config()['regexp_tweet_filters'])(tweets[2]).strip()
+           =='field of by')
+
+# Filtering across worker processes writes the same files as in-process.
+def test_parallel_matches_serial(temp_output_dir, tmpdir):
+    config = get_config()
+    report = filter_tweets_from_directories(config[INPUT_DIR_KEY], tmpdir,
+                                            config['regexp_tweet_filters'],
+                                            int(config['min_tweet_characters']),
+                                            workers=2)
+
+    assert(report['files']==len(os.listdir(temp_output_dir)))
+    for file_name in os.listdir(temp_output_dir):
+        with open(os.path.join(temp_output_dir, file_name), 'r') as file:
+            serial = json.loads(file.read())
+        with open(os.path.join(tmpdir, file_name), 'r') as file:
+            assert(json.loads(file.read())==serial)
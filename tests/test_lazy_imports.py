@@ -0,0 +1,51 @@
+import os
+import sys
+import subprocess
+
+import tweetvalidator
+
+HEAVY_MODULES = ['tensorflow', 'tensorflow_hub', 'tweepy', 'sklearn']
+
+def modules_loaded_by(statement):
+    """ Heavy modules loaded by running <statement> in a fresh interpreter. """
+    source_path = os.path.dirname(os.path.dirname(tweetvalidator.__file__))
+    env = dict(os.environ, PYTHONPATH=source_path)
+    check = (f'{statement}\nimport sys\n'
+             f'print(" ".join(m for m in {HEAVY_MODULES!r} '
+             f'if m in sys.modules))')
+
+    output = subprocess.check_output([sys.executable, '-c', check], env=env)
+    return output.decode().split()
+
+# Resolving public symbols, including the encoder and the models, loads none
+# of the heavy dependencies.
+def test_imports_are_lazy():
+    assert(modules_loaded_by(
+        'from tweetvalidator.data_processing import (SentenceEncoder, '
+        'get_tweets_by_user, filter_tweets_from_directories)\n'
+        'from tweetvalidator.models import (ClusteredCosSimModel, TFIDFModel, '
+        'ModelRegistry)\n'
+        'from tweetvalidator import (generate_similarity_scores, '
+        'generate_similarity_scores_parallel, CharacterizationCache)\n'
+        'from tweetvalidator.embedding_backends import make_backend')==[])
+
+# Building something that needs scikit-learn loads it.
+def test_heavy_modules_load_on_use():
+    assert(modules_loaded_by(
+        'from tweetvalidator.models import TFIDFModel\n'
+        'TFIDFModel().characterize(["a tweet"], ["another"])')
+        ==['sklearn'])
+
+# Every public symbol resolves, and unknown names still raise.
+def test_exports_resolve():
+    from tweetvalidator import data_processing, models
+
+    for package in [tweetvalidator, data_processing, models]:
+        for name in package.__all__:
+            assert(getattr(package, name) is not None)
+
+    try:
+        models.NoSuchModel
+        assert(False)
+    except AttributeError:
+        pass
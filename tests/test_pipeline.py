@@ -0,0 +1,144 @@
+import os
+import json
+import numpy as np
+from get_config import get_config
+
+from tweetvalidator.data_processing import (filter_tweets_from_directories,
+                                            embed_tweets_from_directories,
+                                            TweetDownloader, TokenBucket,
+                                            HTTPTransport, FakeTwitterServer)
+from tweetvalidator.embedding_backends import HashedNgramEncoder
+from tweetvalidator.models import ClusteredCosSimModel
+from tweetvalidator.pipeline import (raw_file_source, user_tweets_source,
+                                     download_source, stream_pipeline,
+                                     buffered, write_scores)
+
+def read_json(path):
+    with open(path, 'r') as file:
+        return json.loads(file.read())
+
+# Side outputs match the files the separate filter and embed steps write.
+def test_side_outputs_match_scripts(tmpdir):
+    config = get_config()
+    encoder = HashedNgramEncoder()
+    for name in ['pre', 'proc', 'stream_pre', 'stream_proc']:
+        tmpdir.mkdir(name)
+
+    filter_tweets_from_directories(config['raw_data_path'],
+                                   str(tmpdir.join('pre')),
+                                   config['regexp_tweet_filters'],
+                                   int(config['min_tweet_characters']))
+    embed_tweets_from_directories(str(tmpdir.join('pre')),
+                                  str(tmpdir.join('proc')), encoder=encoder)
+
+    batches = stream_pipeline(raw_file_source(config['raw_data_path'],
+                                              batch_size=7),
+                              config['regexp_tweet_filters'],
+                              int(config['min_tweet_characters']),
+                              encoder=encoder,
+                              preprocessed_directory=str(
+                                        tmpdir.join('stream_pre')),
+                              processed_directory=str(
+                                        tmpdir.join('stream_proc')))
+    assert(all(len(batch['embedding'])==len(batch['tweet'])
+               for batch in batches))
+
+    assert(sorted(os.listdir(tmpdir.join('pre')))
+           ==sorted(os.listdir(tmpdir.join('stream_pre'))))
+    for file_name in os.listdir(tmpdir.join('pre')):
+        assert(read_json(tmpdir.join('pre', file_name))
+               ==read_json(tmpdir.join('stream_pre', file_name)))
+
+        staged   = read_json(tmpdir.join('proc', file_name))
+        streamed = read_json(tmpdir.join('stream_proc', file_name))
+        assert([row[:2] for row in staged]==[row[:2] for row in streamed])
+        assert(np.allclose([row[2] for row in staged],
+                           [row[2] for row in streamed]))
+
+# Scores match each user's model; users without one get NaN.
+def test_scores(tmpdir):
+    encoder = HashedNgramEncoder()
+    user_tweets = [('@a', [['the cat sat on the mat', 'd1'],
+                           ['a cat on a mat', 'd2'],
+                           ['cats and mats', 'd3']]),
+                   ('@b', [['stock prices rose today', 'd4'],
+                           ['markets fell sharply', 'd5'],
+                           ['prices and markets', 'd6']]),
+                   ('@c', [['nobody characterized me', 'd7']])]
+
+    models = {}
+    for user, tweets in user_tweets[:2]:
+        models[user] = ClusteredCosSimModel()
+        models[user].characterize(
+                encoder.embed_phrases([tweet for tweet, _ in tweets]), None)
+
+    output_path = str(tmpdir.join('scores.jsonl'))
+    report = write_scores(stream_pipeline(user_tweets_source(user_tweets,
+                                                             batch_size=4),
+                                          encoder=encoder, models=models),
+                          output_path)
+
+    with open(output_path, 'r') as file:
+        rows = [json.loads(line) for line in file]
+
+    assert(report['tweets']==7)
+    assert([row['tweet'] for row in rows]
+           ==[tweet for _, tweets in user_tweets for tweet, _ in tweets])
+    for user, tweets in user_tweets[:2]:
+        expected = models[user].similarity_score(
+                encoder.embed_phrases([tweet for tweet, _ in tweets]))
+        assert(np.allclose([row['score'] for row in rows
+                            if row['name']==user], expected))
+    assert(rows[-1]['score'] is None and not rows[-1]['fraudulent'])
+
+# Downloads go through the one downloader, a page at a time, in user order;
+# a user that fails is skipped.
+def test_download_source():
+    timelines = {'@a' : [f'a tweet {i}' for i in range(25)],
+                 '@b' : [f'b tweet {i}' for i in range(3)]}
+
+    with FakeTwitterServer(timelines) as server:
+        downloader = TweetDownloader(HTTPTransport(server.url),
+                                     TokenBucket(1e6, 1e6), workers=2,
+                                     page_size=10)
+        batches = list(download_source(['@a', '@nobody', '@b'],
+                                       max_tweets=20, batch_size=7,
+                                       downloader=downloader))
+
+    assert(max(len(batch['tweet']) for batch in batches)==7)
+    names  = [name for batch in batches for name in batch['name']]
+    tweets = [tweet for batch in batches for tweet in batch['tweet']]
+    assert(names==['@a'] * 20 + ['@b'] * 3)
+    assert(tweets==[f'a tweet {i}' for i in range(24, 4, -1)]
+                   + [f'b tweet {i}' for i in range(2, -1, -1)])
+    # Two pages each for @a and @b (the second empty), one for @nobody.
+    assert(downloader.requests==5)
+
+# An interrupted stream leaves no '@' files in a side output directory.
+def test_interrupted_side_output(tmpdir):
+    def interrupted():
+        yield {'name' : ['@a'], 'tweet' : ['hello'], 'date' : ['d1']}
+        raise KeyboardInterrupt
+
+    try:
+        for batch in stream_pipeline(interrupted(),
+                                     preprocessed_directory=str(tmpdir)):
+            pass
+    except KeyboardInterrupt:
+        pass
+    assert(os.listdir(str(tmpdir)))
+    assert(not [f for f in os.listdir(str(tmpdir)) if f[0]=='@'])
+
+# Errors upstream of a buffer reach the consumer.
+def test_buffered_raises():
+    def failing():
+        yield {'name' : ['@a']}
+        raise RuntimeError('source failed')
+
+    batches = buffered(failing())
+    assert(next(batches)=={'name' : ['@a']})
+    try:
+        next(batches)
+        assert(False)
+    except RuntimeError:
+        pass
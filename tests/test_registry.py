@@ -0,0 +1,110 @@
+
+import os
+import json
+import numpy as np
+import pandas as pd
+from get_config import get_config
+
+from tweetvalidator.models import (ClusteredCosSimModel, TFIDFModel,
+                                   ModelRegistry, load_model)
+
+INPUT_DIR_KEY = 'processed_data_path'
+
+def load_test_frame():
+    input_directory = get_config()[INPUT_DIR_KEY]
+
+    infiles = [x for x in os.listdir(input_directory) if x[0]=='@']
+
+    test_file_path = os.path.join(input_directory, infiles[0])
+
+    with open(test_file_path, 'r') as file:
+        in_data =  json.loads(file.read())
+
+    return pd.DataFrame(in_data, columns = ['tweet','date','embedding'])
+
+# Saved and reloaded models must score exactly as the originals did.
+def test_save_load(tmpdir):
+    df = load_test_frame()
+
+    embedding_model = ClusteredCosSimModel(max_clusters=2)
+    embedding_model.characterize(df['embedding'], None)
+    embedding_model.save(str(tmpdir.join('embedding')))
+
+    tfidf_model = TFIDFModel(use_context=True)
+    tfidf_model.characterize(df['tweet'][:10], df['tweet'][10:])
+    tfidf_model.save(str(tmpdir.join('tfidf')))
+
+    loaded = load_model(str(tmpdir.join('embedding')))
+    assert(isinstance(loaded, ClusteredCosSimModel))
+    assert(isinstance(loaded.cluster_means, np.memmap))
+    # The training embeddings are only saved with keep_history.
+    assert(not tmpdir.join('embedding', 'history.npy').exists())
+    assert(np.allclose(loaded.similarity_score(df['embedding']),
+                       embedding_model.similarity_score(df['embedding'])))
+
+    loaded = load_model(str(tmpdir.join('tfidf')))
+    assert(isinstance(loaded, TFIDFModel))
+    assert(np.allclose(loaded.similarity_score(df['tweet']),
+                       tfidf_model.similarity_score(df['tweet'])))
+
+# Registry loads lazily and keeps at most max_loaded models resident.
+def test_registry(tmpdir):
+    df = load_test_frame()
+
+    registry = ModelRegistry(str(tmpdir), max_loaded=1)
+    model = ClusteredCosSimModel()
+    for user in ['@a', '@b']:
+        model.characterize(df['embedding'], None)
+        registry.save(user, model)
+
+    assert(registry.users()==['@a', '@b'])
+    assert('@c' not in registry)
+
+    first = registry.get('@a')
+    assert(registry.get('@a') is first)
+    registry.get('@b')
+    assert(registry.get('@a') is not first)
+
+# Users of a registry whose TFIDF models have the same vocabulary share one
+# copy of it.
+def test_registry_shares_vocabulary(tmpdir):
+    df = load_test_frame()
+
+    registry = ModelRegistry(str(tmpdir))
+    models = {}
+    for user, own in [('@a', slice(None, 10)), ('@b', slice(10, None))]:
+        tweets = df['tweet'][own]
+        context = df['tweet'][~df.index.isin(tweets.index)]
+        models[user] = TFIDFModel(use_context=True)
+        models[user].characterize(tweets, context)
+        registry.save(user, models[user])
+
+    assert(len(tmpdir.join('.shared').listdir())==1)
+    assert(registry.users()==['@a', '@b'])
+    for user, model in models.items():
+        with open(str(tmpdir.join(user, 'engine', 'engine.json')), 'r') as file:
+            assert(isinstance(json.loads(file.read())['vocabulary'], str))
+        assert(np.allclose(registry.get(user).similarity_score(df['tweet']),
+                           model.similarity_score(df['tweet'])))
+
+# The registry scores interleaved users against their saved models.
+def test_registry_infer_many(tmpdir):
+    df = load_test_frame()
+    embeddings = np.vstack(df['embedding'].values)
+
+    registry = ModelRegistry(str(tmpdir))
+    for user, max_clusters in [('@a', 1), ('@b', 2)]:
+        model = ClusteredCosSimModel(max_clusters=max_clusters)
+        model.characterize(embeddings, None)
+        registry.save(user, model)
+
+    user_ids = np.where(np.arange(len(df)) % 2, '@a', '@b')
+    scores, flags = registry.infer_many(user_ids, embeddings)
+
+    for user in ['@a', '@b']:
+        rows = user_ids == user
+        assert(np.allclose(scores[rows],
+                           registry[user].similarity_score(embeddings[rows]),
+                           atol=1e-6))
+        assert(np.array_equal(flags[rows],
+                              registry[user].infer(embeddings[rows])))
@@ -0,0 +1,42 @@
+import os
+import json
+import numpy as np
+
+from tweetvalidator.score_store import (write_score_store, ScoreStore,
+                                        convert_json_scores, is_score_store)
+
+USER_SCORES = [('@a', [0.9, 0.8], [0.1, 0.2, 0.3]),
+               ('@b', [0.7], []),
+               ('@c', [], [0.4])]
+
+# Each user's scores come back as written, and the whole arrays are the
+# aggregates.
+def test_round_trip(tmpdir):
+    own, other = write_score_store(str(tmpdir), USER_SCORES)
+    store = ScoreStore(str(tmpdir))
+
+    assert(store.users==['@a', '@b', '@c'])
+    for user, user_own, user_other in USER_SCORES:
+        assert(np.allclose(store.user_scores(user)[0], user_own))
+        assert(np.allclose(store.user_scores(user)[1], user_other))
+    assert(np.allclose(store.own, [0.9, 0.8, 0.7]))
+    assert(np.array_equal(store.other, other))
+    assert(isinstance(store.own, np.memmap))
+
+# The JSON layout converts to the same scores.
+def test_convert_json(tmpdir):
+    for user, own, other in USER_SCORES:
+        tmpdir.mkdir(user)
+        for file_name, scores in [('own.json', own), ('other.json', other)]:
+            with open(tmpdir.join(user, file_name), 'w') as file:
+                json.dump(scores, file)
+
+    assert(convert_json_scores(str(tmpdir), remove_json=True)==3)
+    assert(is_score_store(str(tmpdir)))
+    assert(not any(os.path.isdir(tmpdir.join(user))
+                   for user, _, _ in USER_SCORES))
+
+    store = ScoreStore(str(tmpdir))
+    for user, own, other in USER_SCORES:
+        assert(np.allclose(store.user_scores(user)[0], own))
+        assert(np.allclose(store.user_scores(user)[1], other))
@@ -0,0 +1,179 @@
+import os
+import json
+import zlib
+import asyncio
+import numpy as np
+
+from tweetvalidator.service import (ValidationService, MicroBatcher,
+                                    UnknownUserError, UnsupportedModelError,
+                                    MAX_BODY_BYTES)
+from tweetvalidator.models import (ClusteredCosSimModel, TFIDFModel,
+                                   ModelRegistry)
+
+class StubEncoder:
+    """ Deterministic pseudo-embeddings; records each batch size. """
+    def __init__(self, dim=16):
+        self.dim = dim
+        self.batch_sizes = []
+
+    def embed_phrases(self, phrase_list):
+        self.batch_sizes.append(len(phrase_list))
+        embeddings = np.array([np.random.RandomState(
+                                   zlib.crc32(p.encode('utf-8'))).randn(self.dim)
+                               for p in phrase_list], dtype=np.float32)
+        return embeddings / np.linalg.norm(embeddings, axis=1)[:, None]
+
+async def http_request(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = json.dumps(body).encode('utf-8') if body is not None else b''
+    writer.write(f'{method} {path} HTTP/1.1\r\nHost: test\r\n'
+                 f'Content-Length: {len(body)}\r\n'
+                 f'Connection: close\r\n\r\n'.encode('latin-1') + body)
+    response = await reader.read()
+    writer.close()
+
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body.decode('utf-8'))
+
+def make_registry(directory, encoder):
+    registry = ModelRegistry(directory)
+    tweets = {user : [f'{user} tweet {i}' for i in range(20)]
+              for user in ['@a', '@b']}
+    for user, user_tweets in tweets.items():
+        model = ClusteredCosSimModel(max_clusters=2)
+        model.characterize(encoder.embed_phrases(user_tweets), None)
+        registry.save(user, model)
+    return registry
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+# Concurrent requests are batched and get the same answers as the models.
+def test_validate(tmpdir):
+    encoder = StubEncoder()
+    registry = make_registry(str(tmpdir), encoder)
+    encoder.batch_sizes = []
+
+    service = ValidationService(encoder, registry, max_batch_size=8,
+                                max_wait_ms=50)
+    requests = [{'user' : ['@a', '@b'][i % 2], 'tweet' : f'new tweet {i}'}
+                for i in range(20)]
+
+    async def scenario():
+        server = await service.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        responses = await asyncio.gather(*[
+                        http_request(port, 'POST', '/validate', request)
+                        for request in requests])
+        unknown = await http_request(port, 'POST', '/validate',
+                                     {'user' : '@nobody', 'tweet' : 'hi'})
+        malformed = await http_request(port, 'POST', '/validate', ['hi'])
+        stats = await http_request(port, 'GET', '/stats')
+        await service.stop()
+        return responses, unknown, malformed, stats
+
+    responses, unknown, malformed, stats = run(scenario())
+    assert(sum(encoder.batch_sizes)==20)
+    assert(max(encoder.batch_sizes) <= 8)
+
+    for request, (status, response) in zip(requests, responses):
+        assert(status==200)
+        model = registry[request['user']]
+        embedding = encoder.embed_phrases([request['tweet']])
+        assert(np.isclose(response['score'],
+                          model.similarity_score(embedding)[0], atol=1e-6))
+        assert(response['fraudulent']==bool(model.infer(embedding)[0]))
+
+    assert(unknown[0]==404)
+    assert(malformed[0]==400)
+
+    status, stats = stats
+    assert(status==200)
+    assert(stats['requests']==20)
+    assert(stats['mean_batch_size'] > 1)
+    assert(stats['p50_ms'] <= stats['p99_ms'])
+
+# A user that can't be served only fails its own requests in a batch.
+def test_batch_isolates_users(tmpdir):
+    encoder = StubEncoder()
+    registry = make_registry(str(tmpdir), encoder)
+
+    tfidf = TFIDFModel(use_context=False)
+    tfidf.characterize([f'@c tweet {i}' for i in range(20)], None)
+    registry.save('@c', tfidf)
+
+    registry.save('@d', registry['@a'])
+    with open(os.path.join(registry.user_path('@d'), 'cluster_means.npy'),
+              'w') as file:
+        file.write('corrupt')
+
+    service = ValidationService(encoder, registry)
+    requests = [(user, f'new tweet {i}')
+                for i, user in enumerate(['@a', '@c', '@b', '@d',
+                                          '@nobody', '@a'])]
+    results = service.validate_batch(requests)
+
+    for (user, tweet), result in zip(requests, results):
+        if user in ['@a', '@b']:
+            embedding = encoder.embed_phrases([tweet])
+            assert(np.isclose(result[0],
+                              registry[user].similarity_score(embedding)[0],
+                              atol=1e-6))
+    assert(isinstance(results[1], UnsupportedModelError))
+    assert(isinstance(results[3], Exception))
+    assert(isinstance(results[4], UnknownUserError))
+
+# Oversized bodies get a 413 and malformed requests a 400, whatever their
+# error messages say.
+def test_request_errors(tmpdir):
+    encoder = StubEncoder()
+    service = ValidationService(encoder, make_registry(str(tmpdir), encoder))
+
+    async def raw_request(port, data):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(data)
+        response = await reader.read()
+        writer.close()
+        return int(response.split()[1])
+
+    async def scenario():
+        server = await service.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        statuses = [await raw_request(port, data) for data in [
+                        b'POST /validate HTTP/1.1\r\nContent-Length: '
+                        + str(MAX_BODY_BYTES + 1).encode('latin-1')
+                        + b'\r\n\r\n',
+                        b'POST /validate HTTP/1.1\r\n'
+                        b'Content-Length: large\r\n\r\n']]
+        await service.stop()
+        return statuses
+
+    assert(run(scenario())==[413, 400])
+
+# Batches are capped at max_batch_size and errors reach their submitters.
+def test_micro_batcher():
+    batches = []
+
+    def process_batch(items):
+        batches.append(list(items))
+        return [ValueError(x) if x < 0 else 2 * x for x in items]
+
+    async def scenario():
+        batcher = MicroBatcher(process_batch, max_batch_size=4,
+                               max_wait_ms=20)
+        batcher.start()
+        results = await asyncio.gather(*[batcher.submit(x)
+                                         for x in [1, 2, -3, 4, 5, 6]],
+                                       return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    results = run(scenario())
+
+    assert(results[:2]==[2, 4] and results[3:]==[8, 10, 12])
+    assert(isinstance(results[2], ValueError))
+    assert([len(batch) for batch in batches]==[4, 2])